@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga del modo servidor (python main.py servidor).
+
+Abre muchas conexiones concurrentes con keep-alive, cada una simulando una tableta o un
+kiosco: crea un pedido, agrega un producto y lo cobra. Informa los pedidos por segundo
+y las latencias (promedio, p50, p95, p99) de cada tipo de solicitud.
+
+Uso:
+    python benchmarks/carga_http.py --iniciar                     # Servidor temporal propio
+    python benchmarks/carga_http.py --host 127.0.0.1 --puerto 8080 --clientes 200 --pedidos 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+import main  # noqa: E402
+
+
+class Cliente:
+    """Conexión HTTP/1.1 persistente mínima"""
+    
+    def __init__(self, host: str, puerto: int, token: str = None):
+        self.host = host
+        self.puerto = puerto
+        self.token = token
+        self.reader = None
+        self.writer = None
+    
+    async def solicitar(self, metodo: str, ruta: str, datos: dict = None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.puerto)
+        cuerpo = json.dumps(datos).encode('utf-8') if datos is not None else b''
+        encabezados = f"{metodo} {ruta} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(cuerpo)}\r\n"
+        if self.token:
+            encabezados += f"Authorization: Bearer {self.token}\r\n"
+        self.writer.write(encabezados.encode('latin-1') + b"\r\n" + cuerpo)
+        
+        estado = int((await self.reader.readline()).split()[1])
+        longitud = 0
+        while True:
+            linea = await self.reader.readline()
+            if linea in (b'\r\n', b''):
+                break
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            if nombre.lower() == 'content-length':
+                longitud = int(valor)
+        return estado, json.loads(await self.reader.readexactly(longitud))
+    
+    def cerrar(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def percentil(orden: list, p: float) -> float:
+    return orden[min(len(orden) - 1, int(len(orden) * p))]
+
+
+async def simular(args, productos: list, latencias: dict, errores: list):
+    """Un cliente que hace sus pedidos uno tras otro"""
+    cliente = Cliente(args.host, args.puerto, args.token)
+    try:
+        for n in range(args.pedidos):
+            producto = productos[n % len(productos)]
+            pasos = [('crear', 'POST', '/pedidos', {"usuario": "kiosco", "items": {producto: 1}}), None,
+                     ('cobrar', 'POST', None, None)]
+            pedido_id = None
+            for paso in pasos:
+                if paso is None:
+                    paso = ('agregar', 'POST', f"/pedidos/{pedido_id}/items", {"producto": producto, "cantidad": 1})
+                nombre, metodo, ruta, datos = paso
+                ruta = ruta or f"/pedidos/{pedido_id}/cobrar"
+                inicio = time.perf_counter()
+                estado, respuesta = await cliente.solicitar(metodo, ruta, datos)
+                latencias[nombre].append(time.perf_counter() - inicio)
+                if estado >= 400:
+                    errores.append(f"{nombre}: {estado} {respuesta.get('error')}")
+                    break
+                pedido_id = pedido_id or respuesta['id']
+    finally:
+        cliente.cerrar()
+
+
+async def ejecutar_carga(args) -> int:
+    cliente = Cliente(args.host, args.puerto, args.token)
+    estado, menu = await cliente.solicitar('GET', '/menu')
+    cliente.cerrar()
+    if estado != 200 or not menu['productos']:
+        print(f"{main.Color.FAIL}No se pudo obtener el menú ({estado}){main.Color.ENDC}")
+        return 1
+    productos = [p['nombre'] for p in menu['productos']]
+    
+    latencias = {'crear': [], 'agregar': [], 'cobrar': []}
+    errores = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(simular(args, productos, latencias, errores) for _ in range(args.clientes)))
+    segundos = time.perf_counter() - inicio
+    
+    cobrados = len(latencias['cobrar']) - sum(1 for e in errores if e.startswith('cobrar'))
+    solicitudes = sum(len(v) for v in latencias.values())
+    print(f"  Pedidos cobrados: {cobrados} en {segundos:.2f} s")
+    print(f"  Rendimiento: {cobrados / segundos:,.0f} pedidos/s · {solicitudes / segundos:,.0f} solicitudes/s")
+    print(f"\n  {'Solicitud':<10} {'Promedio':>10} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for nombre, muestras in latencias.items():
+        if not muestras:
+            continue
+        orden = sorted(muestras)
+        print(f"  {nombre:<10} {sum(orden) / len(orden) * 1000:>8.2f}ms {percentil(orden, 0.5) * 1000:>8.2f}ms "
+              f"{percentil(orden, 0.95) * 1000:>8.2f}ms {percentil(orden, 0.99) * 1000:>8.2f}ms")
+    
+    if errores:
+        print(f"\n  {main.Color.FAIL}Errores: {len(errores)} (primero: {errores[0]}){main.Color.ENDC}")
+        return 1
+    return 0
+
+
+def iniciar_servidor(args):
+    """Levanta el servidor en un directorio temporal con la configuración de ejemplo"""
+    directorio = tempfile.mkdtemp(prefix='carga_http_')
+    shutil.copy(os.path.join(RAIZ, 'config.example.json'), os.path.join(directorio, main.ConfigManager.CONFIG_FILE))
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        args.puerto = s.getsockname()[1]
+    
+    proceso = subprocess.Popen([sys.executable, os.path.join(RAIZ, 'main.py'), 'servidor',
+                                '--host', args.host, '--puerto', str(args.puerto)],
+                               cwd=directorio, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection((args.host, args.puerto), 0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return proceso, directorio
+
+
+def main_carga():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=main.ApiServer.PUERTO)
+    parser.add_argument('--token', help="Token del servidor, si está configurado")
+    parser.add_argument('--clientes', type=int, default=200, help="Conexiones concurrentes")
+    parser.add_argument('--pedidos', type=int, default=20, help="Pedidos por cliente")
+    parser.add_argument('--iniciar', action='store_true', help="Inicia un servidor temporal en un puerto libre")
+    args = parser.parse_args()
+    
+    proceso = directorio = None
+    if args.iniciar:
+        proceso, directorio = iniciar_servidor(args)
+    
+    print(f"{main.Color.BOLD}Carga HTTP: {args.clientes} clientes × {args.pedidos} pedidos "
+          f"contra {args.host}:{args.puerto}{main.Color.ENDC}")
+    try:
+        loop = asyncio.new_event_loop()
+        codigo = loop.run_until_complete(ejecutar_carga(args))
+        loop.close()
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+            shutil.rmtree(directorio, ignore_errors=True)
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main_carga())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Prueba de estrés: varias terminales registrando ventas a la vez sobre el mismo directorio.
+
+Lanza N procesos que venden simultáneamente y verifica que no se pierda ni se
+corrompa ninguna transacción, que las estadísticas y el índice de IDs coincidan con el
+historial y que las ediciones concurrentes del menú se conserven todas.
+
+Uso:
+    python benchmarks/estres_concurrencia.py --procesos 32 --ventas 500
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import main  # noqa: E402
+
+
+CONFIG = {
+    "business_name": "Prueba de estrés",
+    "currency": "$",
+    "users": {"admin": {"admin": "admin"}, "regular": {"cajero": "cajero"}},
+    "menu": {"Producto": 1.0}
+}
+
+
+def terminal(directorio: str, indice: int, ventas: int, barrera) -> float:
+    """Registra ventas como una terminal independiente. Retorna los segundos empleados"""
+    os.chdir(directorio)
+    usuario = f"terminal{indice:02d}"
+    barrera.wait()
+    
+    inicio = time.perf_counter()
+    for secuencia in range(ventas):
+        # La cantidad identifica la venta para detectar pérdidas
+        main.TransactionManager.registrar_venta(usuario, {"Producto": secuencia + 1}, 100, "$")
+    main.TransactionManager.cerrar()
+    segundos = time.perf_counter() - inicio
+    
+    # Edición concurrente del menú: cada terminal agrega un producto propio
+    menu_manager = main.MenuManager(main.ConfigManager.cargar_config())
+    menu_manager.agregar_producto(f"Producto {usuario}", 1.0)
+    main.Logger.cerrar()
+    return segundos
+
+
+def verificar(directorio: str, procesos: int, ventas: int) -> list:
+    """Compara el historial con lo vendido. Retorna la lista de errores"""
+    os.chdir(directorio)
+    errores = []
+    vistas = {f"terminal{i:02d}": set() for i in range(procesos)}
+    ids = set()
+    cantidad = 0
+    
+    for nombre, ruta in main.TransactionManager._obtener_store().particiones():
+        with main.TransactionJournal(ruta)._abrir_lectura() as f:
+            for numero, linea in enumerate(f, 1):
+                try:
+                    transaction = json.loads(linea)
+                except json.JSONDecodeError:
+                    errores.append(f"{ruta}:{numero}: línea corrupta")
+                    continue
+                cantidad += 1
+                ids.add(transaction['id'])
+                secuencia = transaction['pedido']['Producto']
+                if secuencia in vistas[transaction['usuario']]:
+                    errores.append(f"venta duplicada: {transaction['usuario']} #{secuencia}")
+                vistas[transaction['usuario']].add(secuencia)
+    
+    esperadas = set(range(1, ventas + 1))
+    for usuario, secuencias in vistas.items():
+        faltantes = esperadas - secuencias
+        if faltantes:
+            errores.append(f"{usuario}: {len(faltantes)} ventas perdidas")
+    
+    indice = main.TransactionManager._obtener_store().verificar_indice_ids()
+    if indice['faltantes'] or indice['sobrantes'] or indice['desactualizadas']:
+        errores.append(f"índice de IDs: {indice['faltantes']} faltantes, {indice['sobrantes']} sobrantes, "
+                       f"particiones sin indexar: {indice['desactualizadas']}")
+    
+    stats = main.TransactionManager.obtener_estadisticas()
+    if stats['cantidad_transacciones'] != procesos * ventas:
+        errores.append(f"estadísticas: {stats['cantidad_transacciones']} transacciones, "
+                       f"se esperaban {procesos * ventas}")
+    main.TransactionManager.cerrar()
+    
+    with open(main.ConfigManager.CONFIG_FILE, 'r', encoding='utf-8') as f:
+        menu = json.load(f)['menu']
+    perdidos = [u for u in vistas if f"Producto {u}" not in menu]
+    if perdidos:
+        errores.append(f"menú: {len(perdidos)} productos agregados se perdieron")
+    
+    if len(ids) != cantidad:
+        errores.append(f"IDs repetidos: {cantidad - len(ids)}")
+    
+    print(f"  Transacciones en disco: {cantidad} (IDs distintos: {len(ids)})")
+    return errores
+
+
+def main_estres():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--procesos', type=int, default=32, help="Terminales simultáneas")
+    parser.add_argument('--ventas', type=int, default=500, help="Ventas por terminal")
+    parser.add_argument('--directorio', help="Directorio de datos (por defecto uno temporal)")
+    args = parser.parse_args()
+    
+    directorio = args.directorio or tempfile.mkdtemp(prefix='estres_pos_')
+    os.makedirs(directorio, exist_ok=True)
+    with open(os.path.join(directorio, main.ConfigManager.CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump(CONFIG, f)
+    
+    print(f"{main.Color.BOLD}Estrés de concurrencia: {args.procesos} procesos × {args.ventas} ventas{main.Color.ENDC}")
+    print(f"  Directorio: {directorio}")
+    
+    barrera = multiprocessing.Manager().Barrier(args.procesos)
+    inicio = time.perf_counter()
+    with multiprocessing.Pool(args.procesos) as pool:
+        tiempos = pool.starmap(terminal, [(directorio, i, args.ventas, barrera) for i in range(args.procesos)])
+    total = time.perf_counter() - inicio
+    
+    errores = verificar(directorio, args.procesos, args.ventas)
+    ventas = args.procesos * args.ventas
+    print(f"  Tiempo total: {total:.2f} s · terminal más lenta: {max(tiempos):.2f} s")
+    print(f"  Rendimiento agregado: {ventas / max(tiempos):,.0f} ventas/s")
+    
+    if not args.directorio:
+        shutil.rmtree(directorio, ignore_errors=True)
+    
+    if errores:
+        for error in errores[:20]:
+            print(f"  {main.Color.FAIL}✗ {error}{main.Color.ENDC}")
+        return 1
+    print(f"  {main.Color.OKGREEN}✓ Ninguna transacción perdida ni corrupta{main.Color.ENDC}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_estres())
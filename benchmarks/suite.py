@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Suite de rendimiento del almacenamiento y los reportes.
+
+Genera con semilla fija menús e historiales sintéticos y mide, para cada tamaño, la
+latencia (promedio, p50, p95, p99, máximo), el rendimiento en operaciones por segundo y
+el pico de memoria de:
+
+    registrar_venta                  historial de N ventas (+ las registradas al medir)
+    _cargar_transacciones            historial completo en columnas
+    obtener_estadisticas             estadísticas globales
+    generar_reporte_transacciones    pantalla de últimas transacciones (salida descartada)
+    guardar_config                   configuración con un menú de M productos
+
+Las operaciones sobre el historial se miden por tamaño de historial (1k a 10M ventas) con
+un menú de --productos artículos; guardar_config se mide por tamaño de menú (10 a 50k).
+Cada escenario corre en un directorio temporal propio. Cada operación se mide en varias
+rondas (--rondas) y se informa lo mejor de ellas, junto con la dispersión del p50 entre
+rondas; las operaciones por segundo salen de la mediana. La latencia se toma sin
+tracemalloc; el pico de memoria sale de una llamada adicional con tracemalloc activo.
+
+El resultado se guarda en JSON con --salida. El modo --comparar contrasta dos
+ejecuciones, o dos grupos de ejecuciones separadas por comas (se toma lo mejor de cada
+grupo), y marca como regresión el p50, el p95 (con 100 muestras o más) o la memoria que
+empeore por encima del ruido absoluto y de la tolerancia: el umbral (10% por defecto) o,
+si es mayor, el doble de la dispersión medida entre rondas y entre ejecuciones. En ese
+caso termina con código 1, para usarlo antes de cada despliegue.
+
+Uso:
+    python benchmarks/suite.py --salida base.json
+    python benchmarks/suite.py --menus 10,1000,50000 --historiales 1000,100000,1000000 --salida actual.json
+    python benchmarks/suite.py --comparar base.json actual.json --umbral 0.15
+    python benchmarks/suite.py --comparar base1.json,base2.json actual1.json,actual2.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import main  # noqa: E402
+
+
+VERSION = 2
+RANGO_MENUS = (10, 50000)
+RANGO_HISTORIALES = (1000, 10000000)
+LOTE_GENERACION = 5000
+# Métricas comparadas (ops_por_segundo se deriva del p50 y no se compara aparte)
+METRICAS = ('p50_ms', 'p95_ms', 'memoria_pico_bytes')
+# Diferencias absolutas por debajo de esto se consideran ruido
+RUIDO_MS = 0.05
+RUIDO_BYTES = 64 * 1024
+# Con menos muestras por ronda el p95 es prácticamente el máximo
+MIN_MUESTRAS_P95 = 100
+# La tolerancia de latencia es al menos este múltiplo de la dispersión entre rondas
+FACTOR_DISPERSION = 2
+
+
+def percentil(orden: list, p: float) -> float:
+    return orden[min(len(orden) - 1, int(len(orden) * p))]
+
+
+def dispersion(valores: list) -> float:
+    """Diferencia relativa entre el mayor y el menor valor"""
+    return round((max(valores) - min(valores)) / min(valores), 4) if min(valores) else 0.0
+
+
+def menu_sintetico(productos: int, semilla: int) -> dict:
+    """Menú de la configuración: nombre -> precio en unidades"""
+    aleatorio = random.Random(semilla)
+    return {f"Producto {i:05d}": main.Money.a_unidades(aleatorio.randint(100, 5000)) for i in range(productos)}
+
+
+def configuracion(menu: dict, motor: str) -> dict:
+    return {
+        "business_name": "Suite de rendimiento",
+        "currency": "$",
+        "users": {"admin": {"admin": "admin"}, "regular": {"cajero": "cajero"}},
+        "menu": menu,
+        "storage": {"engine": motor}
+    }
+
+
+def pedido_sintetico(aleatorio: random.Random, menu: list) -> tuple:
+    """(pedido, total_centavos, precios_centavos) de 1 a 4 productos del menú"""
+    elegidos = aleatorio.sample(menu, min(len(menu), aleatorio.randint(1, 4)))
+    pedido = {nombre: aleatorio.randint(1, 3) for nombre, _ in elegidos}
+    precios = dict(elegidos)
+    return pedido, sum(precios[p] * c for p, c in pedido.items()), precios
+
+
+def generar_historial(ventas: int, menu: dict, usuarios: int, semilla: int):
+    """Registra un año de ventas sintéticas por lotes, como una importación"""
+    aleatorio = random.Random(semilla)
+    productos = [(nombre, main.Money.a_centavos(precio)) for nombre, precio in menu.items()]
+    cajeros = [f"cajero{i:02d}" for i in range(usuarios)]
+    inicio = datetime(2025, 1, 1)
+    paso = 365 * 86400 / ventas
+    
+    for desde in range(0, ventas, LOTE_GENERACION):
+        lote = []
+        for i in range(desde, min(ventas, desde + LOTE_GENERACION)):
+            pedido, total, precios = pedido_sintetico(aleatorio, productos)
+            lote.append({
+                "usuario": aleatorio.choice(cajeros),
+                "fecha": (inicio + timedelta(seconds=int(i * paso))).strftime("%Y-%m-%d %H:%M:%S"),
+                "pedido": pedido,
+                "total_centavos": total,
+                "moneda": "$",
+                "precios_centavos": precios
+            })
+        main.TransactionManager.registrar_lote(lote)
+
+
+@contextlib.contextmanager
+def escenario(config: dict):
+    """Directorio de datos temporal con la configuración dada; restaura el estado al salir"""
+    anterior = os.getcwd()
+    directorio = tempfile.mkdtemp(prefix='suite_')
+    os.chdir(directorio)
+    try:
+        with open(main.ConfigManager.CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=4, ensure_ascii=False)
+        main.ConfigManager._base = None
+        config = main.ConfigManager.cargar_config()
+        main.Logger.configurar(config)
+        main.Money.configurar(config)
+        main.BackupManager.configurar(config)
+        main.TransactionManager.configurar(config)
+        yield config
+    finally:
+        main.TransactionManager.cerrar()
+        main.Logger.cerrar()
+        os.chdir(anterior)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def medir(operacion, repeticiones: int, rondas: int) -> dict:
+    """Latencias, rendimiento y pico de memoria de operacion(): lo mejor de varias rondas.
+    
+    Cada ronda hace una llamada de calentamiento y 'repeticiones' mediciones. De cada
+    estadística se conserva el mínimo entre rondas (la ronda menos perturbada por el resto
+    del sistema) y se informa la dispersión del p50 entre rondas.
+    """
+    estadisticas = {"promedio_ms": [], "p50_ms": [], "p95_ms": [], "p99_ms": [], "max_ms": []}
+    for _ in range(rondas):
+        operacion()
+        latencias = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            operacion()
+            latencias.append(time.perf_counter() - inicio)
+        
+        orden = sorted(latencias)
+        estadisticas["promedio_ms"].append(sum(orden) / len(orden) * 1000)
+        estadisticas["p50_ms"].append(percentil(orden, 0.5) * 1000)
+        estadisticas["p95_ms"].append(percentil(orden, 0.95) * 1000)
+        estadisticas["p99_ms"].append(percentil(orden, 0.99) * 1000)
+        estadisticas["max_ms"].append(orden[-1] * 1000)
+    
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    operacion()
+    pico = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    
+    resultado = {"muestras": repeticiones, "rondas": rondas}
+    resultado.update({clave: round(min(valores), 4) for clave, valores in estadisticas.items()})
+    resultado["dispersion_p50"] = dispersion(estadisticas["p50_ms"])
+    resultado["dispersion_p95"] = dispersion(estadisticas["p95_ms"])
+    resultado["ops_por_segundo"] = round(1000 / resultado["p50_ms"], 2) if resultado["p50_ms"] else 0.0
+    resultado["memoria_pico_bytes"] = max(pico, 0)
+    return resultado
+
+
+def medir_historial(ventas: int, args) -> list:
+    """Operaciones de historial sobre un historial sintético de 'ventas' transacciones"""
+    menu = menu_sintetico(args.productos, args.semilla)
+    aleatorio = random.Random(args.semilla + ventas)
+    productos = [(nombre, main.Money.a_centavos(precio)) for nombre, precio in menu.items()]
+    resultados = []
+    
+    with escenario(configuracion(menu, args.engine)):
+        inicio = time.perf_counter()
+        generar_historial(ventas, menu, args.usuarios, args.semilla)
+        main.TransactionManager.cerrar()
+        print(f"  {main.Color.OKCYAN}Historial de {ventas:,} ventas generado en "
+              f"{time.perf_counter() - inicio:.1f} s{main.Color.ENDC}", file=sys.stderr)
+        
+        def registrar():
+            pedido, total, precios = pedido_sintetico(aleatorio, productos)
+            main.TransactionManager.registrar_venta("cajero00", pedido, total, "$", precios)
+        
+        def reporte():
+            with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+                main.ReportManager.generar_reporte_transacciones()
+        
+        operaciones = (
+            ('_cargar_transacciones', main.TransactionManager._cargar_transacciones, args.repeticiones_carga),
+            ('obtener_estadisticas', main.TransactionManager.obtener_estadisticas, args.repeticiones),
+            ('generar_reporte_transacciones', reporte, args.repeticiones),
+            ('registrar_venta', registrar, args.repeticiones)
+        )
+        for nombre, operacion, repeticiones in operaciones:
+            resultado = {"operacion": nombre, "menu": args.productos, "historial": ventas}
+            resultado.update(medir(operacion, repeticiones, args.rondas))
+            resultados.append(resultado)
+    return resultados
+
+
+def medir_config(productos: int, args) -> list:
+    """guardar_config con un menú de 'productos' artículos"""
+    with escenario(configuracion(menu_sintetico(productos, args.semilla), args.engine)) as config:
+        resultado = {"operacion": "guardar_config", "menu": productos, "historial": 0}
+        resultado.update(medir(lambda: main.ConfigManager.guardar_config(config), args.repeticiones, args.rondas))
+        return [resultado]
+
+
+def tamanos(texto: str, rango: tuple, nombre: str) -> list:
+    try:
+        valores = sorted({int(v.replace('_', '')) for v in texto.split(',') if v.strip()})
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Lista de {nombre} inválida: {texto}")
+    if not valores or valores[0] < rango[0] or valores[-1] > rango[1]:
+        raise argparse.ArgumentTypeError(f"Los {nombre} deben estar entre {rango[0]:,} y {rango[1]:,}")
+    return valores
+
+
+def mostrar(resultados: list):
+    print(f"{main.Color.BOLD}  {'Operación':<30} {'Menú':>7} {'Historial':>10} {'p50':>10} {'p95':>10} "
+          f"{'p99':>10} {'ops/s':>10} {'Memoria':>10}{main.Color.ENDC}")
+    for r in resultados:
+        print(f"  {r['operacion']:<30} {r['menu']:>7,} {r['historial']:>10,} {r['p50_ms']:>8.3f}ms "
+              f"{r['p95_ms']:>8.3f}ms {r['p99_ms']:>8.3f}ms {r['ops_por_segundo']:>10,.1f} "
+              f"{r['memoria_pico_bytes'] / 2 ** 20:>7.2f} MB")
+
+
+def cargar_ejecuciones(rutas: str) -> Tuple[dict, Dict[tuple, dict]]:
+    """Combina una o más ejecuciones ('a.json,b.json'): lo mejor de cada métrica por escenario.
+    
+    La dispersión de cada latencia es la mayor entre la medida dentro de cada ejecución
+    (entre rondas) y la observada entre las ejecuciones. Retorna (encabezado, resultados).
+    """
+    ejecuciones = []
+    for ruta in rutas.split(','):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            ejecuciones.append(json.load(f))
+    
+    por_clave: Dict[tuple, List[dict]] = {}
+    for ejecucion in ejecuciones:
+        for r in ejecucion['resultados']:
+            por_clave.setdefault((r['operacion'], r['menu'], r['historial']), []).append(r)
+    
+    combinados = {}
+    for clave, medidas in por_clave.items():
+        combinado = dict(medidas[0])
+        for metrica in METRICAS:
+            combinado[metrica] = min(m[metrica] for m in medidas)
+        for percentil_ in ('p50', 'p95'):
+            valores = [m[f'{percentil_}_ms'] for m in medidas]
+            propias = [m.get(f'dispersion_{percentil_}', 0) for m in medidas]
+            combinado[f'dispersion_{percentil_}'] = max(propias + [dispersion(valores)])
+        combinado['muestras'] = min(m['muestras'] for m in medidas)
+        combinados[clave] = combinado
+    return ejecuciones[0], combinados
+
+
+def comparar(rutas_base: str, rutas_actual: str, umbral: float) -> int:
+    """Contrasta dos ejecuciones (o grupos de ejecuciones). Retorna 1 si hay regresiones"""
+    base, anteriores = cargar_ejecuciones(rutas_base)
+    actual, resultados = cargar_ejecuciones(rutas_actual)
+    
+    for clave in ('python', 'plataforma', 'engine'):
+        if base.get(clave) != actual.get(clave):
+            print(f"{main.Color.WARNING}⚠ {clave} distinto: {base.get(clave)} → {actual.get(clave)}{main.Color.ENDC}")
+    
+    regresiones = 0
+    print(f"{main.Color.BOLD}Comparación {rutas_base} → {rutas_actual} (umbral {umbral:.0%}){main.Color.ENDC}")
+    for clave, r in resultados.items():
+        anterior = anteriores.pop(clave, None)
+        etiqueta = f"{r['operacion']} (menú {r['menu']:,}, historial {r['historial']:,})"
+        if anterior is None:
+            print(f"  {main.Color.OKCYAN}+ {etiqueta}: sin medición base{main.Color.ENDC}")
+            continue
+        
+        cambios = []
+        peor = False
+        for metrica in METRICAS:
+            antes, ahora = anterior[metrica], r[metrica]
+            if not antes:
+                continue
+            if metrica == 'p95_ms' and min(anterior['muestras'], r['muestras']) < MIN_MUESTRAS_P95:
+                continue
+            if metrica == 'memoria_pico_bytes':
+                ruido, tolerancia = RUIDO_BYTES, umbral
+            else:
+                # La latencia tolera al menos la variación que la propia máquina mostró
+                propia = 'dispersion_' + metrica[:3]
+                ruido = RUIDO_MS
+                tolerancia = max(umbral, FACTOR_DISPERSION * max(anterior.get(propia, 0), r.get(propia, 0)))
+            variacion = (ahora - antes) / antes
+            if ahora - antes >= ruido and variacion > tolerancia:
+                peor = True
+                cambios.append(f"{metrica} {antes:,} → {ahora:,} ({variacion:+.0%}, tolerancia {tolerancia:.0%})")
+        
+        if peor:
+            regresiones += 1
+            print(f"  {main.Color.FAIL}✗ {etiqueta}: {'; '.join(cambios)}{main.Color.ENDC}")
+        else:
+            print(f"  {main.Color.OKGREEN}✓ {etiqueta}: p50 {anterior['p50_ms']} → {r['p50_ms']} ms{main.Color.ENDC}")
+    for clave in anteriores:
+        print(f"  {main.Color.WARNING}- {clave[0]} (menú {clave[1]:,}, historial {clave[2]:,}): "
+              f"sin medición actual{main.Color.ENDC}")
+    
+    if regresiones:
+        print(f"{main.Color.FAIL}{regresiones} regresiones por encima de la tolerancia{main.Color.ENDC}")
+        return 1
+    print(f"{main.Color.OKGREEN}Sin regresiones{main.Color.ENDC}")
+    return 0
+
+
+def main_suite():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--menus', default='10,1000',
+                        type=lambda t: tamanos(t, RANGO_MENUS, "menús"),
+                        help="Tamaños de menú para guardar_config, separados por comas (10 a 50000)")
+    parser.add_argument('--historiales', default='1000,20000',
+                        type=lambda t: tamanos(t, RANGO_HISTORIALES, "historiales"),
+                        help="Tamaños de historial, separados por comas (1000 a 10000000)")
+    parser.add_argument('--productos', type=int, default=200, help="Productos del menú de los historiales")
+    parser.add_argument('--usuarios', type=int, default=8, help="Cajeros distintos")
+    parser.add_argument('--repeticiones', type=int, default=100, help="Mediciones por operación")
+    parser.add_argument('--repeticiones-carga', type=int, default=5,
+                        help="Mediciones de _cargar_transacciones (recorre todo el historial)")
+    parser.add_argument('--rondas', type=int, default=3, help="Rondas por operación; se informa la mejor")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla del generador")
+    parser.add_argument('--engine', choices=main.TransactionManager.MOTORES, default='json',
+                        help="Motor de almacenamiento")
+    parser.add_argument('--salida', help="Archivo JSON con los resultados")
+    parser.add_argument('--json', action='store_true', help="Escribir los resultados en JSON por la salida estándar")
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'ACTUAL'),
+                        help="Comparar dos ejecuciones; cada lado admite varias separadas por comas")
+    parser.add_argument('--umbral', type=float, default=0.10, help="Empeoramiento tolerado al comparar (0.10 = 10%%)")
+    args = parser.parse_args()
+    
+    if args.comparar:
+        return comparar(args.comparar[0], args.comparar[1], args.umbral)
+    if min(args.repeticiones, args.repeticiones_carga, args.rondas, args.productos) < 1:
+        parser.error("Las repeticiones, las rondas y los productos deben ser positivos")
+    
+    resultados = []
+    for ventas in args.historiales:
+        resultados += medir_historial(ventas, args)
+    for productos in args.menus:
+        resultados += medir_config(productos, args)
+    
+    informe = {
+        "version": VERSION,
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "engine": args.engine,
+        "semilla": args.semilla,
+        "resultados": resultados
+    }
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+    if args.json:
+        print(json.dumps(informe, indent=2, ensure_ascii=False))
+    else:
+        mostrar(resultados)
+        if args.salida:
+            print(f"{main.Color.OKGREEN}✓ Resultados guardados en {args.salida}{main.Color.ENDC}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_suite())
@@ -7,10 +7,56 @@ Desarrollado para empresas que requieren control total de sus operaciones.
 import time
 import json
 import os
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+import sys
+import argparse
+import concurrent.futures
+import multiprocessing
+import bisect
+import calendar
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
 import hashlib
+import hmac
+import ipaddress
 import shutil
+import csv
+import copy
+from contextlib import contextmanager, ExitStack
+import gzip
+import zlib
+import re
+import difflib
+import unicodedata
+import struct
+import mmap
+import socket
+import threading
+import atexit
+import functools
+import cProfile
+import queue
+import sqlite3
+import asyncio
+import signal
+import secrets
+import urllib.parse
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
 
 
 class Color:
@@ -27,194 +73,3439 @@ class Color:
 
 
 class Logger:
-    """Sistema de logging profesional"""
+    """Sistema de logging profesional con escritura en segundo plano"""
+    
+    LOG_FILE = 'business.log'
+    LOTE = 64                    # Entradas por escritura
+    INTERVALO = 0.5              # Segundos máximos antes de escribir un lote
+    ROTACION = 'tamano'          # 'tamano' o 'diaria'
+    MAX_BYTES = 5 * 1024 * 1024
+    RETENCION = 5                # Archivos rotados que se conservan
+    FORMATO = 'texto'            # 'texto' o 'json' (JSON Lines)
+    FORMATOS = ('texto', 'json')
+    ROTACIONES = ('tamano', 'diaria')
+    
+    _cola: Optional[queue.Queue] = None
+    _hilo: Optional[threading.Thread] = None
+    _pid: Optional[int] = None
+    _candado = threading.Lock()
+    
+    @staticmethod
+    def configurar(config: dict):
+        """Aplica la clave opcional "logging" de la configuración"""
+        opciones = config.get('logging', {})
+        formato = opciones.get('format', Logger.FORMATO)
+        rotacion = opciones.get('rotation', Logger.ROTACION)
+        if formato not in Logger.FORMATOS:
+            raise ValueError(f"Formato de log desconocido: {formato}")
+        if rotacion not in Logger.ROTACIONES:
+            raise ValueError(f"Rotación de log desconocida: {rotacion}")
+        
+        Logger.FORMATO = formato
+        Logger.ROTACION = rotacion
+        Logger.MAX_BYTES = int(opciones.get('max_bytes', Logger.MAX_BYTES))
+        Logger.RETENCION = int(opciones.get('retention', Logger.RETENCION))
+    
+    @staticmethod
+    def log(message: str, level: str = "INFO"):
+        """Encola un evento; el hilo escritor lo registra en el archivo de log"""
+        Logger._obtener_cola().put((datetime.now(), level, message))
+    
+    @staticmethod
+    def _obtener_cola() -> queue.Queue:
+        """Inicia el hilo escritor en el primer uso (y de nuevo en un proceso hijo)"""
+        if Logger._pid != os.getpid():
+            with Logger._candado:
+                if Logger._pid != os.getpid():
+                    Logger._cola = queue.Queue()
+                    Logger._hilo = threading.Thread(target=Logger._escritor, args=(Logger._cola,),
+                                                    name='logger', daemon=True)
+                    Logger._hilo.start()
+                    Logger._pid = os.getpid()
+                    atexit.register(Logger.cerrar)
+        return Logger._cola
+    
+    @staticmethod
+    def cerrar():
+        """Escribe las entradas pendientes y detiene el hilo escritor"""
+        with Logger._candado:
+            if Logger._pid != os.getpid():
+                return
+            Logger._cola.put(None)
+            Logger._hilo.join()
+            Logger._cola = Logger._hilo = Logger._pid = None
+    
+    @staticmethod
+    def _escritor(cola: queue.Queue):
+        """Agrupa entradas hasta completar un lote o vencer el intervalo y las escribe juntas"""
+        archivo = None
+        terminar = False
+        while not terminar:
+            entrada = cola.get()
+            lote = [entrada]
+            limite = time.monotonic() + Logger.INTERVALO
+            while entrada is not None and len(lote) < Logger.LOTE:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    entrada = cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                lote.append(entrada)
+            
+            terminar = lote[-1] is None
+            lineas = ''.join(Logger._formatear(*e) for e in lote if e is not None)
+            if not lineas:
+                continue
+            
+            try:
+                archivo = Logger._rotar_si_corresponde(archivo, len(lineas.encode('utf-8')))
+                archivo.write(lineas)
+                archivo.flush()
+            except OSError as e:
+                print(f"{Color.FAIL}Error al escribir el log: {e}{Color.ENDC}", file=sys.stderr)
+                archivo = None
+        
+        if archivo is not None:
+            archivo.close()
+    
+    @staticmethod
+    def _formatear(momento: datetime, level: str, message: str) -> str:
+        timestamp = momento.strftime("%Y-%m-%d %H:%M:%S")
+        if Logger.FORMATO == 'json':
+            return json.dumps({"fecha": timestamp, "nivel": level, "mensaje": message},
+                              ensure_ascii=False) + '\n'
+        return f"[{timestamp}] [{level}] {message}\n"
+    
+    @staticmethod
+    def _rotar_si_corresponde(archivo, nuevos: int):
+        """Rota el log por tamaño o por día. Retorna el archivo abierto para anexar.
+        
+        Varias terminales comparten el log: si otra ya lo rotó, el archivo abierto dejó de
+        ser LOG_FILE y se reabre antes de escribir; la rotación se decide sobre el tamaño
+        real del archivo y los renombres se hacen bajo un bloqueo entre procesos.
+        """
+        archivo = Logger._reabrir_si_rotado(archivo)
+        if not Logger._debe_rotar(archivo, nuevos):
+            return archivo
+        
+        with FileLock(Logger.LOG_FILE):
+            # Otra terminal pudo rotar mientras se esperaba el bloqueo
+            archivo = Logger._reabrir_si_rotado(archivo)
+            if not Logger._debe_rotar(archivo, nuevos):
+                return archivo
+            archivo.close()
+            
+            if Logger.ROTACION == 'diaria':
+                dia = datetime.fromtimestamp(os.path.getmtime(Logger.LOG_FILE)).strftime('%Y-%m-%d')
+                os.replace(Logger.LOG_FILE, f"{Logger.LOG_FILE}.{dia}")
+                directorio = os.path.dirname(Logger.LOG_FILE) or '.'
+                patron = re.compile(re.escape(os.path.basename(Logger.LOG_FILE)) + r'\.\d{4}-\d{2}-\d{2}$')
+                rotados = sorted(f for f in os.listdir(directorio) if patron.match(f))
+                for viejo in rotados[:max(len(rotados) - Logger.RETENCION, 0)]:
+                    os.remove(os.path.join(directorio, viejo))
+            else:
+                for n in range(Logger.RETENCION - 1, 0, -1):
+                    if os.path.exists(f"{Logger.LOG_FILE}.{n}"):
+                        os.replace(f"{Logger.LOG_FILE}.{n}", f"{Logger.LOG_FILE}.{n + 1}")
+                if Logger.RETENCION:
+                    os.replace(Logger.LOG_FILE, f"{Logger.LOG_FILE}.1")
+                else:
+                    os.remove(Logger.LOG_FILE)
+            
+            return open(Logger.LOG_FILE, 'a', encoding='utf-8')
+    
+    @staticmethod
+    def _reabrir_si_rotado(archivo):
+        """El archivo abierto si sigue siendo LOG_FILE; si otra terminal lo rotó, LOG_FILE de nuevo"""
+        if archivo is not None:
+            try:
+                if os.stat(Logger.LOG_FILE).st_ino == os.fstat(archivo.fileno()).st_ino:
+                    return archivo
+            except FileNotFoundError:
+                pass
+            archivo.close()
+        return open(Logger.LOG_FILE, 'a', encoding='utf-8')
+    
+    @staticmethod
+    def _debe_rotar(archivo, nuevos: int) -> bool:
+        # Tamaño real del archivo: incluye lo que escribieron las demás terminales
+        estado = os.fstat(archivo.fileno())
+        if not estado.st_size:
+            return False
+        if Logger.ROTACION == 'diaria':
+            return datetime.fromtimestamp(estado.st_mtime).strftime('%Y-%m-%d') != datetime.now().strftime('%Y-%m-%d')
+        return estado.st_size + nuevos > Logger.MAX_BYTES
+    
+    @staticmethod
+    def info(message: str):
+        Logger.log(message, "INFO")
+    
+    @staticmethod
+    def warning(message: str):
+        Logger.log(message, "WARNING")
+    
+    @staticmethod
+    def error(message: str):
+        Logger.log(message, "ERROR")
+    
+    @staticmethod
+    def success(message: str):
+        Logger.log(message, "SUCCESS")
+
+
+class Metrics:
+    """Contadores e histogramas de latencia por operación, exportados en formato de texto de Prometheus.
+    
+    Desactivadas, cada operación instrumentada solo comprueba Metrics.activo. Se activan con
+    la variable de entorno NEGOCIO_METRICAS=1 o con la clave opcional "metrics"; la variable
+    NEGOCIO_PERFIL=<archivo> captura además un perfil de cProfile de todo el proceso.
+    """
+    
+    VARIABLE = 'NEGOCIO_METRICAS'
+    VARIABLE_PERFIL = 'NEGOCIO_PERFIL'
+    # Un archivo por proceso: con uno compartido cada terminal pisaría los contadores de otra
+    ARCHIVO = 'metrics-{pid}.prom'   # '{pid}' se reemplaza por el proceso
+    INTERVALO = 15               # Segundos mínimos entre escrituras del archivo
+    # Límites superiores de los intervalos del histograma, en segundos
+    LIMITES = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+    VERDADEROS = ('1', 'true', 'yes', 'si', 'sí', 'on')
+    
+    activo = os.environ.get(VARIABLE, '').strip().lower() in VERDADEROS
+    # operación -> [cuenta por intervalo..., más de 10 s, suma de segundos, errores]
+    _datos: Dict[str, list] = {}
+    _candado = threading.Lock()
+    _escrito = 0.0
+    _salida_registrada = False
+    _perfil = None
+    
+    class _Tramo:
+        """Mide un bloque con 'with'; una excepción lo cuenta como error"""
+        
+        __slots__ = ('nombre', 'inicio')
+        
+        def __init__(self, nombre: str):
+            self.nombre = nombre
+        
+        def __enter__(self):
+            self.inicio = time.perf_counter()
+            return self
+        
+        def __exit__(self, tipo, valor, traza):
+            Metrics.registrar(self.nombre, time.perf_counter() - self.inicio, tipo is not None)
+            return False
+    
+    class _Nulo:
+        """Bloque sin medición mientras las métricas están desactivadas"""
+        
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, tipo, valor, traza):
+            return False
+    
+    _NULO = _Nulo()
+    
+    @staticmethod
+    def configurar(config: dict):
+        """Aplica la clave opcional "metrics"; la variable de entorno también las activa"""
+        opciones = config.get('metrics', {})
+        Metrics.ARCHIVO = opciones.get('file', Metrics.ARCHIVO)
+        Metrics.INTERVALO = float(opciones.get('interval', Metrics.INTERVALO))
+        variable = os.environ.get(Metrics.VARIABLE, '').strip().lower() in Metrics.VERDADEROS
+        Metrics.activo = bool(opciones.get('enabled', False) or variable)
+        if Metrics.activo and not Metrics._salida_registrada:
+            Metrics._salida_registrada = True
+            atexit.register(Metrics.escribir)
+    
+    @staticmethod
+    def medir(funcion):
+        """Decorador: cuenta y mide cada llamada con el nombre calificado de la función"""
+        nombre = funcion.__qualname__
+        
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            if not Metrics.activo:
+                return funcion(*args, **kwargs)
+            inicio = time.perf_counter()
+            error = True
+            try:
+                resultado = funcion(*args, **kwargs)
+                error = False
+                return resultado
+            finally:
+                Metrics.registrar(nombre, time.perf_counter() - inicio, error)
+        return medida
+    
+    @staticmethod
+    def tramo(nombre: str):
+        """Administrador de contexto que mide un bloque como la operación 'nombre'"""
+        return Metrics._Tramo(nombre) if Metrics.activo else Metrics._NULO
+    
+    @staticmethod
+    def registrar(nombre: str, segundos: float, error: bool = False):
+        """Suma una llamada al histograma de la operación y escribe el archivo si toca"""
+        with Metrics._candado:
+            datos = Metrics._datos.get(nombre)
+            if datos is None:
+                datos = Metrics._datos[nombre] = [0] * (len(Metrics.LIMITES) + 1) + [0.0, 0]
+            datos[bisect.bisect_left(Metrics.LIMITES, segundos)] += 1
+            datos[-2] += segundos
+            datos[-1] += error
+            ahora = time.monotonic()
+            if ahora - Metrics._escrito < Metrics.INTERVALO:
+                return
+            Metrics._escrito = ahora
+        Metrics.escribir()
+    
+    @staticmethod
+    def _etiqueta(nombre: str) -> str:
+        return nombre.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    
+    @staticmethod
+    def exportar() -> str:
+        """Métricas acumuladas en el formato de texto de Prometheus"""
+        with Metrics._candado:
+            datos = {nombre: list(valores) for nombre, valores in Metrics._datos.items()}
+        
+        latencias = [
+            "# HELP negocio_operacion_segundos Latencia de las operaciones del sistema",
+            "# TYPE negocio_operacion_segundos histogram"
+        ]
+        errores = [
+            "# HELP negocio_operacion_errores_total Llamadas terminadas con una excepción",
+            "# TYPE negocio_operacion_errores_total counter"
+        ]
+        for nombre in sorted(datos):
+            valores = datos[nombre]
+            etiqueta = f'operacion="{Metrics._etiqueta(nombre)}",proceso="{os.getpid()}"'
+            acumulado = 0
+            for limite, cuenta in zip(Metrics.LIMITES + ('+Inf',), valores):
+                acumulado += cuenta
+                latencias.append(f'negocio_operacion_segundos_bucket{{{etiqueta},le="{limite}"}} {acumulado}')
+            latencias.append(f"negocio_operacion_segundos_sum{{{etiqueta}}} {valores[-2]:.6f}")
+            latencias.append(f"negocio_operacion_segundos_count{{{etiqueta}}} {acumulado}")
+            errores.append(f"negocio_operacion_errores_total{{{etiqueta}}} {valores[-1]}")
+        return '\n'.join(latencias + errores) + '\n'
+    
+    @staticmethod
+    def escribir():
+        """Reemplaza el archivo de métricas de forma atómica (para el textfile collector)"""
+        if not Metrics._datos:
+            return
+        archivo = Metrics.ARCHIVO.replace('{pid}', str(os.getpid()))
+        temporal = f"{archivo}.{os.getpid()}.tmp"
+        try:
+            with open(temporal, 'w', encoding='utf-8') as f:
+                f.write(Metrics.exportar())
+            os.replace(temporal, archivo)
+        except OSError as e:
+            Logger.warning(f"No se pudo escribir el archivo de métricas: {e}")
+    
+    @staticmethod
+    def iniciar_perfil():
+        """Con NEGOCIO_PERFIL=<archivo> perfila el proceso con cProfile hasta su salida"""
+        archivo = os.environ.get(Metrics.VARIABLE_PERFIL)
+        if not archivo or Metrics._perfil is not None:
+            return
+        Metrics._perfil = cProfile.Profile()
+        Metrics._perfil.enable()
+        atexit.register(Metrics.detener_perfil, os.path.abspath(archivo))
+    
+    @staticmethod
+    def detener_perfil(archivo: str):
+        """Guarda el perfil capturado (se lee con python -m pstats)"""
+        if Metrics._perfil is None:
+            return
+        Metrics._perfil.disable()
+        Metrics._perfil.dump_stats(archivo)
+        Metrics._perfil = None
+        print(f"{Color.OKCYAN}Perfil guardado en {archivo} (python -m pstats {archivo}){Color.ENDC}", file=sys.stderr)
+
+
+class FileLock:
+    """Bloqueo exclusivo entre procesos sobre un archivo .lock (fcntl, o msvcrt en Windows).
+    
+    Es reentrante dentro de un mismo proceso y excluye además a los hilos del proceso.
+    Sin ninguno de los dos módulos solo protege entre hilos.
+    """
+    
+    _registro: Dict[str, list] = {}     # ruta -> [candado de hilos, descriptor, profundidad]
+    _pid: Optional[int] = None
+    _candado = threading.Lock()
+    
+    def __init__(self, ruta: str, bloqueante: bool = True):
+        self.ruta = os.path.abspath(ruta + '.lock')
+        self.bloqueante = bloqueante
+    
+    def _entrada(self) -> list:
+        with FileLock._candado:
+            if FileLock._pid != os.getpid():
+                # Tras un fork los bloqueos del padre no pertenecen al hijo
+                FileLock._registro = {}
+                FileLock._pid = os.getpid()
+            entrada = FileLock._registro.get(self.ruta)
+            if entrada is None:
+                entrada = FileLock._registro[self.ruta] = [threading.RLock(), None, 0]
+            return entrada
+    
+    def adquirir(self) -> bool:
+        """Toma el bloqueo. Sin bloqueo de espera retorna False si otro proceso lo tiene"""
+        entrada = self._entrada()
+        if not entrada[0].acquire(self.bloqueante):
+            return False
+        if entrada[2] == 0:
+            descriptor = os.open(self.ruta, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if not FileLock._bloquear(descriptor, self.bloqueante):
+                    os.close(descriptor)
+                    entrada[0].release()
+                    return False
+            except BaseException:
+                os.close(descriptor)
+                entrada[0].release()
+                raise
+            entrada[1] = descriptor
+        entrada[2] += 1
+        return True
+    
+    def liberar(self):
+        entrada = self._entrada()
+        entrada[2] -= 1
+        if entrada[2] == 0:
+            FileLock._desbloquear(entrada[1])
+            os.close(entrada[1])
+            entrada[1] = None
+        entrada[0].release()
+    
+    def __enter__(self) -> 'FileLock':
+        self.adquirir()
+        return self
+    
+    def __exit__(self, *exc):
+        self.liberar()
+    
+    @staticmethod
+    def _bloquear(descriptor: int, bloqueante: bool) -> bool:
+        if fcntl is not None:
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX if bloqueante else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                return False
+        if msvcrt is not None:
+            os.lseek(descriptor, 0, os.SEEK_SET)
+            while True:
+                try:
+                    msvcrt.locking(descriptor, msvcrt.LK_NBLCK, 1)
+                    return True
+                except OSError:
+                    if not bloqueante:
+                        return False
+                    time.sleep(0.01)
+        return True
+    
+    @staticmethod
+    def _desbloquear(descriptor: int):
+        if fcntl is not None:
+            fcntl.flock(descriptor, fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            os.lseek(descriptor, 0, os.SEEK_SET)
+            msvcrt.locking(descriptor, msvcrt.LK_UNLCK, 1)
+
+
+class Money:
+    """Importes como centavos enteros: sumas exactas y formato según la moneda configurada"""
+    
+    ESCALA = 100
+    SIMBOLO = '$'
+    SEPARADOR_DECIMAL = '.'
+    SEPARADOR_MILES = ''
+    SIMBOLO_AL_FINAL = False
+    
+    @staticmethod
+    def configurar(config: dict):
+        """Toma el símbolo de 'currency' y el formato de la clave opcional 'money'"""
+        Money.SIMBOLO = config.get('currency', Money.SIMBOLO)
+        opciones = config.get('money', {})
+        Money.SEPARADOR_DECIMAL = opciones.get('decimal_separator', Money.SEPARADOR_DECIMAL)
+        Money.SEPARADOR_MILES = opciones.get('thousands_separator', Money.SEPARADOR_MILES)
+        Money.SIMBOLO_AL_FINAL = bool(opciones.get('symbol_after', Money.SIMBOLO_AL_FINAL))
+    
+    @staticmethod
+    def a_centavos(valor) -> int:
+        """Convierte un importe (número o texto decimal) a centavos; la mitad redondea alejándose de cero"""
+        if isinstance(valor, int):
+            return valor * Money.ESCALA
+        if isinstance(valor, str):
+            try:
+                numero = Decimal(valor.strip())
+            except InvalidOperation:
+                raise ValueError(f"Importe inválido: '{valor}'")
+            if not numero.is_finite():
+                raise ValueError(f"Importe inválido: '{valor}'")
+            return int((numero * Money.ESCALA).to_integral_value(ROUND_HALF_UP))
+        
+        # round(..., 6) descarta el error binario (1.005 * 100 = 100.49999999999999)
+        escalado = round(valor * Money.ESCALA, 6)
+        return int(escalado + 0.5) if escalado >= 0 else -int(0.5 - escalado)
+    
+    @staticmethod
+    def a_unidades(centavos: int) -> float:
+        """Importe en unidades de la moneda, para JSON y configuración"""
+        return centavos / Money.ESCALA
+    
+    @staticmethod
+    def normalizar(valor) -> float:
+        """Redondea un importe a centavos exactos"""
+        return Money.a_unidades(Money.a_centavos(valor))
+    
+    @staticmethod
+    def total_centavos(transaction: dict) -> int:
+        """Total de una transacción; los registros antiguos guardan 'total' en float"""
+        centavos = transaction.get('total_centavos')
+        if centavos is None:
+            return Money.a_centavos(transaction['total'])
+        return centavos
+    
+    @staticmethod
+    def precios_centavos(transaction: dict) -> Dict[str, int]:
+        """Precios unitarios registrados en una transacción, en centavos"""
+        precios = transaction.get('precios_centavos')
+        if precios is None:
+            return {producto: Money.a_centavos(precio) for producto, precio in transaction.get('precios', {}).items()}
+        return precios
+    
+    @staticmethod
+    def dividir(centavos: int, divisor: int) -> int:
+        """Cociente entero redondeado (promedios sin pasar por float)"""
+        cociente, resto = divmod(abs(centavos), divisor)
+        if resto * 2 >= divisor:
+            cociente += 1
+        return cociente if centavos >= 0 else -cociente
+    
+    @staticmethod
+    def formatear(centavos: int, simbolo: Optional[str] = None) -> str:
+        """Texto del importe con el símbolo y los separadores configurados"""
+        enteros, resto = divmod(abs(centavos), Money.ESCALA)
+        texto = f"{enteros:,}".replace(',', Money.SEPARADOR_MILES) + f"{Money.SEPARADOR_DECIMAL}{resto:02d}"
+        simbolo = Money.SIMBOLO if simbolo is None else simbolo
+        signo = '-' if centavos < 0 else ''
+        if Money.SIMBOLO_AL_FINAL:
+            return f"{signo}{texto} {simbolo}"
+        return f"{signo}{simbolo}{texto}"
+
+
+class ConfigManager:
+    """Gestor profesional de configuración con backups"""
+    
+    CONFIG_FILE = 'inventory.json'
+    BACKUP_DIR = 'backups'
+    
+    # Sesión de edición activa: los guardados se difieren hasta confirmarla
+    _sesion: Optional[dict] = None
+    # Configuración tal como se leyó o escribió por última vez (base de la fusión)
+    _base: Optional[dict] = None
+    # (mtime, tamaño, inodo) del archivo en esa última lectura o escritura
+    _firma: Optional[Tuple[int, int, int]] = None
+    _FALTA = object()
+    
+    @staticmethod
+    def crear_backup(incluir_transacciones: bool = False) -> Optional[str]:
+        """Crea un punto de respaldo incremental (se omite si nada cambió)"""
+        return BackupManager.respaldar(incluir_transacciones)
+    
+    @staticmethod
+    @Metrics.medir
+    def cargar_config() -> dict:
+        """Carga configuración con validación"""
+        if not os.path.exists(ConfigManager.CONFIG_FILE):
+            Logger.error(f"Archivo de configuración '{ConfigManager.CONFIG_FILE}' no encontrado")
+            print(f"{Color.FAIL}Error: Archivo de configuración no encontrado.{Color.ENDC}")
+            print(f"{Color.WARNING}Por favor crea un archivo inventory.json{Color.ENDC}")
+            exit(1)
+        
+        try:
+            # La firma se toma antes de leer: un cambio posterior se detecta en la próxima consulta
+            firma = ConfigManager._firma_archivo()
+            with open(ConfigManager.CONFIG_FILE, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            
+            # Validar estructura de configuración
+            ConfigManager._validar_config(config)
+            ConfigManager._base = copy.deepcopy(config)
+            ConfigManager._firma = firma
+            Logger.info("Configuración cargada exitosamente")
+            return config
+            
+        except json.JSONDecodeError as e:
+            Logger.error(f"Error de formato JSON: {e}")
+            print(f"{Color.FAIL}Error: Formato JSON inválido en inventory.json{Color.ENDC}")
+            exit(1)
+        except Exception as e:
+            Logger.error(f"Error al cargar configuración: {e}")
+            print(f"{Color.FAIL}Error al cargar configuración: {e}{Color.ENDC}")
+            exit(1)
+    
+    @staticmethod
+    def _firma_archivo() -> Optional[Tuple[int, int, int]]:
+        """(mtime en ns, tamaño, inodo) del archivo; la escritura atómica cambia al menos el inodo"""
+        try:
+            estado = os.stat(ConfigManager.CONFIG_FILE)
+        except OSError:
+            return None
+        return estado.st_mtime_ns, estado.st_size, estado.st_ino
+    
+    @staticmethod
+    def recargar_si_cambio() -> Optional[dict]:
+        """Configuración nueva si el archivo cambió desde la última lectura o escritura, o None.
+        
+        Sin cambios solo cuesta un os.stat: el JSON se lee y valida únicamente cuando cambian
+        mtime, tamaño o inodo. No recarga durante una sesión de edición; una configuración
+        inválida se ignora (se conserva la actual) hasta el siguiente cambio del archivo.
+        """
+        if ConfigManager._sesion is not None:
+            return None
+        firma = ConfigManager._firma_archivo()
+        if firma is None or firma == ConfigManager._firma:
+            return None
+        
+        ConfigManager._firma = firma
+        try:
+            with open(ConfigManager.CONFIG_FILE, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            ConfigManager._validar_config(config)
+        except Exception as e:
+            Logger.warning(f"Cambios en la configuración ignorados: {e}")
+            return None
+        
+        ConfigManager._base = copy.deepcopy(config)
+        Logger.info("Configuración recargada: el archivo cambió en otra terminal")
+        return config
+    
+    @staticmethod
+    def _validar_config(config: dict):
+        """Valida que la configuración tenga la estructura correcta"""
+        required_keys = ['business_name', 'currency', 'users', 'menu']
+        
+        for key in required_keys:
+            if key not in config:
+                raise ValueError(f"Falta la clave requerida: {key}")
+        
+        if 'admin' not in config['users'] or 'regular' not in config['users']:
+            raise ValueError("La configuración de usuarios debe tener 'admin' y 'regular'")
+        
+        motor = config.get('storage', {}).get('engine', 'json')
+        if motor not in TransactionManager.MOTORES:
+            raise ValueError(f"Motor de almacenamiento desconocido: {motor}")
+        
+        registro = config.get('logging', {})
+        if registro.get('format', Logger.FORMATO) not in Logger.FORMATOS:
+            raise ValueError(f"Formato de log desconocido: {registro['format']}")
+        if registro.get('rotation', Logger.ROTACION) not in Logger.ROTACIONES:
+            raise ValueError(f"Rotación de log desconocida: {registro['rotation']}")
+        
+        intervalo = config.get('metrics', {}).get('interval', Metrics.INTERVALO)
+        if not isinstance(intervalo, (int, float)) or intervalo < 0:
+            raise ValueError(f"Intervalo de métricas inválido: {intervalo}")
+        
+        codigos = [str(codigo).strip().casefold() for codigo in config.get('skus', {}).values()]
+        if len(codigos) != len(set(codigos)):
+            raise ValueError("Los códigos SKU deben ser únicos")
+        
+        sink = config.get('kitchen', {}).get('sink', 'file')
+        if sink not in KitchenDispatcher.SINKS:
+            raise ValueError(f"Destino de cocina desconocido: {sink}")
+        
+        dinero = config.get('money', {})
+        for clave in ('decimal_separator', 'thousands_separator'):
+            if not isinstance(dinero.get(clave, ''), str):
+                raise ValueError(f"Separador de importes inválido: {clave}")
+        
+        puerto = config.get('server', {}).get('port', ApiServer.PUERTO)
+        if not isinstance(puerto, int) or not 0 < puerto < 65536:
+            raise ValueError(f"Puerto del servidor inválido: {puerto}")
+        
+        for politica in config.get('backups', {}):
+            if politica not in BackupManager.RETENCION:
+                raise ValueError(f"Política de retención desconocida: {politica}")
+    
+    @staticmethod
+    @Metrics.medir
+    def guardar_config(config: dict) -> bool:
+        """Guarda configuración con backup automático (diferido si hay una sesión de edición).
+        
+        Retorna True si se fusionaron cambios de otra terminal en 'config': quien la usa debe
+        descartar lo que haya derivado de ella (como el índice de búsqueda del menú).
+        """
+        if ConfigManager._sesion is not None:
+            ConfigManager._sesion['cambios'] += 1
+            return False
+        
+        fusionada = False
+        try:
+            with FileLock(ConfigManager.CONFIG_FILE):
+                # Crear backup antes de guardar
+                ConfigManager.crear_backup()
+                
+                # Otra terminal pudo guardar cambios desde nuestra lectura: se fusionan
+                disco = None
+                if os.path.exists(ConfigManager.CONFIG_FILE):
+                    with open(ConfigManager.CONFIG_FILE, 'r', encoding='utf-8') as f:
+                        disco = json.load(f)
+                if disco is not None and ConfigManager._base is not None and disco != ConfigManager._base:
+                    ConfigManager._restaurar(config, ConfigManager._fusionar(ConfigManager._base, config, disco))
+                    fusionada = True
+                    Logger.info("Configuración fusionada con cambios de otra terminal")
+                
+                ConfigManager._escribir_atomico(config)
+                ConfigManager._base = copy.deepcopy(config)
+                ConfigManager._firma = ConfigManager._firma_archivo()
+            
+            Logger.info("Configuración guardada exitosamente")
+            
+        except Exception as e:
+            Logger.error(f"Error al guardar configuración: {e}")
+            print(f"{Color.FAIL}Error al guardar configuración: {e}{Color.ENDC}")
+        return fusionada
+    
+    @staticmethod
+    def _fusionar(base: dict, nuestra: dict, disco: dict) -> dict:
+        """Fusión a tres vías por clave: gana nuestro valor solo donde lo modificamos"""
+        resultado = copy.deepcopy(disco)
+        for clave in list(base) + [c for c in nuestra if c not in base]:
+            anterior = base.get(clave, ConfigManager._FALTA)
+            valor = nuestra.get(clave, ConfigManager._FALTA)
+            if valor == anterior:
+                continue
+            
+            if isinstance(valor, dict) and isinstance(anterior, dict) and isinstance(resultado.get(clave), dict):
+                resultado[clave] = ConfigManager._fusionar(anterior, valor, resultado[clave])
+            elif valor is ConfigManager._FALTA:
+                resultado.pop(clave, None)
+            else:
+                resultado[clave] = copy.deepcopy(valor)
+        return resultado
+    
+    @staticmethod
+    def _escribir_atomico(config: dict):
+        """Escribe la configuración en un temporal y lo reemplaza de forma atómica"""
+        temporal = ConfigManager.CONFIG_FILE + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ConfigManager.CONFIG_FILE)
+    
+    @staticmethod
+    @contextmanager
+    def sesion_edicion(config: dict):
+        """Agrupa ediciones en memoria y las confirma con un solo backup y un solo guardado.
+        
+        Si el bloque termina con una excepción, los cambios se descartan.
+        """
+        if ConfigManager._sesion is not None:
+            # Sesión anidada: se confirma junto con la exterior
+            yield ConfigManager._sesion
+            return
+        
+        original = copy.deepcopy(config)
+        ConfigManager._sesion = sesion = {'cambios': 0}
+        try:
+            yield sesion
+        except BaseException:
+            ConfigManager._sesion = None
+            ConfigManager._restaurar(config, original)
+            Logger.warning(f"Sesión de edición descartada ({sesion['cambios']} cambios)")
+            raise
+        
+        ConfigManager._sesion = None
+        if sesion['cambios']:
+            sesion['fusionada'] = ConfigManager.guardar_config(config)
+            Logger.info(f"Sesión de edición confirmada ({sesion['cambios']} cambios)")
+    
+    @staticmethod
+    def _restaurar(config: dict, original: dict):
+        """Restaura la configuración conservando los diccionarios compartidos (como el menú)"""
+        for clave in list(config):
+            if clave not in original:
+                del config[clave]
+        for clave, valor in original.items():
+            if isinstance(config.get(clave), dict) and isinstance(valor, dict):
+                config[clave].clear()
+                config[clave].update(valor)
+            else:
+                config[clave] = valor
+
+
+class BackupManager:
+    """Respaldos incrementales direccionados por contenido (bloques SHA-256 comprimidos)"""
+    
+    OBJETOS_DIR = 'objetos'
+    MANIFIESTO = 'manifest.jsonl'
+    TAMANO_BLOQUE = 1024 * 1024
+    # Puntos conservados: los N más recientes y el último de cada una de las últimas N horas, días y semanas
+    RETENCION = {'recent': 20, 'hourly': 24, 'daily': 7, 'weekly': 4}
+    FORMATOS_RETENCION = {'recent': None, 'hourly': '%Y-%m-%d %H', 'daily': '%Y-%m-%d', 'weekly': '%G-W%V'}
+    
+    @staticmethod
+    def configurar(config: dict):
+        """Aplica la clave opcional "backups" de la configuración"""
+        for clave, valor in config.get('backups', {}).items():
+            if clave not in BackupManager.RETENCION:
+                raise ValueError(f"Política de retención desconocida: {clave}")
+            BackupManager.RETENCION[clave] = int(valor)
+    
+    @staticmethod
+    def _ruta_objeto(digest: str) -> str:
+        return os.path.join(ConfigManager.BACKUP_DIR, BackupManager.OBJETOS_DIR, digest[:2], digest + '.z')
+    
+    @staticmethod
+    def _guardar_bloque(bloque: bytes) -> str:
+        """Guarda un bloque comprimido si aún no existe. Retorna su hash"""
+        digest = hashlib.sha256(bloque).hexdigest()
+        ruta = BackupManager._ruta_objeto(digest)
+        if not os.path.exists(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = ruta + '.tmp'
+            with open(temporal, 'wb') as f:
+                f.write(zlib.compress(bloque, 6))
+            os.replace(temporal, ruta)
+        return digest
+    
+    @staticmethod
+    def _guardar_archivo(ruta: str, anterior: Optional[dict]) -> dict:
+        """Divide un archivo en bloques direccionados por contenido.
+        
+        Si tamaño y fecha de modificación coinciden con el punto anterior se reutiliza su entrada.
+        Los diarios de solo anexado solo agregan bloques nuevos al crecer.
+        """
+        estado = os.stat(ruta)
+        if anterior and anterior['tamano'] == estado.st_size and anterior['mtime'] == estado.st_mtime:
+            return anterior
+        
+        bloques = []
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(BackupManager.TAMANO_BLOQUE), b''):
+                bloques.append(BackupManager._guardar_bloque(bloque))
+        return {
+            "tamano": estado.st_size,
+            "mtime": estado.st_mtime,
+            "modo": estado.st_mode & 0o777,
+            "bloques": bloques
+        }
+    
+    @staticmethod
+    def _archivos_transacciones() -> List[str]:
+        """Particiones del historial y base SQLite (si existen)"""
+        archivos = []
+        directorio = TransactionManager.PARTITIONS_DIR
+        if os.path.isdir(directorio):
+            archivos.extend(
+                os.path.join(directorio, nombre) for nombre in sorted(os.listdir(directorio))
+                if JsonTransactionStore.PATRON_PARTICION.match(nombre)
+            )
+        if os.path.exists(TransactionManager.SQLITE_FILE):
+            archivos.append(TransactionManager.SQLITE_FILE)
+        return archivos
+    
+    @staticmethod
+    def _copia_sqlite(ruta: str) -> str:
+        """Copia consistente de la base SQLite con la API de respaldo"""
+        copia = ruta + '.backup.tmp'
+        origen = sqlite3.connect(ruta)
+        destino = sqlite3.connect(copia)
+        try:
+            origen.backup(destino)
+        finally:
+            destino.close()
+            origen.close()
+        return copia
+    
+    @staticmethod
+    def cargar_puntos() -> List[dict]:
+        """Puntos de respaldo del manifiesto, del más antiguo al más reciente"""
+        ruta = os.path.join(ConfigManager.BACKUP_DIR, BackupManager.MANIFIESTO)
+        if not os.path.exists(ruta):
+            return []
+        
+        puntos = []
+        with open(ruta, 'r', encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    puntos.append(json.loads(linea))
+                except json.JSONDecodeError:
+                    Logger.warning("Línea inválida ignorada en el manifiesto de respaldos")
+        return puntos
+    
+    @staticmethod
+    def _escribir_manifiesto(puntos: List[dict]):
+        ruta = os.path.join(ConfigManager.BACKUP_DIR, BackupManager.MANIFIESTO)
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            for punto in puntos:
+                f.write(json.dumps(punto, ensure_ascii=False, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    
+    @staticmethod
+    def _ultimo_con_grupo(puntos: List[dict], grupo: str, hasta: Optional[str] = None,
+                          hasta_id: Optional[str] = None) -> Optional[dict]:
+        """Punto más reciente que contiene el grupo, limitado por fecha o por id"""
+        for punto in reversed(puntos):
+            if grupo not in punto['grupos']:
+                continue
+            if (hasta is None or punto['fecha'] <= hasta) and (hasta_id is None or punto['id'] <= hasta_id):
+                return punto
+        return None
+    
+    @staticmethod
+    def respaldar(incluir_transacciones: bool = False, retencion: bool = True) -> Optional[str]:
+        """Crea un punto de respaldo. Retorna su id, o None si nada cambió desde el anterior"""
+        os.makedirs(ConfigManager.BACKUP_DIR, exist_ok=True)
+        with FileLock(os.path.join(ConfigManager.BACKUP_DIR, 'manifest')):
+            return BackupManager._respaldar(incluir_transacciones, retencion)
+    
+    @staticmethod
+    def _respaldar(incluir_transacciones: bool, retencion: bool) -> Optional[str]:
+        puntos = BackupManager.cargar_puntos()
+        grupos = {'config': [ConfigManager.CONFIG_FILE] if os.path.exists(ConfigManager.CONFIG_FILE) else []}
+        if incluir_transacciones:
+            grupos['transacciones'] = BackupManager._archivos_transacciones()
+        
+        archivos = {}
+        sin_cambios = True
+        for grupo, rutas in grupos.items():
+            previo = BackupManager._ultimo_con_grupo(puntos, grupo)
+            previos = previo['archivos'] if previo else {}
+            entradas = {}
+            for ruta in rutas:
+                if ruta == TransactionManager.SQLITE_FILE:
+                    copia = BackupManager._copia_sqlite(ruta)
+                    try:
+                        entradas[ruta] = BackupManager._guardar_archivo(copia, None)
+                    finally:
+                        os.remove(copia)
+                else:
+                    entradas[ruta] = BackupManager._guardar_archivo(ruta, previos.get(ruta))
+            
+            contenido = {r: e['bloques'] for r, e in entradas.items()}
+            if contenido != {r: e['bloques'] for r, e in previos.items() if e.get('grupo') == grupo}:
+                sin_cambios = False
+            for ruta, entrada in entradas.items():
+                archivos[ruta] = dict(entrada, grupo=grupo)
+        
+        if sin_cambios:
+            Logger.info("Respaldo omitido: sin cambios desde el punto anterior")
+            return None
+        
+        ahora = datetime.now()
+        punto = {
+            "id": ahora.strftime("%Y%m%d_%H%M%S_%f"),
+            "fecha": ahora.strftime("%Y-%m-%d %H:%M:%S"),
+            "grupos": sorted(grupos),
+            "archivos": archivos
+        }
+        puntos.append(punto)
+        if retencion:
+            BackupManager._aplicar_retencion(puntos)
+        else:
+            BackupManager._escribir_manifiesto(puntos)
+        Logger.info(f"Punto de respaldo creado: {punto['id']} ({', '.join(punto['grupos'])})")
+        return punto['id']
+    
+    @staticmethod
+    def _aplicar_retencion(puntos: List[dict]):
+        """Conserva los puntos que exige la política de retención y elimina bloques huérfanos"""
+        conservar = set()
+        for grupo in ('config', 'transacciones'):
+            del_grupo = [p for p in puntos if grupo in p['grupos']]
+            if not del_grupo:
+                continue
+            conservar.add(del_grupo[-1]['id'])
+            
+            for politica, cantidad in BackupManager.RETENCION.items():
+                formato = BackupManager.FORMATOS_RETENCION[politica]
+                cubetas = set()
+                for punto in reversed(del_grupo):
+                    if formato is None:
+                        cubeta = punto['id']
+                    else:
+                        cubeta = datetime.strptime(punto['fecha'], "%Y-%m-%d %H:%M:%S").strftime(formato)
+                    if cubeta not in cubetas and len(cubetas) < cantidad:
+                        cubetas.add(cubeta)
+                        conservar.add(punto['id'])
+        
+        vigentes = [p for p in puntos if p['id'] in conservar]
+        BackupManager._escribir_manifiesto(vigentes)
+        
+        eliminados = len(puntos) - len(vigentes)
+        if eliminados:
+            BackupManager._recolectar_objetos(vigentes)
+            Logger.info(f"Puntos de respaldo eliminados por retención: {eliminados}")
+    
+    @staticmethod
+    def _recolectar_objetos(puntos: List[dict]):
+        """Elimina los bloques que ningún punto referencia"""
+        referenciados = {b for p in puntos for e in p['archivos'].values() for b in e['bloques']}
+        raiz = os.path.join(ConfigManager.BACKUP_DIR, BackupManager.OBJETOS_DIR)
+        for directorio, _, nombres in os.walk(raiz):
+            for nombre in nombres:
+                if nombre.endswith('.z') and nombre[:-2] not in referenciados:
+                    os.remove(os.path.join(directorio, nombre))
+    
+    @staticmethod
+    def restaurar(fecha: Optional[str] = None, punto_id: Optional[str] = None,
+                  grupos: Tuple[str, ...] = ('config', 'transacciones'), destino: str = '.') -> List[str]:
+        """Reconstruye los archivos al estado de un punto o de una fecha. Retorna las rutas restauradas"""
+        puntos = BackupManager.cargar_puntos()
+        if punto_id and not any(p['id'] == punto_id for p in puntos):
+            raise ValueError(f"Punto de respaldo no encontrado: {punto_id}")
+        
+        restaurados = []
+        for grupo in grupos:
+            # Cada grupo se toma del último punto que lo contiene hasta el instante pedido
+            punto = BackupManager._ultimo_con_grupo(puntos, grupo, fecha, punto_id)
+            if punto is None:
+                continue
+            
+            rutas = {r: e for r, e in punto['archivos'].items() if e.get('grupo') == grupo}
+            for ruta, entrada in rutas.items():
+                BackupManager._restaurar_archivo(entrada, os.path.join(destino, ruta))
+                restaurados.append(ruta)
+                if ruta == TransactionManager.SQLITE_FILE:
+                    # El WAL de la base actual no corresponde al archivo restaurado
+                    for sufijo in ('-wal', '-shm'):
+                        if os.path.exists(os.path.join(destino, ruta + sufijo)):
+                            os.remove(os.path.join(destino, ruta + sufijo))
+            
+            if grupo == 'transacciones':
+                BackupManager._limpiar_particiones(destino, rutas)
+        
+        if not restaurados:
+            raise ValueError("No hay puntos de respaldo para la fecha indicada")
+        Logger.info(f"Respaldo restaurado ({punto_id or fecha or 'último'}): "
+                    f"{len(restaurados)} archivos en {destino}")
+        return restaurados
+    
+    @staticmethod
+    def _restaurar_archivo(entrada: dict, ruta: str):
+        """Reconstruye un archivo desde sus bloques y lo reemplaza de forma atómica"""
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        temporal = ruta + '.restore.tmp'
+        with open(temporal, 'wb') as f:
+            for digest in entrada['bloques']:
+                with open(BackupManager._ruta_objeto(digest), 'rb') as objeto:
+                    bloque = zlib.decompress(objeto.read())
+                if hashlib.sha256(bloque).hexdigest() != digest:
+                    raise ValueError(f"Bloque de respaldo corrupto: {digest}")
+                f.write(bloque)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temporal, entrada.get('modo', 0o644))
+        os.replace(temporal, ruta)
+    
+    @staticmethod
+    def _limpiar_particiones(destino: str, rutas: dict):
+        """Elimina particiones ausentes en el punto restaurado y los índices derivados"""
+        directorio = os.path.join(destino, TransactionManager.PARTITIONS_DIR)
+        if not os.path.isdir(directorio):
+            return
+        
+        for nombre in os.listdir(directorio):
+            ruta = os.path.join(TransactionManager.PARTITIONS_DIR, nombre)
+            derivado = (nombre in ('snapshot.json', JsonTransactionStore.INDICE_IDS) or
+                        nombre.endswith(('.timeidx', '.gz.idx')))
+            if derivado or (JsonTransactionStore.PATRON_PARTICION.match(nombre) and ruta not in rutas):
+                os.remove(os.path.join(directorio, nombre))
+
+
+class TransactionJournal:
+    """Diario de transacciones de solo anexado en formato JSON Lines"""
+    
+    BLOQUE_LECTURA = 64 * 1024
+    PUNTO_ACCESO = 64 * 1024     # Cada cuántos bytes sin comprimir la compactación permite retomar
+    
+    def __init__(self, ruta: str, fsync_lote: int = 16, fsync_intervalo: float = 1.0):
+        self.ruta = ruta
+        self.comprimido = ruta.endswith('.gz')
+        self._tamano_comprimido: Optional[int] = None
+        self.fsync_lote = fsync_lote
+        self.fsync_intervalo = fsync_intervalo
+        self._archivo = None
+        self._pendientes = 0
+        self._ultimo_fsync = time.monotonic()
+        self.ultimo_inicio = 0
+    
+    def _abrir(self):
+        """Abre el diario para anexar, recuperando antes una cola truncada.
+        
+        Con varios procesos escribiendo, debe llamarse con el bloqueo del diario tomado:
+        de lo contrario la escritura en curso de otro proceso parecería una cola truncada.
+        """
+        if self.comprimido:
+            raise PermissionError(f"La partición compactada {self.ruta} es de solo lectura")
+        if self._archivo is None:
+            self.recuperar()
+            self._archivo = open(self.ruta, 'ab')
+        return self._archivo
+    
+    def recuperar(self) -> int:
+        """Descarta una última línea incompleta tras una caída. Retorna bytes descartados"""
+        if self.comprimido or not os.path.exists(self.ruta):
+            return 0
+        
+        with open(self.ruta, 'rb+') as f:
+            tamano = f.seek(0, os.SEEK_END)
+            if tamano == 0:
+                return 0
+            
+            f.seek(tamano - 1)
+            if f.read(1) == b'\n':
+                return 0
+            
+            # Buscar hacia atrás el último registro completo
+            fin_valido = 0
+            posicion = tamano
+            while posicion > 0:
+                inicio = max(0, posicion - TransactionJournal.BLOQUE_LECTURA)
+                f.seek(inicio)
+                bloque = f.read(posicion - inicio)
+                idx = bloque.rfind(b'\n')
+                if idx != -1:
+                    fin_valido = inicio + idx + 1
+                    break
+                posicion = inicio
+            
+            f.truncate(fin_valido)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        descartados = tamano - fin_valido
+        Logger.warning(f"Diario recuperado: {descartados} bytes incompletos descartados en {self.ruta}")
+        return descartados
+    
+    def agregar(self, registro: dict) -> int:
+        """Anexa un registro al diario. Retorna el offset final del diario.
+        
+        El offset inicial queda en ultimo_inicio; si otro proceso anexó registros
+        desde la escritura anterior, no coincide con el final anterior.
+        """
+        linea = json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n'
+        f = self._abrir()
+        self.ultimo_inicio = os.fstat(f.fileno()).st_size
+        f.write(linea.encode('utf-8'))
+        f.flush()
+        
+        self._pendientes += 1
+        if (self._pendientes >= self.fsync_lote or
+                time.monotonic() - self._ultimo_fsync >= self.fsync_intervalo):
+            self.sincronizar()
+        
+        return f.tell()
+    
+    def agregar_lote(self, registros: List[dict]) -> List[int]:
+        """Anexa varios registros con una sola escritura y un fsync. Retorna el offset final de cada uno"""
+        lineas = [
+            (json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+            for registro in registros
+        ]
+        f = self._abrir()
+        self.ultimo_inicio = os.fstat(f.fileno()).st_size
+        finales = []
+        posicion = self.ultimo_inicio
+        for linea in lineas:
+            posicion += len(linea)
+            finales.append(posicion)
+        
+        f.write(b''.join(lineas))
+        f.flush()
+        self._pendientes += len(lineas)
+        self.sincronizar()
+        return finales
+    
+    def obsoleto(self) -> bool:
+        """True si otro proceso reemplazó o eliminó el archivo abierto (compactación o importación)"""
+        if self._archivo is None:
+            return False
+        try:
+            return not os.path.samestat(os.fstat(self._archivo.fileno()), os.stat(self.ruta))
+        except FileNotFoundError:
+            return True
+    
+    def sincronizar(self):
+        """Fuerza a disco los registros pendientes"""
+        if self._archivo is not None and self._pendientes:
+            os.fsync(self._archivo.fileno())
+        self._pendientes = 0
+        self._ultimo_fsync = time.monotonic()
+    
+    def cerrar(self):
+        """Sincroniza y cierra el diario"""
+        if self._archivo is not None:
+            self.sincronizar()
+            self._archivo.close()
+            self._archivo = None
+    
+    def tamano(self) -> int:
+        """Tamaño actual del diario en bytes (sin comprimir)"""
+        try:
+            if not self.comprimido:
+                return os.path.getsize(self.ruta)
+            if self._tamano_comprimido is None:
+                puntos = self._puntos_acceso()
+                if puntos is not None:
+                    # El último par del índice guarda el tamaño sin comprimir exacto
+                    self._tamano_comprimido = puntos[-2]
+                else:
+                    # ISIZE del trailer gzip: tamaño sin comprimir módulo 2**32
+                    with open(self.ruta, 'rb') as f:
+                        f.seek(-4, os.SEEK_END)
+                        self._tamano_comprimido = struct.unpack('<I', f.read(4))[0]
+            return self._tamano_comprimido
+        except OSError:
+            return 0
+    
+    def _abrir_lectura(self):
+        """Abre el diario para lectura, descomprimiendo si está compactado"""
+        if self.comprimido:
+            return gzip.open(self.ruta, 'rb')
+        return open(self.ruta, 'rb')
+    
+    def leer(self, desde: int = 0, hasta: Optional[int] = None) -> Iterator[dict]:
+        """Itera los registros completos entre los offsets indicados"""
+        for _, registro in self.leer_con_offsets(desde, hasta):
+            yield registro
+    
+    def leer_con_offsets(self, desde: int = 0, hasta: Optional[int] = None) -> Iterator[Tuple[int, dict]]:
+        """Itera (offset_final, registro) para cada registro completo"""
+        if not os.path.exists(self.ruta):
+            return
+        
+        with self._abrir_lectura() as f:
+            f.seek(desde)
+            posicion = desde
+            for linea in f:
+                if hasta is not None and posicion >= hasta:
+                    break
+                # Una línea sin salto final es una escritura en curso o truncada
+                if not linea.endswith(b'\n'):
+                    break
+                posicion += len(linea)
+                yield posicion, json.loads(linea)
+    
+    def leer_en(self, offset: int) -> Optional[dict]:
+        """Registro que empieza en el offset indicado, sin leer los demás.
+        
+        En una partición compactada se descomprime desde el punto de acceso anterior
+        (o desde el inicio si la partición no tiene puntos de acceso).
+        """
+        try:
+            linea = self._linea_comprimida(offset) if self.comprimido else None
+            if linea is None:
+                with self._abrir_lectura() as f:
+                    f.seek(offset)
+                    linea = f.readline()
+        except (OSError, EOFError, zlib.error):
+            return None
+        if not linea.endswith(b'\n'):
+            return None
+        try:
+            return json.loads(linea)
+        except json.JSONDecodeError:
+            return None
+    
+    def _puntos_acceso(self) -> Optional[array]:
+        """Pares (offset sin comprimir, offset comprimido) de la partición, si son vigentes"""
+        try:
+            with open(self.ruta + '.idx', 'rb') as f:
+                puntos = array('q', f.read())
+        except (OSError, ValueError):
+            return None
+        # El último par es (tamaño sin comprimir, tamaño comprimido) y valida el archivo
+        if len(puntos) < 4 or puntos[-1] != os.path.getsize(self.ruta):
+            return None
+        return puntos
+    
+    def _linea_comprimida(self, offset: int) -> Optional[bytes]:
+        """Línea que empieza en el offset, descomprimiendo desde el punto de acceso anterior"""
+        puntos = self._puntos_acceso()
+        if puntos is None:
+            return None
+        
+        i = bisect.bisect_right(puntos[0:-2:2], offset) - 1
+        saltar = offset - puntos[2 * i]
+        descompresor = zlib.decompressobj(-zlib.MAX_WBITS)
+        datos = b''
+        with open(self.ruta, 'rb') as f:
+            f.seek(puntos[2 * i + 1])
+            # Un tramo comprimido por vez; una línea puede continuar en el siguiente
+            for j in range(i, len(puntos) // 2 - 1):
+                datos += descompresor.decompress(f.read(puntos[2 * j + 3] - puntos[2 * j + 1]))
+                fin = datos.find(b'\n', saltar)
+                if fin != -1:
+                    return datos[saltar:fin + 1]
+        return datos[saltar:]
+    
+    def leer_inverso_crudo(self) -> Iterator[bytes]:
+        """Itera las líneas completas, sin deserializar, de la más reciente a la más antigua"""
+        if not os.path.exists(self.ruta):
+            return
+        
+        if self.comprimido:
+            # gzip no permite retroceder de forma eficiente: una partición cerrada se lee completa
+            with self._abrir_lectura() as f:
+                lineas = f.read().split(b'\n')
+            for linea in reversed(lineas):
+                if linea:
+                    yield linea
+            return
+        
+        with open(self.ruta, 'rb') as f:
+            posicion = f.seek(0, os.SEEK_END)
+            resto = None
+            while posicion > 0:
+                inicio = max(0, posicion - TransactionJournal.BLOQUE_LECTURA)
+                f.seek(inicio)
+                bloque = f.read(posicion - inicio)
+                posicion = inicio
+                
+                if resto is None:
+                    # Lo posterior al último salto de línea es vacío o una escritura incompleta
+                    corte = bloque.rfind(b'\n')
+                    if corte == -1:
+                        continue
+                    bloque, resto = bloque[:corte], b''
+                
+                lineas = (bloque + resto).split(b'\n')
+                # La primera línea del bloque puede continuar en el bloque anterior
+                resto = lineas.pop(0) if inicio > 0 else b''
+                
+                for linea in reversed(lineas):
+                    if linea:
+                        yield linea
+    
+    def leer_inverso(self, saltar: int = 0) -> Iterator[dict]:
+        """Itera los registros del más reciente al más antiguo leyendo bloques desde el final"""
+        for linea in self.leer_inverso_crudo():
+            # Los registros saltados no se deserializan
+            if saltar:
+                saltar -= 1
+                continue
+            yield json.loads(linea)
+    
+    def compactar(self) -> str:
+        """Comprime el diario en un archivo .gz de solo lectura. Retorna la nueva ruta"""
+        self.cerrar()
+        self.recuperar()
+        
+        destino = self.ruta + '.gz'
+        temporal = destino + '.tmp'
+        # gzip de un solo miembro con vaciados completos periódicos: cualquier lector gzip lo
+        # lee entero, y leer_en puede retomar la descompresión en cada punto de acceso
+        puntos = array('q')
+        with open(self.ruta, 'rb') as origen, open(temporal, 'wb') as crudo:
+            crudo.write(b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\xff')
+            compresor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+            crc = 0
+            tamano = 0
+            while True:
+                bloque = origen.read(TransactionJournal.PUNTO_ACCESO)
+                if not bloque:
+                    break
+                puntos.extend((tamano, crudo.tell()))
+                crc = zlib.crc32(bloque, crc)
+                tamano += len(bloque)
+                crudo.write(compresor.compress(bloque))
+                crudo.write(compresor.flush(zlib.Z_FULL_FLUSH))
+            crudo.write(compresor.flush())
+            crudo.write(struct.pack('<II', crc, tamano & 0xFFFFFFFF))
+            crudo.flush()
+            os.fsync(crudo.fileno())
+            puntos.extend((tamano, crudo.tell()))
+        
+        with open(destino + '.idx', 'wb') as f:
+            f.write(puntos.tobytes())
+        os.chmod(temporal, 0o444)
+        os.replace(temporal, destino)
+        os.remove(self.ruta)
+        return destino
+
+
+class TimeIndex:
+    """Índice ordenado de marcas de tiempo a offsets del diario, persistido en disco"""
+    
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.claves = array('q')
+        self.offsets = array('q')
+        self.fin = 0
+        self.ordenado = True
+        self._cargado = False
+        self._saltar_primero = False
+        self._bytes = 0
+    
+    @staticmethod
+    def clave(fecha: str) -> int:
+        """Convierte 'YYYY-MM-DD HH:MM:SS' en segundos desde epoch sin pasar por strptime"""
+        return calendar.timegm((
+            int(fecha[0:4]), int(fecha[5:7]), int(fecha[8:10]),
+            int(fecha[11:13]), int(fecha[14:16]), int(fecha[17:19]), 0, 0, 0
+        ))
+    
+    def reiniciar(self):
+        """Descarta el índice para reconstruirlo desde el inicio del diario"""
+        self.claves = array('q')
+        self.offsets = array('q')
+        self.fin = 0
+        self.ordenado = True
+        self._saltar_primero = False
+        self._cargado = True
+        self._bytes = 0
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+    
+    def _cargar(self, tamano_diario: int):
+        """Carga los pares (clave, offset) persistidos"""
+        self.claves = array('q')
+        self.offsets = array('q')
+        self.fin = 0
+        self.ordenado = True
+        self._saltar_primero = False
+        self._cargado = True
+        self._bytes = 0
+        if not os.path.exists(self.ruta):
+            return
+        
+        datos = array('q')
+        with open(self.ruta, 'rb') as f:
+            contenido = f.read()
+        # Un par incompleto al final proviene de una escritura interrumpida
+        util = len(contenido) - len(contenido) % (2 * datos.itemsize)
+        datos.frombytes(contenido[:util])
+        if util < len(contenido):
+            with open(self.ruta, 'rb+') as f:
+                f.truncate(util)
+        
+        claves = datos[0::2]
+        offsets = datos[1::2]
+        if offsets and offsets[-1] >= tamano_diario:
+            Logger.warning("Índice de tiempo inconsistente con el diario; se reconstruirá")
+            self.reiniciar()
+            return
+        
+        self.claves = claves
+        self.offsets = offsets
+        self._bytes = util
+        self.ordenado = all(claves[i] <= claves[i + 1] for i in range(len(claves) - 1))
+        if offsets:
+            # El último registro indexado se vuelve a leer solo para conocer su final
+            self.fin = offsets[-1]
+            self._saltar_primero = True
+    
+    def actualizar(self, journal: TransactionJournal):
+        """Indexa los registros anexados al diario desde la última actualización.
+        
+        Se llama con el bloqueo de las particiones tomado; si otro proceso ya extendió
+        el archivo del índice, se recarga en lugar de duplicar sus pares.
+        """
+        tamano = journal.tamano()
+        if not self._cargado or self._bytes != (os.path.getsize(self.ruta) if os.path.exists(self.ruta) else 0):
+            self._cargar(tamano)
+        if self.fin > tamano:
+            self.reiniciar()
+        if self.fin >= tamano:
+            return
+        
+        nuevos = array('q')
+        inicio = self.fin
+        ultima = self.claves[-1] if self.claves else 0
+        for fin, registro in journal.leer_con_offsets(self.fin, tamano):
+            if self._saltar_primero:
+                self._saltar_primero = False
+            else:
+                clave = TimeIndex.clave(registro['fecha'])
+                # Un reloj que retrocede rompe el orden que requiere bisect
+                if clave < ultima:
+                    self.ordenado = False
+                ultima = clave
+                self.claves.append(clave)
+                self.offsets.append(inicio)
+                nuevos.extend((clave, inicio))
+            inicio = fin
+        self.fin = inicio
+        
+        if nuevos:
+            with open(self.ruta, 'ab') as f:
+                f.write(nuevos.tobytes())
+            self._bytes += len(nuevos) * nuevos.itemsize
+    
+    def buscar(self, desde: Optional[str], hasta: Optional[str]) -> Tuple[int, int]:
+        """Retorna el intervalo de offsets [inicio, fin) que cubre el rango de fechas"""
+        if not self.ordenado:
+            return 0, self.fin
+        
+        i = bisect.bisect_left(self.claves, TimeIndex.clave(desde)) if desde else 0
+        j = bisect.bisect_right(self.claves, TimeIndex.clave(hasta)) if hasta else len(self.claves)
+        if i >= j:
+            return 0, 0
+        
+        fin = self.offsets[j] if j < len(self.offsets) else self.fin
+        return self.offsets[i], fin
+
+
+class IdIndex:
+    """Índice hash persistente de ID de transacción a (partición, offset), leído con mmap.
+    
+    Tabla de direccionamiento abierto con sondeo lineal. Cada ranura guarda una huella de
+    64 bits del ID, el mes de la partición (YYYYMM) y el offset del registro; la huella se
+    confirma leyendo el registro, por lo que una colisión de huellas solo alarga el sondeo.
+    La cabecera registra hasta qué offset está indexada cada partición. Todas las
+    operaciones se hacen con el bloqueo de las particiones tomado.
+    """
+    
+    MAGICO = b'POSIDX01'
+    CABECERA = struct.Struct('<8sQQI')       # mágico, capacidad, cantidad, particiones
+    PARTICION = struct.Struct('<IQ')         # mes YYYYMM, offset indexado
+    RANURA = struct.Struct('<QIQ')           # huella (0 = libre), mes YYYYMM, offset
+    TAMANO_CABECERA = 16384
+    MAX_PARTICIONES = (TAMANO_CABECERA - 32) // 12
+    CAPACIDAD_INICIAL = 1024
+    CARGA_MAXIMA = 0.7
+    
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._archivo = None
+        self._mapa: Optional[mmap.mmap] = None
+        self._estado = None
+        self._capacidad = 0
+        self._posiciones: Dict[int, int] = {}
+    
+    @staticmethod
+    def huella(id_transaccion: str) -> int:
+        digest = hashlib.blake2b(id_transaccion.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') or 1
+    
+    @staticmethod
+    def _mes(nombre: str) -> int:
+        return int(nombre[:4]) * 100 + int(nombre[5:7])
+    
+    @staticmethod
+    def _nombre(mes: int) -> str:
+        return f"{mes // 100:04d}-{mes % 100:02d}"
+    
+    @staticmethod
+    def _crear(ruta: str, capacidad: int):
+        """Escribe un índice vacío con la capacidad indicada"""
+        with open(ruta, 'wb') as f:
+            f.write(IdIndex.CABECERA.pack(IdIndex.MAGICO, capacidad, 0, 0))
+            f.truncate(IdIndex.TAMANO_CABECERA + capacidad * IdIndex.RANURA.size)
+    
+    def _abrir(self) -> mmap.mmap:
+        """Mapea el índice, creándolo si no existe o reabriéndolo si otro proceso lo reemplazó"""
+        if self._mapa is not None:
+            try:
+                if os.path.samestat(self._estado, os.stat(self.ruta)):
+                    return self._mapa
+            except FileNotFoundError:
+                pass
+            self.cerrar()
+        
+        if not os.path.exists(self.ruta):
+            IdIndex._crear(self.ruta, IdIndex.CAPACIDAD_INICIAL)
+        self._archivo = open(self.ruta, 'r+b')
+        self._estado = os.fstat(self._archivo.fileno())
+        self._mapa = mmap.mmap(self._archivo.fileno(), 0)
+        magico, capacidad, _, _ = IdIndex.CABECERA.unpack_from(self._mapa, 0)
+        if magico != IdIndex.MAGICO or len(self._mapa) != IdIndex.TAMANO_CABECERA + capacidad * IdIndex.RANURA.size:
+            self.cerrar()
+            raise ValueError(f"Índice de IDs inválido: {self.ruta}")
+        self._capacidad = capacidad
+        self._posiciones = {}
+        return self._mapa
+    
+    def cantidad(self) -> int:
+        return IdIndex.CABECERA.unpack_from(self._abrir(), 0)[2]
+    
+    def cobertura(self) -> Dict[str, int]:
+        """Offset hasta el que está indexada cada partición"""
+        mapa = self._abrir()
+        particiones = IdIndex.CABECERA.unpack_from(mapa, 0)[3]
+        return {IdIndex._nombre(mes): fin for mes, fin in
+                IdIndex.PARTICION.iter_unpack(mapa[32:32 + particiones * IdIndex.PARTICION.size])}
+    
+    def _posicion(self, mes: int) -> int:
+        """Posición en la cabecera de la cobertura de una partición, agregándola si falta"""
+        posicion = self._posiciones.get(mes)
+        if posicion is not None:
+            return posicion
+        
+        mapa = self._abrir()
+        particiones = IdIndex.CABECERA.unpack_from(mapa, 0)[3]
+        for i in range(particiones):
+            posicion = 32 + i * IdIndex.PARTICION.size
+            self._posiciones[IdIndex.PARTICION.unpack_from(mapa, posicion)[0]] = posicion
+        if mes not in self._posiciones:
+            if particiones >= IdIndex.MAX_PARTICIONES:
+                raise ValueError("Demasiadas particiones para el índice de IDs")
+            posicion = 32 + particiones * IdIndex.PARTICION.size
+            IdIndex.PARTICION.pack_into(mapa, posicion, mes, 0)
+            struct.pack_into('<I', mapa, 24, particiones + 1)
+            self._posiciones[mes] = posicion
+        return self._posiciones[mes]
+    
+    def indexado_hasta(self, nombre: str) -> int:
+        return IdIndex.PARTICION.unpack_from(self._abrir(), self._posicion(IdIndex._mes(nombre)))[1]
+    
+    def marcar_indexado(self, nombre: str, fin: int):
+        mes = IdIndex._mes(nombre)
+        IdIndex.PARTICION.pack_into(self._abrir(), self._posicion(mes), mes, fin)
+    
+    def insertar(self, id_transaccion: str, nombre: str, offset: int):
+        """Agrega una entrada; reinsertar la misma ubicación no la duplica"""
+        mapa = self._abrir()
+        cantidad = IdIndex.CABECERA.unpack_from(mapa, 0)[2]
+        if cantidad + 1 > self._capacidad * IdIndex.CARGA_MAXIMA:
+            self._crecer()
+            mapa = self._abrir()
+        
+        huella = IdIndex.huella(id_transaccion)
+        mes = IdIndex._mes(nombre)
+        mascara = self._capacidad - 1
+        ranura = huella & mascara
+        while True:
+            posicion = IdIndex.TAMANO_CABECERA + ranura * IdIndex.RANURA.size
+            actual = IdIndex.RANURA.unpack_from(mapa, posicion)
+            if actual[0] == 0:
+                # La ranura se escribe antes que la cantidad
+                IdIndex.RANURA.pack_into(mapa, posicion, huella, mes, offset)
+                struct.pack_into('<Q', mapa, 16, cantidad + 1)
+                return
+            if actual == (huella, mes, offset):
+                return
+            ranura = (ranura + 1) & mascara
+    
+    def candidatos(self, id_transaccion: str) -> Iterator[Tuple[str, int]]:
+        """(partición, offset) de cada entrada con la huella del ID, en orden de inserción"""
+        mapa = self._abrir()
+        huella = IdIndex.huella(id_transaccion)
+        mascara = self._capacidad - 1
+        ranura = huella & mascara
+        while True:
+            actual = IdIndex.RANURA.unpack_from(mapa, IdIndex.TAMANO_CABECERA + ranura * IdIndex.RANURA.size)
+            if actual[0] == 0:
+                return
+            if actual[0] == huella:
+                yield IdIndex._nombre(actual[1]), actual[2]
+            ranura = (ranura + 1) & mascara
+    
+    def entradas(self) -> Iterator[Tuple[int, str, int]]:
+        """(huella, partición, offset) de cada ranura ocupada"""
+        mapa = self._abrir()
+        for huella, mes, offset in IdIndex.RANURA.iter_unpack(mapa[IdIndex.TAMANO_CABECERA:]):
+            if huella:
+                yield huella, IdIndex._nombre(mes), offset
+    
+    def _crecer(self):
+        """Duplica la capacidad reinsertando las ranuras en un archivo nuevo"""
+        mapa = self._abrir()
+        capacidad = self._capacidad * 2
+        temporal = self.ruta + '.tmp'
+        IdIndex._crear(temporal, capacidad)
+        with open(temporal, 'r+b') as f, mmap.mmap(f.fileno(), 0) as nuevo:
+            nuevo[:IdIndex.TAMANO_CABECERA] = mapa[:IdIndex.TAMANO_CABECERA]
+            struct.pack_into('<Q', nuevo, 8, capacidad)
+            mascara = capacidad - 1
+            for huella, mes, offset in IdIndex.RANURA.iter_unpack(mapa[IdIndex.TAMANO_CABECERA:]):
+                if not huella:
+                    continue
+                ranura = huella & mascara
+                while struct.unpack_from('<Q', nuevo, IdIndex.TAMANO_CABECERA + ranura * IdIndex.RANURA.size)[0]:
+                    ranura = (ranura + 1) & mascara
+                IdIndex.RANURA.pack_into(nuevo, IdIndex.TAMANO_CABECERA + ranura * IdIndex.RANURA.size,
+                                         huella, mes, offset)
+            nuevo.flush()
+        self.cerrar()
+        os.replace(temporal, self.ruta)
+    
+    def sincronizar(self):
+        if self._mapa is not None:
+            self._mapa.flush()
+    
+    def reiniciar(self):
+        """Descarta el índice; se reconstruye en la próxima búsqueda"""
+        self.cerrar()
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+    
+    def cerrar(self):
+        if self._mapa is not None:
+            self._mapa.close()
+            self._archivo.close()
+        self._mapa = None
+        self._archivo = None
+        self._estado = None
+
+
+class SalesAggregate:
+    """Agregados de ventas mantenidos incrementalmente con punto de control"""
+    
+    def __init__(self):
+        self.total_centavos = 0
+        self.cantidad_transacciones = 0
+        self.productos_vendidos: Dict[str, int] = {}
+        # Offset cubierto de cada partición del diario
+        self.offsets: Dict[str, int] = {}
+    
+    def aplicar(self, transaction: dict):
+        """Incorpora una transacción a los agregados"""
+        self.total_centavos += Money.total_centavos(transaction)
+        self.cantidad_transacciones += 1
+        for producto, cantidad in transaction['pedido'].items():
+            self.productos_vendidos[producto] = self.productos_vendidos.get(producto, 0) + cantidad
+    
+    def combinar(self, parcial: dict):
+        """Suma un agregado parcial calculado por PartitionWorker"""
+        self.total_centavos += parcial['total_centavos']
+        self.cantidad_transacciones += parcial['cantidad_transacciones']
+        for producto, cantidad in parcial['productos_vendidos'].items():
+            self.productos_vendidos[producto] = self.productos_vendidos.get(producto, 0) + cantidad
+    
+    def a_estadisticas(self) -> dict:
+        """Retorna los agregados con el formato de obtener_estadisticas"""
+        return SalesAggregate.estadisticas(self.total_centavos, self.cantidad_transacciones,
+                                           dict(self.productos_vendidos))
+    
+    @staticmethod
+    def estadisticas(total_centavos: int, cantidad: int, productos: dict) -> dict:
+        """Formato de obtener_estadisticas: importes en centavos y, para mostrar, en unidades"""
+        promedio = Money.dividir(total_centavos, cantidad) if cantidad else 0
+        return {
+            "total_ventas": Money.a_unidades(total_centavos),
+            "total_centavos": total_centavos,
+            "cantidad_transacciones": cantidad,
+            "promedio_venta": Money.a_unidades(promedio),
+            "promedio_centavos": promedio,
+            "productos_mas_vendidos": productos
+        }
+    
+    def guardar(self, ruta: str):
+        """Escribe el punto de control de forma atómica"""
+        datos = {
+            "offsets": self.offsets,
+            "total_centavos": self.total_centavos,
+            "cantidad_transacciones": self.cantidad_transacciones,
+            "productos_vendidos": self.productos_vendidos,
+            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    
+    @staticmethod
+    def cargar(ruta: str) -> 'SalesAggregate':
+        """Carga un punto de control; retorna agregados vacíos si no es válido"""
+        agregado = SalesAggregate()
+        if not os.path.exists(ruta):
+            return agregado
+        
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            if 'total_centavos' not in datos:
+                Logger.info("Punto de control con importes en float; se reconstruirá en centavos")
+                return agregado
+            agregado.offsets = datos['offsets']
+            agregado.total_centavos = datos['total_centavos']
+            agregado.cantidad_transacciones = datos['cantidad_transacciones']
+            agregado.productos_vendidos = datos['productos_vendidos']
+        except (json.JSONDecodeError, KeyError, OSError) as e:
+            Logger.warning(f"Punto de control de ventas inválido, se reconstruirá: {e}")
+            return SalesAggregate()
+        
+        return agregado
+
+
+class TransactionStore:
+    """Interfaz común de los motores de almacenamiento de transacciones"""
+    
+    def agregar(self, transaction: dict):
+        """Persiste una transacción"""
+        raise NotImplementedError
+    
+    def agregar_lote(self, transactions: List[dict]):
+        """Persiste varias transacciones nuevas en una escritura agrupada"""
+        for transaction in transactions:
+            self.agregar(transaction)
+    
+    @contextmanager
+    def importacion(self):
+        """Agrupa los lotes de una importación; por defecto no cambia nada"""
+        yield
+    
+    def importar(self, transactions: Iterator[dict]) -> int:
+        """Importa transacciones en bloque. Retorna cantidad importada"""
+        raise NotImplementedError
+    
+    def iterar(self) -> Iterator[dict]:
+        """Itera el historial en orden de registro"""
+        raise NotImplementedError
+    
+    def ultimas(self, limite: int, desplazamiento: int = 0) -> list:
+        """Transacciones de la más reciente a la más antigua, paginadas"""
+        raise NotImplementedError
+    
+    def estadisticas(self) -> dict:
+        """Estadísticas con el formato de obtener_estadisticas"""
+        raise NotImplementedError
+    
+    def rango(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> Iterator[dict]:
+        """Transacciones con fecha entre desde y hasta (inclusive)"""
+        raise NotImplementedError
+    
+    def buscar(self, id_transaccion: str) -> Optional[dict]:
+        """Transacción con el ID indicado, o None"""
+        for transaction in self.iterar():
+            if transaction['id'] == id_transaccion:
+                return transaction
+        return None
+    
+    @staticmethod
+    def clave_periodo(fecha: str, periodo: str) -> str:
+        """Clave de agrupación de una fecha para el período indicado"""
+        if periodo == 'hora':
+            return fecha[:13] + ':00'
+        if periodo == 'dia':
+            return fecha[:10]
+        if periodo == 'semana':
+            anio, semana, _ = datetime.strptime(fecha[:10], "%Y-%m-%d").isocalendar()
+            return f"{anio}-S{semana:02d}"
+        if periodo == 'mes':
+            return fecha[:7]
+        raise ValueError(f"Período desconocido: {periodo}")
+    
+    @staticmethod
+    def con_unidades(fila: dict) -> dict:
+        """Agrega a una fila de ventas agrupadas el total en unidades de la moneda"""
+        fila["total_ventas"] = Money.a_unidades(fila["total_centavos"])
+        return fila
+    
+    def ventas_por_periodo(self, periodo: str, desde: Optional[str] = None,
+                           hasta: Optional[str] = None, usuario: Optional[str] = None) -> List[dict]:
+        """Transacciones y ventas agrupadas por hora, día, semana o mes"""
+        grupos: Dict[str, dict] = {}
+        for t in self.rango(desde, hasta):
+            if usuario and t['usuario'] != usuario:
+                continue
+            clave = TransactionStore.clave_periodo(t['fecha'], periodo)
+            grupo = grupos.get(clave)
+            if grupo is None:
+                grupo = grupos[clave] = {"periodo": clave, "transacciones": 0, "total_centavos": 0}
+            grupo["transacciones"] += 1
+            grupo["total_centavos"] += Money.total_centavos(t)
+        
+        return [TransactionStore.con_unidades(grupos[clave]) for clave in sorted(grupos)]
+    
+    def ventas_por_usuario(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[dict]:
+        """Transacciones y ventas por cajero, de mayor a menor venta"""
+        grupos: Dict[str, dict] = {}
+        for t in self.rango(desde, hasta):
+            grupo = grupos.get(t['usuario'])
+            if grupo is None:
+                grupo = grupos[t['usuario']] = {"usuario": t['usuario'], "transacciones": 0, "total_centavos": 0}
+            grupo["transacciones"] += 1
+            grupo["total_centavos"] += Money.total_centavos(t)
+        
+        filas = [TransactionStore.con_unidades(grupo) for grupo in grupos.values()]
+        return sorted(filas, key=lambda g: g["total_centavos"], reverse=True)
+    
+    def cerrar(self):
+        """Libera los recursos del motor"""
+
+
+class PartitionWorker:
+    """Agregados parciales sobre un tramo de una partición; se ejecuta en procesos del pool"""
+    
+    @staticmethod
+    def agregados(tarea: tuple) -> dict:
+        """Totales, cantidad y unidades por producto de un tramo (ruta, inicio, fin)"""
+        ruta, inicio, fin = tarea
+        parcial = SalesAggregate()
+        final = inicio
+        for final, transaction in TransactionJournal(ruta).leer_con_offsets(inicio, fin):
+            parcial.aplicar(transaction)
+        
+        return {
+            "total_centavos": parcial.total_centavos,
+            "cantidad_transacciones": parcial.cantidad_transacciones,
+            "productos_vendidos": parcial.productos_vendidos,
+            "fin": final
+        }
+    
+    @staticmethod
+    def ventas_agrupadas(tarea: tuple) -> Dict[str, list]:
+        """[transacciones, ventas] por período o por usuario (periodo None) de un tramo"""
+        ruta, inicio, fin, desde, hasta, periodo, usuario = tarea
+        grupos: Dict[str, list] = {}
+        for t in TransactionJournal(ruta).leer(inicio, fin):
+            if (desde and t['fecha'] < desde) or (hasta and t['fecha'] > hasta):
+                continue
+            if usuario and t['usuario'] != usuario:
+                continue
+            
+            clave = TransactionStore.clave_periodo(t['fecha'], periodo) if periodo else t['usuario']
+            grupo = grupos.get(clave)
+            if grupo is None:
+                grupo = grupos[clave] = [0, 0]
+            grupo[0] += 1
+            grupo[1] += Money.total_centavos(t)
+        return grupos
+
+
+class JsonTransactionStore(TransactionStore):
+    """Motor por defecto: particiones mensuales JSON Lines con punto de control de agregados"""
+    
+    CHECKPOINT_CADA = 100
+    INDICE_IDS = 'ids.idx'
+    PATRON_PARTICION = re.compile(r'^(\d{4}-\d{2})\.jsonl(\.gz)?$')
+    # Tamaño fijo de tramo: el resultado no depende de la cantidad de procesos
+    TAMANO_TRAMO = 32 * 1024 * 1024
+    
+    def __init__(self, directorio: str, legacy_files: List[str], workers: int = 1):
+        self.directorio = directorio
+        self.workers = workers
+        self.snapshot_file = os.path.join(directorio, 'snapshot.json')
+        self.legacy_files = legacy_files
+        self._activa: Optional[str] = None
+        self._journal_activo: Optional[TransactionJournal] = None
+        self._indices: Dict[str, TimeIndex] = {}
+        self._ids = IdIndex(os.path.join(directorio, JsonTransactionStore.INDICE_IDS))
+        self._agregado: Optional[SalesAggregate] = None
+        # (mes, ruta, tamaño) de las particiones distintas de la activa, para no listar el
+        # directorio ni leer sus índices en cada venta
+        self._cerradas: Optional[List[Tuple[str, str, int]]] = None
+        self._ventas_sin_checkpoint = 0
+        self._compactacion_diferida = False
+        
+        os.makedirs(directorio, exist_ok=True)
+        # Serializa escrituras, compactación, índices y punto de control entre terminales
+        self.bloqueo = FileLock(os.path.join(directorio, 'particiones'))
+        with self.bloqueo:
+            if any(os.path.exists(ruta) for ruta in legacy_files):
+                self.migrar_legacy()
+            self.compactar_cerradas()
+    
+    def _ruta(self, nombre: str) -> str:
+        return os.path.join(self.directorio, nombre + '.jsonl')
+    
+    def particiones(self) -> List[Tuple[str, str]]:
+        """(mes, ruta) de cada partición en orden cronológico"""
+        encontradas: Dict[str, str] = {}
+        for archivo in os.listdir(self.directorio):
+            coincidencia = JsonTransactionStore.PATRON_PARTICION.match(archivo)
+            if not coincidencia:
+                continue
+            nombre = coincidencia.group(1)
+            # Si una compactación se interrumpió tras el rename, la versión .gz ya está completa
+            if nombre in encontradas and not coincidencia.group(2):
+                continue
+            encontradas[nombre] = os.path.join(self.directorio, archivo)
+        return sorted(encontradas.items())
+    
+    def _lector(self, nombre: str, ruta: str) -> TransactionJournal:
+        """Diario de una partición; la activa reutiliza el diario abierto para escritura"""
+        if self._journal_activo is not None and self._journal_activo.ruta == ruta:
+            return self._journal_activo
+        return TransactionJournal(ruta)
+    
+    def _indice(self, nombre: str) -> TimeIndex:
+        indice = self._indices.get(nombre)
+        if indice is None:
+            indice = self._indices[nombre] = TimeIndex(os.path.join(self.directorio, nombre + '.timeidx'))
+        return indice
+    
+    def _rotar(self, nombre: str):
+        """Cambia la partición de escritura al mes indicado"""
+        if self._journal_activo is not None:
+            self._journal_activo.cerrar()
+        
+        # Una venta fechada en un mes ya compactado reabre su partición
+        compactada = self._ruta(nombre) + '.gz'
+        if os.path.exists(compactada):
+            self._descomprimir(nombre)
+        
+        self._activa = nombre
+        self._journal_activo = TransactionJournal(self._ruta(nombre))
+        self._cerradas = None
+        if not self._compactacion_diferida:
+            self.compactar_cerradas()
+    
+    def _descomprimir(self, nombre: str):
+        """Reabre una partición compactada como diario editable"""
+        compactada = self._ruta(nombre) + '.gz'
+        temporal = self._ruta(nombre) + '.tmp'
+        with gzip.open(compactada, 'rb') as origen, open(temporal, 'wb') as destino:
+            shutil.copyfileobj(origen, destino)
+            destino.flush()
+            os.fsync(destino.fileno())
+        os.replace(temporal, self._ruta(nombre))
+        os.remove(compactada)
+        if os.path.exists(compactada + '.idx'):
+            os.remove(compactada + '.idx')
+        Logger.info(f"Partición {nombre} reabierta para escritura")
+    
+    def compactar_cerradas(self):
+        """Comprime las particiones de meses anteriores al actual"""
+        mes_actual = datetime.now().strftime("%Y-%m")
+        for nombre, ruta in self.particiones():
+            if nombre >= mes_actual or nombre == self._activa:
+                continue
+            if not ruta.endswith('.gz'):
+                TransactionJournal(ruta).compactar()
+                self._cerradas = None
+                Logger.info(f"Partición {nombre} compactada")
+            elif os.path.exists(self._ruta(nombre)):
+                # Restos de una compactación interrumpida
+                os.remove(self._ruta(nombre))
+    
+    def migrar_legacy(self) -> int:
+        """Reparte los historiales de un solo archivo en particiones mensuales"""
+        total = 0
+        # Cada importación se antepone: el historial más reciente se procesa primero
+        for origen in reversed(self.legacy_files):
+            if not os.path.exists(origen):
+                continue
+            try:
+                cantidad = self._importar_antiguo(TransactionManager.leer_archivo_historial(origen))
+            except (json.JSONDecodeError, OSError) as e:
+                Logger.error(f"Error al migrar historial {origen}: {e}")
+                raise
+            
+            os.replace(origen, origen + '.migrado')
+            Logger.success(f"Historial migrado a particiones mensuales: {origen} ({cantidad} transacciones)")
+            total += cantidad
+        
+        # Puntos de control e índices del diario único anterior
+        for obsoleto in ('transactions.snapshot.json', 'transactions.timeidx'):
+            if os.path.exists(obsoleto):
+                os.remove(obsoleto)
+        return total
+    
+    def _importar_antiguo(self, transactions: Iterator[dict]) -> int:
+        """Antepone un historial previo a las particiones de cada mes"""
+        if self._journal_activo is not None:
+            self._journal_activo.cerrar()
+        
+        temporales = {}
+        cantidad = 0
+        try:
+            for transaction in transactions:
+                nombre = transaction['fecha'][:7]
+                f = temporales.get(nombre)
+                if f is None:
+                    f = temporales[nombre] = open(self._ruta(nombre) + '.import', 'wb')
+                linea = json.dumps(transaction, ensure_ascii=False, separators=(',', ':')) + '\n'
+                f.write(linea.encode('utf-8'))
+                cantidad += 1
+        finally:
+            for f in temporales.values():
+                f.close()
+        
+        existentes = dict(self.particiones())
+        for nombre in temporales:
+            temporal = self._ruta(nombre) + '.import'
+            existente = existentes.get(nombre)
+            with open(temporal, 'ab') as destino:
+                if existente:
+                    with TransactionJournal(existente)._abrir_lectura() as actual:
+                        shutil.copyfileobj(actual, destino)
+                destino.flush()
+                os.fsync(destino.fileno())
+            
+            os.replace(temporal, self._ruta(nombre))
+            if existente and existente.endswith('.gz'):
+                os.remove(existente)
+            self._indice(nombre).reiniciar()
+        
+        # Las particiones reescritas invalidan el punto de control y los offsets del índice de IDs
+        self._ids.reiniciar()
+        self._agregado = None
+        self._cerradas = None
+        if os.path.exists(self.snapshot_file):
+            os.remove(self.snapshot_file)
+        return cantidad
+    
+    def agregar(self, transaction: dict):
+        nombre = transaction['fecha'][:7]
+        agregado = self._obtener_agregado()
+        
+        with self.bloqueo:
+            # Otra terminal pudo compactar o reescribir la partición abierta
+            if nombre != self._activa or self._journal_activo.obsoleto():
+                self._rotar(nombre)
+            
+            fin = self._journal_activo.agregar(transaction)
+            # Si otra terminal anexó ventas desde nuestra última escritura, el tramo
+            # pendiente (incluida esta venta) se reproduce en la próxima consulta
+            inicio = self._journal_activo.ultimo_inicio
+            if agregado.offsets.get(nombre, 0) == inicio:
+                agregado.offsets[nombre] = fin
+                agregado.aplicar(transaction)
+            # Igual para el índice de IDs: si está atrasado se completa en la próxima búsqueda
+            if self._ids.indexado_hasta(nombre) == inicio:
+                self._ids.insertar(transaction['id'], nombre, inicio)
+                self._ids.marcar_indexado(nombre, fin)
+        
+        self._ventas_sin_checkpoint += 1
+        if self._ventas_sin_checkpoint >= self.CHECKPOINT_CADA:
+            self.checkpoint()
+    
+    def agregar_lote(self, transactions: List[dict]):
+        """Anexa las ventas al final de sus particiones: una escritura y un fsync por mes"""
+        por_mes: Dict[str, List[dict]] = {}
+        for transaction in transactions:
+            por_mes.setdefault(transaction['fecha'][:7], []).append(transaction)
+        agregado = self._obtener_agregado()
+        
+        with self.bloqueo:
+            for nombre in sorted(por_mes):
+                lote = por_mes[nombre]
+                if nombre != self._activa or self._journal_activo.obsoleto():
+                    self._rotar(nombre)
+                
+                finales = self._journal_activo.agregar_lote(lote)
+                inicio = self._journal_activo.ultimo_inicio
+                # Mismas reglas que agregar: si los agregados o el índice están atrasados,
+                # el lote se incorpora en la próxima consulta
+                if agregado.offsets.get(nombre, 0) == inicio:
+                    agregado.offsets[nombre] = finales[-1]
+                    for transaction in lote:
+                        agregado.aplicar(transaction)
+                if self._ids.indexado_hasta(nombre) == inicio:
+                    for transaction, fin in zip(lote, finales):
+                        self._ids.insertar(transaction['id'], nombre, inicio)
+                        inicio = fin
+                    self._ids.marcar_indexado(nombre, finales[-1])
+        
+        self.checkpoint()
+    
+    def importar(self, transactions: Iterator[dict]) -> int:
+        with self.bloqueo:
+            cantidad = self._importar_antiguo(transactions)
+            self.compactar_cerradas()
+        return cantidad
+    
+    @contextmanager
+    def importacion(self):
+        """Difiere la compactación de los meses cerrados hasta el final de la importación.
+        
+        Una importación con fechas atrasadas toca los mismos meses cerrados en cada lote:
+        compactarlos en cada rotación los descomprimiría y recomprimiría una vez por lote.
+        """
+        self._compactacion_diferida = True
+        try:
+            yield
+        finally:
+            self._compactacion_diferida = False
+            with self.bloqueo:
+                self.compactar_cerradas()
+    
+    def iterar(self) -> Iterator[dict]:
+        for nombre, ruta in self.particiones():
+            yield from self._lector(nombre, ruta).leer()
+    
+    def ultimas(self, limite: int, desplazamiento: int = 0) -> list:
+        resultado = []
+        saltar = desplazamiento
+        for nombre, ruta in reversed(self.particiones()):
+            for linea in self._lector(nombre, ruta).leer_inverso_crudo():
+                # Los registros saltados no se deserializan
+                if saltar:
+                    saltar -= 1
+                    continue
+                resultado.append(json.loads(linea))
+                if len(resultado) >= limite:
+                    return resultado
+        return resultado
+    
+    def estadisticas(self) -> dict:
+        # Una consulta vuelve a listar las particiones: otra terminal pudo reabrir un mes cerrado
+        self._cerradas = None
+        return self._obtener_agregado().a_estadisticas()
+    
+    def rango(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> Iterator[dict]:
+        for nombre, ruta in self.particiones():
+            # Poda de particiones fuera del rango
+            if (desde and nombre < desde[:7]) or (hasta and nombre > hasta[:7]):
+                continue
+            
+            journal = self._lector(nombre, ruta)
+            indice = self._indice(nombre)
+            with self.bloqueo:
+                indice.actualizar(journal)
+            inicio, fin = indice.buscar(desde, hasta)
+            for t in journal.leer(inicio, fin):
+                # Los extremos se filtran por fecha exacta por si el reloj retrocedió
+                if (desde is None or t['fecha'] >= desde) and (hasta is None or t['fecha'] <= hasta):
+                    yield t
+    
+    def buscar(self, id_transaccion: str) -> Optional[dict]:
+        with self.bloqueo:
+            registro = self._buscar_indexado(id_transaccion)
+            if registro is None:
+                # Puede estar en un tramo aún no indexado (p. ej. antes de crear el índice)
+                self._actualizar_ids()
+                registro = self._buscar_indexado(id_transaccion)
+        return registro
+    
+    def _buscar_indexado(self, id_transaccion: str) -> Optional[dict]:
+        for nombre, offset in self._ids.candidatos(id_transaccion):
+            ruta = self._ruta(nombre)
+            if not os.path.exists(ruta):
+                ruta += '.gz'
+            registro = self._lector(nombre, ruta).leer_en(offset)
+            # La huella se confirma con el registro
+            if registro is not None and registro.get('id') == id_transaccion:
+                return registro
+        return None
+    
+    def _actualizar_ids(self) -> Dict[str, str]:
+        """Indexa lo anexado desde la última actualización. Retorna {partición: ruta}"""
+        rutas = dict(self.particiones())
+        cobertura = self._ids.cobertura()
+        if any(nombre not in rutas or fin > self._lector(nombre, rutas[nombre]).tamano()
+               for nombre, fin in cobertura.items() if fin):
+            Logger.warning("Índice de IDs inconsistente con las particiones; se reconstruirá")
+            self._ids.reiniciar()
+            cobertura = {}
+        
+        for nombre, ruta in rutas.items():
+            journal = self._lector(nombre, ruta)
+            inicio = cobertura.get(nombre, 0)
+            tamano = journal.tamano()
+            if inicio >= tamano:
+                continue
+            for fin, registro in journal.leer_con_offsets(inicio, tamano):
+                self._ids.insertar(registro['id'], nombre, inicio)
+                inicio = fin
+            self._ids.marcar_indexado(nombre, inicio)
+        return rutas
+    
+    def reconstruir_indice_ids(self) -> int:
+        """Reconstruye el índice de IDs desde las particiones. Retorna las entradas indexadas"""
+        with self.bloqueo:
+            self._ids.reiniciar()
+            self._actualizar_ids()
+            self._ids.sincronizar()
+            return self._ids.cantidad()
+    
+    def verificar_indice_ids(self) -> dict:
+        """Compara el índice de IDs con las particiones sin modificarlo"""
+        resultado = {"registros": 0, "indexados": 0, "cantidad_cabecera": 0, "faltantes": 0,
+                     "sobrantes": 0, "desactualizadas": [], "ids_repetidos": 0}
+        with self.bloqueo:
+            rutas = dict(self.particiones())
+            if not os.path.exists(self._ids.ruta):
+                resultado["desactualizadas"] = sorted(rutas)
+                return resultado
+            
+            cobertura = self._ids.cobertura()
+            esperadas = set()
+            vistos = set()
+            for nombre, ruta in rutas.items():
+                journal = self._lector(nombre, ruta)
+                if cobertura.get(nombre, 0) != journal.tamano():
+                    resultado["desactualizadas"].append(nombre)
+                inicio = 0
+                for fin, registro in journal.leer_con_offsets():
+                    if inicio < cobertura.get(nombre, 0):
+                        esperadas.add((IdIndex.huella(registro['id']), nombre, inicio))
+                    if registro['id'] in vistos:
+                        resultado["ids_repetidos"] += 1
+                    vistos.add(registro['id'])
+                    resultado["registros"] += 1
+                    inicio = fin
+            
+            entradas = set(self._ids.entradas())
+            resultado["indexados"] = len(entradas)
+            resultado["cantidad_cabecera"] = self._ids.cantidad()
+            resultado["faltantes"] = len(esperadas - entradas)
+            resultado["sobrantes"] = len(entradas - esperadas)
+        return resultado
+    
+    def _obtener_agregado(self) -> SalesAggregate:
+        """Retorna los agregados al día, reproduciendo solo la cola nueva de cada partición"""
+        agregado = self._agregado
+        if agregado is None:
+            agregado = SalesAggregate.cargar(self.snapshot_file)
+        
+        particiones = self._particiones_con_tamano()
+        tamanos = {nombre: tamano for nombre, _, tamano in particiones}
+        if any(nombre not in tamanos or offset > tamanos[nombre] for nombre, offset in agregado.offsets.items()):
+            Logger.warning("El punto de control no corresponde a las particiones; reconstruyendo agregados")
+            agregado = SalesAggregate()
+        
+        tareas = []
+        nombres = []
+        for nombre, ruta, tamano in particiones:
+            offset = agregado.offsets.get(nombre, 0)
+            if offset < tamano:
+                for inicio, fin in self._tramos(ruta, offset, tamano):
+                    tareas.append((ruta, inicio, fin))
+                    nombres.append(nombre)
+        
+        # Los parciales se combinan en orden de partición y tramo, igual que en serie
+        for nombre, parcial in zip(nombres, self._ejecutar(PartitionWorker.agregados, tareas)):
+            agregado.combinar(parcial)
+            agregado.offsets[nombre] = max(agregado.offsets.get(nombre, 0), parcial['fin'])
+        
+        self._agregado = agregado
+        return agregado
+    
+    def _particiones_con_tamano(self) -> List[Tuple[str, str, int]]:
+        """(mes, ruta, tamaño) de cada partición en orden cronológico.
+        
+        Solo la activa cambia entre ventas de esta terminal: el resto se toma de la caché,
+        que se descarta al rotar, al compactar o cuando el diario activo queda obsoleto.
+        """
+        if self._cerradas is None or (self._journal_activo is not None and self._journal_activo.obsoleto()):
+            particiones = [(nombre, ruta, self._lector(nombre, ruta).tamano()) for nombre, ruta in self.particiones()]
+            self._cerradas = [p for p in particiones if p[0] != self._activa]
+            return particiones
+        
+        particiones = list(self._cerradas)
+        if self._journal_activo is not None:
+            particiones.append((self._activa, self._journal_activo.ruta, self._journal_activo.tamano()))
+            particiones.sort()
+        return particiones
+    
+    def _tramos(self, ruta: str, inicio: int, fin: int) -> List[Tuple[int, int]]:
+        """Divide [inicio, fin) en tramos alineados a líneas"""
+        if ruta.endswith('.gz') or fin - inicio <= JsonTransactionStore.TAMANO_TRAMO:
+            return [(inicio, fin)]
+        
+        cortes = [inicio]
+        with open(ruta, 'rb') as f:
+            posicion = inicio + JsonTransactionStore.TAMANO_TRAMO
+            while posicion < fin:
+                f.seek(posicion)
+                f.readline()
+                posicion = f.tell()
+                if posicion >= fin:
+                    break
+                cortes.append(posicion)
+                posicion += JsonTransactionStore.TAMANO_TRAMO
+        cortes.append(fin)
+        return list(zip(cortes, cortes[1:]))
+    
+    @staticmethod
+    def _contexto_procesos():
+        """Contexto de multiprocessing para el pool: los hilos del logger, la cocina y el
+        almacenamiento pueden tener candados tomados, y un fork los heredaría bloqueados"""
+        metodos = multiprocessing.get_all_start_methods()
+        return multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
+    
+    def _ejecutar(self, funcion, tareas: list) -> list:
+        """Ejecuta las tareas en el pool de procesos o en serie, conservando el orden"""
+        if self.workers > 1 and len(tareas) > 1:
+            try:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=min(self.workers, len(tareas)),
+                                                            mp_context=self._contexto_procesos()) as pool:
+                    return list(pool.map(funcion, tareas))
+            except (OSError, concurrent.futures.process.BrokenProcessPool) as e:
+                Logger.warning(f"Pool de procesos no disponible, se calcula en serie: {e}")
+        return [funcion(tarea) for tarea in tareas]
+    
+    def _ventas_agrupadas(self, desde: Optional[str], hasta: Optional[str],
+                          periodo: Optional[str], usuario: Optional[str]) -> Dict[str, list]:
+        """Combina los grupos parciales de las particiones y tramos del rango"""
+        tareas = []
+        for nombre, ruta in self.particiones():
+            if (desde and nombre < desde[:7]) or (hasta and nombre > hasta[:7]):
+                continue
+            journal = self._lector(nombre, ruta)
+            indice = self._indice(nombre)
+            with self.bloqueo:
+                indice.actualizar(journal)
+            inicio, fin = indice.buscar(desde, hasta)
+            if inicio < fin:
+                for tramo in self._tramos(ruta, inicio, fin):
+                    tareas.append((ruta,) + tramo + (desde, hasta, periodo, usuario))
+        
+        grupos: Dict[str, list] = {}
+        for parcial in self._ejecutar(PartitionWorker.ventas_agrupadas, tareas):
+            for clave, (cantidad, total) in parcial.items():
+                grupo = grupos.get(clave)
+                if grupo is None:
+                    grupo = grupos[clave] = [0, 0]
+                grupo[0] += cantidad
+                grupo[1] += total
+        return grupos
+    
+    def ventas_por_periodo(self, periodo: str, desde: Optional[str] = None,
+                           hasta: Optional[str] = None, usuario: Optional[str] = None) -> List[dict]:
+        if periodo not in ('hora', 'dia', 'semana', 'mes'):
+            raise ValueError(f"Período desconocido: {periodo}")
+        
+        grupos = self._ventas_agrupadas(desde, hasta, periodo, usuario)
+        return [
+            TransactionStore.con_unidades({"periodo": clave, "transacciones": grupos[clave][0],
+                                           "total_centavos": grupos[clave][1]})
+            for clave in sorted(grupos)
+        ]
+    
+    def ventas_por_usuario(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[dict]:
+        grupos = self._ventas_agrupadas(desde, hasta, None, None)
+        filas = [
+            TransactionStore.con_unidades({"usuario": usuario, "transacciones": cantidad, "total_centavos": total})
+            for usuario, (cantidad, total) in grupos.items()
+        ]
+        return sorted(filas, key=lambda g: g["total_centavos"], reverse=True)
+    
+    def checkpoint(self):
+        """Persiste los agregados junto con el offset de cada partición que cubren"""
+        if self._agregado is None:
+            return
+        
+        # El diario debe estar en disco antes que el punto de control que lo referencia
+        if self._journal_activo is not None:
+            self._journal_activo.sincronizar()
+        try:
+            with self.bloqueo:
+                self._agregado.guardar(self.snapshot_file)
+                self._ids.sincronizar()
+            self._ventas_sin_checkpoint = 0
+        except OSError as e:
+            Logger.error(f"Error al guardar punto de control de ventas: {e}")
+    
+    def cerrar(self):
+        self.checkpoint()
+        if self._journal_activo is not None:
+            self._journal_activo.cerrar()
+        self._ids.sincronizar()
+        self._ids.cerrar()
+
+
+class SqliteTransactionStore(TransactionStore):
+    """Motor SQLite con transacciones y líneas de pedido normalizadas"""
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transacciones (
+            seq INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            fecha TEXT NOT NULL,
+            usuario TEXT NOT NULL,
+            total REAL NOT NULL,
+            moneda TEXT NOT NULL,
+            total_centavos INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS lineas (
+            transaccion INTEGER NOT NULL REFERENCES transacciones(seq),
+            producto TEXT NOT NULL,
+            cantidad INTEGER NOT NULL,
+            precio REAL,
+            precio_centavos INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_transacciones_fecha ON transacciones(fecha);
+        CREATE INDEX IF NOT EXISTS idx_transacciones_usuario ON transacciones(usuario);
+        CREATE INDEX IF NOT EXISTS idx_lineas_producto ON lineas(producto);
+        CREATE INDEX IF NOT EXISTS idx_lineas_transaccion ON lineas(transaccion);
+    """
+    
+    # Sentencias fijas: sqlite3 las compila una vez y reutiliza desde su caché
+    SQL_INSERTAR = (
+        "INSERT OR IGNORE INTO transacciones (id, fecha, usuario, total, moneda, total_centavos) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    )
+    SQL_INSERTAR_LINEA = (
+        "INSERT INTO lineas (transaccion, producto, cantidad, precio, precio_centavos) VALUES (?, ?, ?, ?, ?)"
+    )
+    SQL_TOTALES = "SELECT COUNT(*), COALESCE(SUM(total_centavos), 0) FROM transacciones"
+    SQL_PRODUCTOS = (
+        "SELECT producto, SUM(cantidad) AS unidades FROM lineas "
+        "GROUP BY producto ORDER BY unidades DESC"
+    )
+    SQL_RANGO = " WHERE fecha >= ? AND fecha <= ?"
+    SQL_POR_USUARIO = (
+        "SELECT usuario, COUNT(*), SUM(total_centavos) AS ventas FROM transacciones"
+        " WHERE fecha >= ? AND fecha <= ? GROUP BY usuario ORDER BY ventas DESC"
+    )
+    EXPRESIONES_PERIODO = {
+        'hora': "substr(fecha, 1, 13) || ':00'",
+        'dia': "substr(fecha, 1, 10)",
+        'mes': "substr(fecha, 1, 7)",
+    }
+    FECHA_MINIMA = "0000-00-00 00:00:00"
+    FECHA_MAXIMA = "9999-12-31 23:59:59"
+    
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._conexion = sqlite3.connect(ruta, timeout=10, cached_statements=64)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute("PRAGMA foreign_keys=ON")
+        self._conexion.executescript(SqliteTransactionStore.SCHEMA)
+        self._migrar_centavos()
+    
+    def _columnas(self, tabla: str) -> set:
+        return {fila[1] for fila in self._conexion.execute(f"PRAGMA table_info({tabla})")}
+    
+    def _migrar_centavos(self):
+        """Agrega las columnas en centavos a bases anteriores y las completa desde los importes REAL"""
+        if 'total_centavos' in self._columnas('transacciones'):
+            return
+        
+        with self._conexion:
+            # Otra terminal puede estar migrando la misma base: se verifica de nuevo con el bloqueo tomado
+            self._conexion.execute("BEGIN IMMEDIATE")
+            if 'total_centavos' in self._columnas('transacciones'):
+                return
+            self._conexion.execute("ALTER TABLE transacciones ADD COLUMN total_centavos INTEGER")
+            self._conexion.execute("ALTER TABLE lineas ADD COLUMN precio_centavos INTEGER")
+            self._conexion.executemany(
+                "UPDATE transacciones SET total_centavos = ? WHERE seq = ?",
+                [(Money.a_centavos(total), seq)
+                 for seq, total in self._conexion.execute("SELECT seq, total FROM transacciones").fetchall()]
+            )
+            self._conexion.executemany(
+                "UPDATE lineas SET precio_centavos = ? WHERE rowid = ?",
+                [(Money.a_centavos(precio), fila) for fila, precio in self._conexion.execute(
+                    "SELECT rowid, precio FROM lineas WHERE precio IS NOT NULL").fetchall()]
+            )
+        Logger.info(f"Base SQLite migrada a importes en centavos: {self.ruta}")
+    
+    def _insertar(self, transaction: dict) -> bool:
+        """Inserta una transacción y sus líneas. Retorna False si el ID ya existía"""
+        total = Money.total_centavos(transaction)
+        cursor = self._conexion.execute(SqliteTransactionStore.SQL_INSERTAR, (
+            transaction['id'], transaction['fecha'], transaction['usuario'],
+            Money.a_unidades(total), transaction['moneda'], total
+        ))
+        if not cursor.rowcount:
+            return False
+        
+        seq = cursor.lastrowid
+        precios = Money.precios_centavos(transaction)
+        lineas = []
+        for producto, cantidad in transaction['pedido'].items():
+            precio = precios.get(producto)
+            lineas.append((seq, producto, cantidad, None if precio is None else Money.a_unidades(precio), precio))
+        self._conexion.executemany(SqliteTransactionStore.SQL_INSERTAR_LINEA, lineas)
+        return True
+    
+    def agregar(self, transaction: dict):
+        with self._conexion:
+            self._insertar(transaction)
+    
+    def agregar_lote(self, transactions: List[dict]):
+        with self._conexion:
+            for transaction in transactions:
+                self._insertar(transaction)
+    
+    def importar(self, transactions: Iterator[dict]) -> int:
+        cantidad = 0
+        omitidas = 0
+        with self._conexion:
+            for transaction in transactions:
+                if self._insertar(transaction):
+                    cantidad += 1
+                else:
+                    omitidas += 1
+        
+        if omitidas:
+            Logger.warning(f"Importación SQLite: {omitidas} transacciones con ID existente omitidas")
+        return cantidad
+    
+    def _leer(self, filtro: str = "", parametros: tuple = (), orden: str = "ASC") -> Iterator[dict]:
+        """Reconstruye transacciones con sus líneas en una sola consulta"""
+        sql = (
+            "SELECT t.seq, t.id, t.fecha, t.usuario, t.total_centavos, t.moneda, l.producto, l.cantidad, "
+            "l.precio_centavos "
+            "FROM transacciones t LEFT JOIN lineas l ON l.transaccion = t.seq"
+            f"{filtro} ORDER BY t.seq {orden}, l.rowid"
+        )
+        
+        transaction = None
+        seq_actual = None
+        for seq, id_transaccion, fecha, usuario, total, moneda, producto, cantidad, precio in \
+                self._conexion.execute(sql, parametros):
+            if seq != seq_actual:
+                if transaction is not None:
+                    yield transaction
+                seq_actual = seq
+                transaction = {
+                    "id": id_transaccion,
+                    "fecha": fecha,
+                    "usuario": usuario,
+                    "pedido": {},
+                    "total_centavos": total,
+                    "moneda": moneda
+                }
+            if producto is not None:
+                transaction["pedido"][producto] = cantidad
+                if precio is not None:
+                    transaction.setdefault("precios_centavos", {})[producto] = precio
+        
+        if transaction is not None:
+            yield transaction
+    
+    def iterar(self) -> Iterator[dict]:
+        return self._leer()
+    
+    def ultimas(self, limite: int, desplazamiento: int = 0) -> list:
+        filtro = " WHERE t.seq IN (SELECT seq FROM transacciones ORDER BY seq DESC LIMIT ? OFFSET ?)"
+        return list(self._leer(filtro, (limite, desplazamiento), "DESC"))
+    
+    def estadisticas(self) -> dict:
+        cantidad, total = self._conexion.execute(SqliteTransactionStore.SQL_TOTALES).fetchone()
+        productos = dict(self._conexion.execute(SqliteTransactionStore.SQL_PRODUCTOS)) if cantidad else {}
+        return SalesAggregate.estadisticas(total, cantidad, productos)
+    
+    def buscar(self, id_transaccion: str) -> Optional[dict]:
+        # Búsqueda por el índice UNIQUE de la columna id
+        return next(self._leer(" WHERE t.id = ?", (id_transaccion,)), None)
+    
+    def rango(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> Iterator[dict]:
+        return self._leer(SqliteTransactionStore.SQL_RANGO, (
+            desde or SqliteTransactionStore.FECHA_MINIMA, hasta or SqliteTransactionStore.FECHA_MAXIMA
+        ))
+    
+    def ventas_por_periodo(self, periodo: str, desde: Optional[str] = None,
+                           hasta: Optional[str] = None, usuario: Optional[str] = None) -> List[dict]:
+        if periodo not in ('hora', 'dia', 'semana', 'mes'):
+            raise ValueError(f"Período desconocido: {periodo}")
+        
+        # SQLite no tiene semana ISO: se agrupa por día y se combina en Python
+        expresion = SqliteTransactionStore.EXPRESIONES_PERIODO.get(periodo, "substr(fecha, 1, 10)")
+        sql = f"SELECT {expresion} AS periodo, COUNT(*), SUM(total_centavos) FROM transacciones"
+        sql += SqliteTransactionStore.SQL_RANGO
+        parametros = [desde or SqliteTransactionStore.FECHA_MINIMA, hasta or SqliteTransactionStore.FECHA_MAXIMA]
+        if usuario:
+            sql += " AND usuario = ?"
+            parametros.append(usuario)
+        sql += " GROUP BY periodo ORDER BY periodo"
+        
+        grupos: Dict[str, dict] = {}
+        for clave, cantidad, total in self._conexion.execute(sql, parametros):
+            if periodo == 'semana':
+                clave = TransactionStore.clave_periodo(clave, 'semana')
+            grupo = grupos.get(clave)
+            if grupo is None:
+                grupo = grupos[clave] = {"periodo": clave, "transacciones": 0, "total_centavos": 0}
+            grupo["transacciones"] += cantidad
+            grupo["total_centavos"] += total
+        
+        return [TransactionStore.con_unidades(grupos[clave]) for clave in sorted(grupos)]
+    
+    def ventas_por_usuario(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[dict]:
+        filas = self._conexion.execute(SqliteTransactionStore.SQL_POR_USUARIO, (
+            desde or SqliteTransactionStore.FECHA_MINIMA, hasta or SqliteTransactionStore.FECHA_MAXIMA
+        ))
+        return [
+            TransactionStore.con_unidades({"usuario": usuario, "transacciones": cantidad, "total_centavos": total})
+            for usuario, cantidad, total in filas
+        ]
+    
+    def cerrar(self):
+        self._conexion.close()
+
+
+class TransactionTable:
+    """Historial en columnas compactas: nombres internados y líneas de pedido en arreglos paralelos.
+    
+    Cada venta ocupa unas pocas decenas de bytes en lugar de un dict con su pedido anidado;
+    los productos, cajeros y monedas se guardan una sola vez y los registros se reconstruyen
+    como dict solo al pedirlos.
+    """
+    
+    FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+    
+    def __init__(self):
+        self.productos: List[str] = []
+        self.usuarios: List[str] = []
+        self.monedas: List[str] = []
+        self._producto_ids: Dict[str, int] = {}
+        self._usuario_ids: Dict[str, int] = {}
+        self._moneda_ids: Dict[str, int] = {}
+        
+        # Columnas por transacción (importes en centavos para sumas exactas)
+        self._ids = bytearray()
+        self.fin_ids = array('q')
+        self.epochs = array('q')
+        self.totales = array('q')
+        self.usuario_ids = array('i')
+        self.moneda_ids = array('i')
+        # Las líneas de la transacción i van de inicio_lineas[i] a inicio_lineas[i + 1]
+        self.inicio_lineas = array('q', [0])
+        
+        # Columnas por línea de pedido; precio -1 indica precio no registrado
+        self.linea_producto = array('i')
+        self.linea_cantidad = array('i')
+        self.linea_precio = array('q')
+    
+    def _intern(self, tabla: Dict[str, int], nombres: List[str], nombre: str) -> int:
+        """Retorna el ID entero de un nombre, registrándolo si es nuevo"""
+        idx = tabla.get(nombre)
+        if idx is None:
+            idx = tabla[nombre] = len(nombres)
+            nombres.append(nombre)
+        return idx
+    
+    def agregar(self, t: dict):
+        """Incorpora una transacción a las columnas"""
+        self._ids += t['id'].encode('utf-8')
+        self.fin_ids.append(len(self._ids))
+        self.epochs.append(TimeIndex.clave(t['fecha']))
+        self.totales.append(Money.total_centavos(t))
+        self.usuario_ids.append(self._intern(self._usuario_ids, self.usuarios, t['usuario']))
+        self.moneda_ids.append(self._intern(self._moneda_ids, self.monedas, t['moneda']))
+        
+        precios = Money.precios_centavos(t)
+        for producto, cantidad in t['pedido'].items():
+            self.linea_producto.append(self._intern(self._producto_ids, self.productos, producto))
+            self.linea_cantidad.append(cantidad)
+            self.linea_precio.append(precios.get(producto, -1))
+        self.inicio_lineas.append(len(self.linea_producto))
+    
+    def cargar(self, transactions: Iterator[dict]) -> 'TransactionTable':
+        """Convierte transacciones en columnas"""
+        for t in transactions:
+            self.agregar(t)
+        return self
+    
+    def __len__(self) -> int:
+        return len(self.totales)
+    
+    def __getitem__(self, i: int) -> dict:
+        """Reconstruye la transacción i con el formato del historial"""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        
+        inicio = self.fin_ids[i - 1] if i else 0
+        pedido = {}
+        precios = {}
+        for linea in range(self.inicio_lineas[i], self.inicio_lineas[i + 1]):
+            producto = self.productos[self.linea_producto[linea]]
+            pedido[producto] = self.linea_cantidad[linea]
+            if self.linea_precio[linea] >= 0:
+                precios[producto] = self.linea_precio[linea]
+        
+        transaction = {
+            "id": self._ids[inicio:self.fin_ids[i]].decode('utf-8'),
+            "fecha": time.strftime(TransactionTable.FORMATO_FECHA, time.gmtime(self.epochs[i])),
+            "usuario": self.usuarios[self.usuario_ids[i]],
+            "pedido": pedido,
+            "total_centavos": self.totales[i],
+            "moneda": self.monedas[self.moneda_ids[i]]
+        }
+        if precios:
+            transaction["precios_centavos"] = precios
+        return transaction
+    
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(len(self)):
+            yield self[i]
+    
+    def memoria(self) -> int:
+        """Bytes ocupados por las columnas y las tablas de nombres"""
+        columnas = [self._ids, self.fin_ids, self.epochs, self.totales, self.usuario_ids, self.moneda_ids,
+                    self.inicio_lineas, self.linea_producto, self.linea_cantidad, self.linea_precio]
+        nombres = self.productos + self.usuarios + self.monedas
+        return (sum(sys.getsizeof(c) for c in columnas) + sum(sys.getsizeof(n) for n in nombres) +
+                sys.getsizeof(self._producto_ids) + sys.getsizeof(self._usuario_ids) +
+                sys.getsizeof(self._moneda_ids))
+
+
+class AnalyticsEngine(TransactionTable):
+    """Motor analítico columnar; vectorizado con NumPy si está instalado"""
+    
+    SEGUNDOS_DIA = 86400
+    EPOCH = datetime(1970, 1, 1)
+    
+    def __init__(self, usar_numpy: Optional[bool] = None):
+        super().__init__()
+        self.usar_numpy = np is not None and usar_numpy is not False
+        self._columnas: Dict[str, object] = {}
+    
+    def cargar(self, transactions: Iterator[dict]) -> 'AnalyticsEngine':
+        """Convierte transacciones en columnas"""
+        super().cargar(transactions)
+        self._columnas = {}
+        return self
+    
+    def _col(self, nombre: str):
+        """Vista NumPy (sin copia) de una columna"""
+        columna = self._columnas.get(nombre)
+        if columna is None:
+            arreglo = getattr(self, nombre)
+            columna = self._columnas[nombre] = np.frombuffer(arreglo, dtype=arreglo.typecode)
+        return columna
+    
+    def _sumar_por_grupo(self, grupos, pesos, cantidad_grupos: int) -> List[int]:
+        """Suma entera de pesos por grupo"""
+        if self.usar_numpy:
+            # Las sumas en float64 son exactas mientras no superen 2**53 centavos
+            resultado = np.bincount(grupos, weights=pesos, minlength=cantidad_grupos)
+            return np.rint(resultado).astype(np.int64).tolist()
+        
+        resultado = [0] * cantidad_grupos
+        for grupo, peso in zip(grupos, pesos):
+            resultado[grupo] += peso
+        return resultado
+    
+    def cantidad_transacciones(self) -> int:
+        return len(self.totales)
+    
+    def total_centavos(self) -> int:
+        if self.usar_numpy:
+            return int(self._col('totales').sum())
+        return sum(self.totales)
+    
+    def unidades_por_producto(self) -> Dict[str, int]:
+        """Unidades vendidas por producto"""
+        if self.usar_numpy:
+            unidades = self._sumar_por_grupo(self._col('linea_producto'), self._col('linea_cantidad'), len(self.productos))
+        else:
+            unidades = self._sumar_por_grupo(self.linea_producto, self.linea_cantidad, len(self.productos))
+        return dict(zip(self.productos, unidades))
+    
+    def top_productos(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Los N productos con más unidades vendidas (empates por nombre)"""
+        unidades = self.unidades_por_producto()
+        return sorted(unidades.items(), key=lambda x: (-x[1], x[0]))[:n]
+    
+    def estadisticas(self) -> dict:
+        """Estadísticas con el formato de obtener_estadisticas"""
+        cantidad = self.cantidad_transacciones()
+        if not cantidad:
+            return SalesAggregate.estadisticas(0, 0, {})
+        return SalesAggregate.estadisticas(self.total_centavos(), cantidad, self.unidades_por_producto())
+    
+    def ingresos_por_producto(self, precios_actuales: Optional[dict] = None) -> Dict[str, float]:
+        """Ingresos por producto con el precio registrado en cada venta
+        
+        Las líneas antiguas sin precio usan precios_actuales si se indica; si no, se omiten.
+        """
+        respaldo = [
+            Money.a_centavos(precios_actuales[p]) if precios_actuales and p in precios_actuales else 0
+            for p in self.productos
+        ]
+        
+        if self.usar_numpy:
+            productos = self._col('linea_producto')
+            precios = self._col('linea_precio')
+            precios = np.where(precios >= 0, precios, np.array(respaldo, dtype=np.int64)[productos])
+            ingresos = self._sumar_por_grupo(productos, precios * self._col('linea_cantidad'), len(self.productos))
+        else:
+            importes = [
+                (precio if precio >= 0 else respaldo[producto]) * cantidad
+                for producto, cantidad, precio in zip(self.linea_producto, self.linea_cantidad, self.linea_precio)
+            ]
+            ingresos = self._sumar_por_grupo(self.linea_producto, importes, len(self.productos))
+        
+        return {producto: Money.a_unidades(centavos) for producto, centavos in zip(self.productos, ingresos)}
+    
+    @staticmethod
+    def _clave_de_cubeta(periodo: str, cubeta: int) -> str:
+        """Etiqueta de una cubeta con el mismo formato que TransactionStore.clave_periodo"""
+        if periodo == 'hora':
+            return (AnalyticsEngine.EPOCH + timedelta(hours=cubeta)).strftime("%Y-%m-%d %H:00")
+        if periodo == 'dia':
+            return (AnalyticsEngine.EPOCH + timedelta(days=cubeta)).strftime("%Y-%m-%d")
+        if periodo == 'semana':
+            # Cubeta = semanas desde el lunes 1969-12-29
+            lunes = AnalyticsEngine.EPOCH + timedelta(days=cubeta * 7 - 3)
+            anio, semana, _ = lunes.isocalendar()
+            return f"{anio}-S{semana:02d}"
+        anio, mes = divmod(cubeta, 12)
+        return f"{anio + 1970:04d}-{mes + 1:02d}"
+    
+    def _cubetas(self, periodo: str):
+        """Número de cubeta de cada transacción para el período indicado"""
+        if periodo not in ('hora', 'dia', 'semana', 'mes'):
+            raise ValueError(f"Período desconocido: {periodo}")
+        
+        if self.usar_numpy:
+            epochs = self._col('epochs')
+            if periodo == 'hora':
+                return epochs // 3600
+            dias = epochs // AnalyticsEngine.SEGUNDOS_DIA
+            if periodo == 'dia':
+                return dias
+            if periodo == 'semana':
+                return (dias + 3) // 7
+            return epochs.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+        
+        if periodo == 'hora':
+            return [e // 3600 for e in self.epochs]
+        if periodo == 'dia':
+            return [e // AnalyticsEngine.SEGUNDOS_DIA for e in self.epochs]
+        if periodo == 'semana':
+            return [(e // AnalyticsEngine.SEGUNDOS_DIA + 3) // 7 for e in self.epochs]
+        resultado = []
+        for e in self.epochs:
+            fecha = AnalyticsEngine.EPOCH + timedelta(seconds=e)
+            resultado.append((fecha.year - 1970) * 12 + fecha.month - 1)
+        return resultado
+    
+    def ventas_por_periodo(self, periodo: str) -> List[dict]:
+        """Transacciones y ventas por cubeta de tiempo, en orden cronológico"""
+        cubetas = self._cubetas(periodo)
+        
+        if self.usar_numpy:
+            unicas, grupos = np.unique(cubetas, return_inverse=True)
+            unicas = unicas.tolist()
+            conteos = np.bincount(grupos, minlength=len(unicas)).tolist()
+            totales = self._sumar_por_grupo(grupos, self._col('totales'), len(unicas))
+        else:
+            unicas = sorted(set(cubetas))
+            posicion = {cubeta: i for i, cubeta in enumerate(unicas)}
+            grupos = [posicion[cubeta] for cubeta in cubetas]
+            conteos = self._sumar_por_grupo(grupos, [1] * len(grupos), len(unicas))
+            totales = self._sumar_por_grupo(grupos, self.totales, len(unicas))
+        
+        return [
+            {
+                "periodo": AnalyticsEngine._clave_de_cubeta(periodo, cubeta),
+                "transacciones": conteo,
+                "total_ventas": Money.a_unidades(total),
+                "total_centavos": total
+            }
+            for cubeta, conteo, total in zip(unicas, conteos, totales)
+        ]
+
+
+class IdGenerator:
+    """IDs de transacción ordenables y sin coordinación entre terminales.
+    
+    26 caracteres hexadecimales: 12 de milisegundos desde la época, 8 de nodo aleatorio por
+    proceso (se regenera tras un fork) y 6 de secuencia dentro del milisegundo. Dentro de un
+    proceso son estrictamente crecientes aunque el reloj retroceda, y en orden de texto
+    quedan en orden cronológico, por lo que sirven como clave de un índice de tiempo.
+    """
+    
+    LARGO = 26
+    MAX_SECUENCIA = 0xFFFFFF
+    
+    _pid: Optional[int] = None
+    _nodo = ''
+    _ms = 0
+    _prefijo = ''
+    _secuencia = 0
+    _candado = threading.Lock()
+    
+    @staticmethod
+    def _avanzar(cantidad: int) -> int:
+        """Reserva `cantidad` secuencias consecutivas del milisegundo actual. Retorna la primera"""
+        ms = int(time.time() * 1000)
+        if IdGenerator._pid != os.getpid():
+            IdGenerator._pid = os.getpid()
+            IdGenerator._nodo = os.urandom(4).hex().upper()
+            IdGenerator._ms = -1
+        
+        if ms <= IdGenerator._ms:
+            if IdGenerator._secuencia + cantidad <= IdGenerator.MAX_SECUENCIA + 1:
+                primera = IdGenerator._secuencia
+                IdGenerator._secuencia += cantidad
+                return primera
+            # Secuencia agotada o reloj atrasado: se toma prestado el milisegundo siguiente
+            ms = IdGenerator._ms + 1
+        IdGenerator._ms = ms
+        IdGenerator._prefijo = '%012X%s' % (ms, IdGenerator._nodo)
+        IdGenerator._secuencia = cantidad
+        return 0
+    
+    @staticmethod
+    def generar() -> str:
+        """Un ID nuevo"""
+        with IdGenerator._candado:
+            secuencia = IdGenerator._avanzar(1)
+            return IdGenerator._prefijo + '%06X' % secuencia
+    
+    @staticmethod
+    def generar_lote(cantidad: int) -> List[str]:
+        """IDs consecutivos para importaciones masivas (un acceso al reloj por cada 16M)"""
+        ids = []
+        while cantidad > 0:
+            parte = min(cantidad, IdGenerator.MAX_SECUENCIA + 1)
+            with IdGenerator._candado:
+                primera = IdGenerator._avanzar(parte)
+                prefijo = IdGenerator._prefijo
+            ids += [prefijo + '%06X' % s for s in range(primera, primera + parte)]
+            cantidad -= parte
+        return ids
+    
+    @staticmethod
+    def marca_tiempo(id_transaccion: str) -> Optional[float]:
+        """Segundos desde la época codificados en el ID; None para IDs antiguos"""
+        if len(id_transaccion) != IdGenerator.LARGO:
+            return None
+        try:
+            return int(id_transaccion[:12], 16) / 1000
+        except ValueError:
+            return None
+
+
+class TransactionManager:
+    """Gestor de transacciones y historial"""
+    
+    TRANSACTIONS_FILE = 'transactions.json'
+    JOURNAL_FILE = 'transactions.jsonl'
+    PARTITIONS_DIR = 'transactions'
+    SQLITE_FILE = 'transactions.db'
+    MOTORES = ('json', 'sqlite')
+    # Lectura por bloques de historiales en arreglo JSON
+    BLOQUE_LECTURA = 1 << 20
+    MAX_ELEMENTO = 64 << 20
+    
+    motor = 'json'
+    workers = 1
+    _store: Optional[TransactionStore] = None
+    
+    @staticmethod
+    def configurar(config: dict):
+        """Selecciona el motor de almacenamiento según la clave opcional 'storage'"""
+        storage = config.get('storage', {})
+        motor = storage.get('engine', 'json')
+        if motor not in TransactionManager.MOTORES:
+            raise ValueError(f"Motor de almacenamiento desconocido: {motor}")
+        
+        if motor != TransactionManager.motor:
+            TransactionManager.cerrar()
+            TransactionManager.motor = motor
+        if 'path' in storage:
+            TransactionManager.SQLITE_FILE = storage['path']
+        
+        workers = config.get('reports', {}).get('workers')
+        if workers is not None:
+            TransactionManager.configurar_workers(workers)
+    
+    @staticmethod
+    def configurar_workers(workers):
+        """Procesos para reportes sobre particiones; 'auto' usa todos los núcleos"""
+        if workers == 'auto':
+            workers = os.cpu_count() or 1
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError(f"Cantidad de procesos inválida para reportes: {workers}")
+        
+        TransactionManager.workers = workers
+        if isinstance(TransactionManager._store, JsonTransactionStore):
+            TransactionManager._store.workers = workers
+    
+    @staticmethod
+    def crear_store(motor: str) -> TransactionStore:
+        """Crea una instancia del motor de almacenamiento indicado"""
+        if motor == 'sqlite':
+            return SqliteTransactionStore(TransactionManager.SQLITE_FILE)
+        return JsonTransactionStore(
+            TransactionManager.PARTITIONS_DIR,
+            [TransactionManager.TRANSACTIONS_FILE, TransactionManager.JOURNAL_FILE],
+            TransactionManager.workers
+        )
+    
+    @staticmethod
+    def _obtener_store() -> TransactionStore:
+        """Retorna el motor activo, creándolo en el primer uso"""
+        if TransactionManager._store is None:
+            TransactionManager._store = TransactionManager.crear_store(TransactionManager.motor)
+        return TransactionManager._store
+    
+    @staticmethod
+    def leer_archivo_historial(ruta: str) -> Iterator[dict]:
+        """Lee un historial en formato arreglo JSON o JSON Lines (opcionalmente .gz)"""
+        if ruta.endswith('.gz'):
+            yield from TransactionJournal(ruta).leer()
+            return
+        
+        with open(ruta, 'r', encoding='utf-8') as f:
+            inicio = f.read(1)
+            while inicio.isspace():
+                inicio = f.read(1)
+            f.seek(0)
+            
+            if inicio == '[':
+                yield from TransactionManager.leer_arreglo_json(f)
+                return
+        
+        yield from TransactionJournal(ruta).leer()
+    
+    @staticmethod
+    def leer_arreglo_json(f, bloque: int = BLOQUE_LECTURA) -> Iterator[dict]:
+        """Elementos de un arreglo JSON de uno en uno, sin cargar el arreglo completo.
+        
+        Lee el archivo por bloques y decodifica cada elemento con raw_decode; la memoria
+        queda acotada por el bloque más el elemento más grande.
+        """
+        decodificador = json.JSONDecoder()
+        espacios = re.compile(r'[ \t\n\r]*')
+        buffer = ''
+        pos = 0
+        
+        def siguiente() -> str:
+            """Próximo carácter que no es espacio, leyendo otro bloque si hace falta"""
+            nonlocal buffer, pos
+            while True:
+                pos = espacios.match(buffer, pos).end()
+                if pos < len(buffer):
+                    return buffer[pos]
+                buffer = f.read(bloque)
+                pos = 0
+                if not buffer:
+                    return ''
+        
+        if siguiente() != '[':
+            raise json.JSONDecodeError("Se esperaba '['", buffer, pos)
+        pos += 1
+        if siguiente() == ']':
+            return
+        
+        while True:
+            siguiente()
+            while True:
+                try:
+                    elemento, pos = decodificador.raw_decode(buffer, pos)
+                    break
+                except json.JSONDecodeError:
+                    # Elemento incompleto: se descarta lo consumido y se agrega otro bloque
+                    mas = f.read(bloque)
+                    if not mas or len(buffer) - pos > TransactionManager.MAX_ELEMENTO:
+                        raise
+                    buffer = buffer[pos:] + mas
+                    pos = 0
+            yield elemento
+            
+            caracter = siguiente()
+            if caracter == ']':
+                return
+            if caracter != ',':
+                raise json.JSONDecodeError("Se esperaba ',' o ']'", buffer, pos)
+            pos += 1
+    
+    @staticmethod
+    def migrar(motor: str, origenes: List[str]) -> int:
+        """Importa archivos de historial existentes al motor indicado
+        
+        Sin orígenes, el motor SQLite importa el historial del motor JSON.
+        """
+        store = TransactionManager.crear_store(motor)
+        total = 0
+        try:
+            if not origenes and motor == 'sqlite':
+                origen = TransactionManager.crear_store('json')
+                try:
+                    total = store.importar(origen.iterar())
+                finally:
+                    origen.cerrar()
+                Logger.success(f"Historial JSON importado a sqlite ({total} transacciones)")
+            for origen in origenes:
+                cantidad = store.importar(TransactionManager.leer_archivo_historial(origen))
+                Logger.success(f"Historial importado a {motor}: {origen} ({cantidad} transacciones)")
+                total += cantidad
+        finally:
+            store.cerrar()
+        return total
+    
+    @staticmethod
+    @Metrics.medir
+    def registrar_venta(usuario: str, pedido: dict, total_centavos: int, moneda: str,
+                        precios_centavos: Optional[dict] = None) -> dict:
+        """Registra una venta en el historial con importes en centavos. Retorna la transacción"""
+        transaction = {
+            "id": TransactionManager._generar_id(),
+            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "usuario": usuario,
+            "pedido": pedido,
+            "total_centavos": total_centavos,
+            "moneda": moneda
+        }
+        if precios_centavos:
+            transaction["precios_centavos"] = precios_centavos
+        
+        TransactionManager._obtener_store().agregar(transaction)
+        
+        Logger.success(f"Venta registrada: ID {transaction['id']} - Total: {Money.formatear(total_centavos, moneda)}")
+        return transaction
+    
+    @staticmethod
+    @Metrics.medir
+    def registrar_lote(ventas: List[dict]) -> List[dict]:
+        """Registra varias ventas (usuario, pedido, total_centavos, moneda, precios_centavos y
+        fecha opcional) con una escritura agrupada. Retorna las transacciones"""
+        ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        transactions = []
+        for id_transaccion, venta in zip(IdGenerator.generar_lote(len(ventas)), ventas):
+            transaction = {
+                "id": id_transaccion,
+                "fecha": venta.get('fecha') or ahora,
+                "usuario": venta['usuario'],
+                "pedido": venta['pedido'],
+                "total_centavos": venta['total_centavos'],
+                "moneda": venta['moneda']
+            }
+            if venta.get('precios_centavos'):
+                transaction["precios_centavos"] = venta['precios_centavos']
+            transactions.append(transaction)
+        
+        if transactions:
+            TransactionManager._obtener_store().agregar_lote(transactions)
+            Logger.info(f"Lote de {len(transactions)} ventas registrado")
+        return transactions
+    
+    @staticmethod
+    @contextmanager
+    def importacion():
+        """Agrupa los lotes de registrar_lote de una importación (compacta los meses al final)"""
+        with TransactionManager._obtener_store().importacion():
+            yield
+    
+    @staticmethod
+    def cerrar():
+        """Sincroniza y cierra el almacenamiento de transacciones"""
+        if TransactionManager._store is not None:
+            TransactionManager._store.cerrar()
+            TransactionManager._store = None
+    
+    @staticmethod
+    def _generar_id() -> str:
+        """Genera ID único y ordenable para la transacción"""
+        return IdGenerator.generar()
+    
+    @staticmethod
+    @Metrics.medir
+    def _cargar_transacciones() -> TransactionTable:
+        """Carga el historial de transacciones en columnas compactas"""
+        return TransactionTable().cargar(TransactionManager._obtener_store().iterar())
     
     @staticmethod
-    def log(message: str, level: str = "INFO"):
-        """Registra eventos en archivo de log"""
-        log_file = "business.log"
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] [{level}] {message}\n"
-        
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(log_entry)
+    @Metrics.medir
+    def obtener_ultimas(limite: int = 10, desplazamiento: int = 0) -> list:
+        """Retorna transacciones de la más reciente a la más antigua, paginadas"""
+        return TransactionManager._obtener_store().ultimas(limite, desplazamiento)
     
     @staticmethod
-    def info(message: str):
-        Logger.log(message, "INFO")
+    @Metrics.medir
+    def buscar(id_transaccion: str) -> Optional[dict]:
+        """Transacción por ID sin recorrer el historial (índice hash en el motor JSON)"""
+        return TransactionManager._obtener_store().buscar(id_transaccion.strip())
     
     @staticmethod
-    def warning(message: str):
-        Logger.log(message, "WARNING")
+    @Metrics.medir
+    def obtener_estadisticas() -> dict:
+        """Calcula estadísticas de ventas"""
+        return TransactionManager._obtener_store().estadisticas()
     
     @staticmethod
-    def error(message: str):
-        Logger.log(message, "ERROR")
+    def obtener_rango(desde: Optional[str] = None, hasta: Optional[str] = None) -> Iterator[dict]:
+        """Itera las transacciones entre dos fechas (inclusive)"""
+        return TransactionManager._obtener_store().rango(desde, hasta)
     
     @staticmethod
-    def success(message: str):
-        Logger.log(message, "SUCCESS")
+    @Metrics.medir
+    def ventas_por_periodo(periodo: str, desde: Optional[str] = None,
+                           hasta: Optional[str] = None, usuario: Optional[str] = None) -> List[dict]:
+        """Ventas agrupadas por hora, día, semana o mes"""
+        return TransactionManager._obtener_store().ventas_por_periodo(periodo, desde, hasta, usuario)
+    
+    @staticmethod
+    @Metrics.medir
+    def ventas_por_usuario(desde: Optional[str] = None, hasta: Optional[str] = None) -> List[dict]:
+        """Ventas agrupadas por cajero"""
+        return TransactionManager._obtener_store().ventas_por_usuario(desde, hasta)
+    
+    @staticmethod
+    @Metrics.medir
+    def analitica(desde: Optional[str] = None, hasta: Optional[str] = None,
+                  usar_numpy: Optional[bool] = None, usuario: Optional[str] = None) -> AnalyticsEngine:
+        """Carga las transacciones del rango (de un cajero, si se indica) en el motor analítico columnar"""
+        transactions = TransactionManager.obtener_rango(desde, hasta)
+        if usuario:
+            transactions = (t for t in transactions if t['usuario'] == usuario)
+        return AnalyticsEngine(usar_numpy).cargar(transactions)
 
 
-class ConfigManager:
-    """Gestor profesional de configuración con backups"""
+class ScreenRenderer:
+    """Capa de presentación: ancho de la terminal, paginación y una sola escritura por pantalla"""
     
-    CONFIG_FILE = 'inventory.json'
-    BACKUP_DIR = 'backups'
+    ANCHO_MIN = 40
+    ANCHO_MAX = 120
     
     @staticmethod
-    def crear_backup():
-        """Crea backup automático de la configuración"""
-        if not os.path.exists(ConfigManager.BACKUP_DIR):
-            os.makedirs(ConfigManager.BACKUP_DIR)
-        
-        if os.path.exists(ConfigManager.CONFIG_FILE):
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = f"{ConfigManager.BACKUP_DIR}/inventory_backup_{timestamp}.json"
-            shutil.copy2(ConfigManager.CONFIG_FILE, backup_file)
-            Logger.info(f"Backup creado: {backup_file}")
-            
-            # Mantener solo los últimos 10 backups
-            ConfigManager._limpiar_backups_antiguos()
+    def ancho() -> int:
+        """Columnas disponibles, acotadas para mantener las tablas legibles"""
+        columnas = shutil.get_terminal_size((60, 24)).columns
+        return max(ScreenRenderer.ANCHO_MIN, min(columnas, ScreenRenderer.ANCHO_MAX))
     
     @staticmethod
-    def _limpiar_backups_antiguos():
-        """Mantiene solo los últimos 10 backups"""
-        if not os.path.exists(ConfigManager.BACKUP_DIR):
-            return
-        
-        backups = sorted([f for f in os.listdir(ConfigManager.BACKUP_DIR) 
-                         if f.startswith('inventory_backup_')])
-        
-        while len(backups) > 10:
-            oldest = backups.pop(0)
-            os.remove(os.path.join(ConfigManager.BACKUP_DIR, oldest))
-            Logger.info(f"Backup antiguo eliminado: {oldest}")
+    def alto() -> int:
+        return max(10, shutil.get_terminal_size((60, 24)).lines)
     
     @staticmethod
-    def cargar_config() -> dict:
-        """Carga configuración con validación"""
-        if not os.path.exists(ConfigManager.CONFIG_FILE):
-            Logger.error(f"Archivo de configuración '{ConfigManager.CONFIG_FILE}' no encontrado")
-            print(f"{Color.FAIL}Error: Archivo de configuración no encontrado.{Color.ENDC}")
-            print(f"{Color.WARNING}Por favor crea un archivo inventory.json{Color.ENDC}")
-            exit(1)
-        
-        try:
-            with open(ConfigManager.CONFIG_FILE, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            # Validar estructura de configuración
-            ConfigManager._validar_config(config)
-            Logger.info("Configuración cargada exitosamente")
-            return config
-            
-        except json.JSONDecodeError as e:
-            Logger.error(f"Error de formato JSON: {e}")
-            print(f"{Color.FAIL}Error: Formato JSON inválido en inventory.json{Color.ENDC}")
-            exit(1)
-        except Exception as e:
-            Logger.error(f"Error al cargar configuración: {e}")
-            print(f"{Color.FAIL}Error al cargar configuración: {e}{Color.ENDC}")
-            exit(1)
+    def separador(caracter: str = '─', color: str = Color.OKCYAN) -> str:
+        return f"{color}{caracter * ScreenRenderer.ancho()}{Color.ENDC}"
     
     @staticmethod
-    def _validar_config(config: dict):
-        """Valida que la configuración tenga la estructura correcta"""
-        required_keys = ['business_name', 'currency', 'users', 'menu']
-        
-        for key in required_keys:
-            if key not in config:
-                raise ValueError(f"Falta la clave requerida: {key}")
-        
-        if 'admin' not in config['users'] or 'regular' not in config['users']:
-            raise ValueError("La configuración de usuarios debe tener 'admin' y 'regular'")
+    def encabezado(titulo: str, color: str = Color.HEADER, color_titulo: Optional[str] = None) -> List[str]:
+        """Título centrado entre dos líneas dobles"""
+        ancho = ScreenRenderer.ancho()
+        return [
+            '',
+            f"{Color.BOLD}{color}{'=' * ancho}{Color.ENDC}",
+            f"{Color.BOLD}{color_titulo or color}{titulo.center(ancho).rstrip()}{Color.ENDC}",
+            f"{Color.BOLD}{color}{'=' * ancho}{Color.ENDC}",
+            ''
+        ]
     
     @staticmethod
-    def guardar_config(config: dict):
-        """Guarda configuración con backup automático"""
-        try:
-            # Crear backup antes de guardar
-            ConfigManager.crear_backup()
-            
-            with open(ConfigManager.CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
-            
-            Logger.info("Configuración guardada exitosamente")
+    def titulo(texto: str, color: str = Color.OKBLUE, color_titulo: Optional[str] = None) -> List[str]:
+        """Título de panel entre dos líneas simples"""
+        linea = f"{Color.BOLD}{color}{'─' * ScreenRenderer.ancho()}{Color.ENDC}"
+        titulo = color if color_titulo is None else color_titulo
+        return ['', linea, f"{Color.BOLD}{titulo}  {texto}{Color.ENDC}", linea, '']
+    
+    @staticmethod
+    def escribir(lineas: List[str]):
+        """Escribe la pantalla completa en una sola operación"""
+        sys.stdout.write('\n'.join(lineas) + '\n')
+        sys.stdout.flush()
+    
+    @staticmethod
+    def paginar(lineas: List[str], encabezado: Optional[List[str]] = None):
+        """Muestra líneas preformateadas por páginas con siguiente, anterior y salto a página.
+        
+        Si caben en una pantalla o la salida no es interactiva se escriben de una vez.
+        """
+        encabezado = encabezado or []
+        por_pagina = max(5, ScreenRenderer.alto() - len(encabezado) - 3)
+        if len(lineas) <= por_pagina or not sys.stdin.isatty():
+            ScreenRenderer.escribir(encabezado + lineas)
+            return
+        
+        paginas = (len(lineas) + por_pagina - 1) // por_pagina
+        pagina = 0
+        while True:
+            inicio = pagina * por_pagina
+            pie = (f"{Color.OKCYAN}Página {pagina + 1}/{paginas}{Color.ENDC}  "
+                   f"[S] Siguiente  [A] Anterior  [número] Ir a página  [Enter] Salir")
+            ScreenRenderer.escribir(encabezado + lineas[inicio:inicio + por_pagina] + [pie])
             
-        except Exception as e:
-            Logger.error(f"Error al guardar configuración: {e}")
-            print(f"{Color.FAIL}Error al guardar configuración: {e}{Color.ENDC}")
+            opcion = input(f"{Color.BOLD}> {Color.ENDC}").strip().lower()
+            if opcion == 's' and pagina < paginas - 1:
+                pagina += 1
+            elif opcion == 'a' and pagina > 0:
+                pagina -= 1
+            elif opcion.isdigit() and 1 <= int(opcion) <= paginas:
+                pagina = int(opcion) - 1
+            elif opcion in ('s', 'a') or opcion.isdigit():
+                continue
+            else:
+                return
 
 
-class TransactionManager:
-    """Gestor de transacciones y historial"""
+class CatalogIndex:
+    """Índice del catálogo: número, código SKU, prefijo y búsqueda tolerante a errores"""
     
-    TRANSACTIONS_FILE = 'transactions.json'
+    MAX_RESULTADOS = 10
+    
+    def __init__(self, menu: Dict[str, float], skus: Optional[Dict[str, str]] = None):
+        # Numeración igual a la de mostrar_menu
+        self.productos = list(menu)
+        self.por_nombre = {CatalogIndex.normalizar(p): p for p in self.productos}
+        self.por_sku = {codigo.strip().casefold(): producto for producto, codigo in (skus or {}).items()
+                        if producto in menu}
+        self.sku_de = {producto: codigo for producto, codigo in (skus or {}).items() if producto in menu}
+        
+        # Claves ordenadas (nombre completo y cada palabra) para búsqueda por prefijo con bisect
+        claves = []
+        for idx, producto in enumerate(self.productos):
+            nombre = CatalogIndex.normalizar(producto)
+            claves.append((nombre, idx))
+            palabras = nombre.split()
+            for palabra in palabras[1:]:
+                claves.append((palabra, idx))
+        claves.sort()
+        self._claves = [c for c, _ in claves]
+        self._indices = [i for _, i in claves]
+        self._variantes: Optional[Dict[str, List[str]]] = None
+        self._palabras: Dict[str, List[int]] = {}
     
     @staticmethod
-    def registrar_venta(usuario: str, pedido: dict, total: float, moneda: str):
-        """Registra una venta en el historial"""
-        transaction = {
-            "id": TransactionManager._generar_id(),
-            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "usuario": usuario,
-            "pedido": pedido,
-            "total": total,
-            "moneda": moneda
-        }
+    def normalizar(texto: str) -> str:
+        """Minúsculas sin acentos ni espacios repetidos"""
+        texto = unicodedata.normalize('NFKD', texto.casefold())
+        return ' '.join(''.join(c for c in texto if not unicodedata.combining(c)).split())
+    
+    def buscar(self, consulta: str) -> List[str]:
+        """Resuelve una consulta; una sola coincidencia es una selección inequívoca"""
+        consulta = consulta.strip()
+        if not consulta:
+            return []
         
-        transactions = TransactionManager._cargar_transacciones()
-        transactions.append(transaction)
+        if consulta.isdigit():
+            numero = int(consulta)
+            if 1 <= numero <= len(self.productos):
+                return [self.productos[numero - 1]]
         
-        with open(TransactionManager.TRANSACTIONS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(transactions, f, indent=2, ensure_ascii=False)
+        producto = self.por_sku.get(consulta.casefold())
+        if producto is not None:
+            return [producto]
         
-        Logger.success(f"Venta registrada: ID {transaction['id']} - Total: {moneda}{total}")
-    
-    @staticmethod
-    def _generar_id() -> str:
-        """Genera ID único para la transacción"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
-        return hashlib.md5(timestamp.encode()).hexdigest()[:8].upper()
+        normalizada = CatalogIndex.normalizar(consulta)
+        producto = self.por_nombre.get(normalizada)
+        if producto is not None:
+            return [producto]
+        
+        return self.por_prefijo(normalizada) or self.aproximados(normalizada)
     
-    @staticmethod
-    def _cargar_transacciones() -> list:
-        """Carga historial de transacciones"""
-        if os.path.exists(TransactionManager.TRANSACTIONS_FILE):
-            with open(TransactionManager.TRANSACTIONS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
+    def por_prefijo(self, prefijo: str) -> List[str]:
+        """Productos cuyo nombre o alguna palabra empieza con el prefijo, en orden del menú"""
+        prefijo = CatalogIndex.normalizar(prefijo)
+        inicio = bisect.bisect_left(self._claves, prefijo)
+        fin = bisect.bisect_left(self._claves, prefijo + '\U0010ffff', inicio)
+        indices = sorted(set(self._indices[inicio:fin]))
+        return [self.productos[i] for i in indices[:CatalogIndex.MAX_RESULTADOS]]
     
-    @staticmethod
-    def obtener_estadisticas() -> dict:
-        """Calcula estadísticas de ventas"""
-        transactions = TransactionManager._cargar_transacciones()
-        
-        if not transactions:
-            return {
-                "total_ventas": 0,
-                "cantidad_transacciones": 0,
-                "promedio_venta": 0,
-                "productos_mas_vendidos": {}
-            }
+    def aproximados(self, consulta: str) -> List[str]:
+        """Productos con alguna palabra a un error de tipeo de la consulta (borrados simétricos)"""
+        if self._variantes is None:
+            self._construir_variantes()
         
-        total_ventas = sum(t['total'] for t in transactions)
-        cantidad_transacciones = len(transactions)
-        promedio_venta = total_ventas / cantidad_transacciones
+        candidatos: Dict[int, float] = {}
+        for termino in CatalogIndex.normalizar(consulta).split():
+            for variante in CatalogIndex._borrados(termino):
+                for palabra in self._variantes.get(variante, ()):
+                    similitud = difflib.SequenceMatcher(None, termino, palabra).ratio()
+                    for idx in self._palabras[palabra]:
+                        candidatos[idx] = candidatos.get(idx, 0) + similitud
         
-        # Productos más vendidos
-        productos_vendidos = {}
-        for t in transactions:
-            for producto, cantidad in t['pedido'].items():
-                productos_vendidos[producto] = productos_vendidos.get(producto, 0) + cantidad
-        
-        return {
-            "total_ventas": total_ventas,
-            "cantidad_transacciones": cantidad_transacciones,
-            "promedio_venta": promedio_venta,
-            "productos_mas_vendidos": productos_vendidos
-        }
+        orden = sorted(candidatos, key=lambda i: (-candidatos[i], i))
+        return [self.productos[i] for i in orden[:CatalogIndex.MAX_RESULTADOS]]
+    
+    @staticmethod
+    def _borrados(palabra: str) -> set:
+        """La palabra y sus variantes con una letra menos"""
+        variantes = {palabra}
+        if len(palabra) > 3:
+            variantes.update(palabra[:i] + palabra[i + 1:] for i in range(len(palabra)))
+        return variantes
+    
+    def _construir_variantes(self):
+        """Índice de variantes por borrado; se construye en la primera búsqueda aproximada"""
+        self._variantes = {}
+        for idx, producto in enumerate(self.productos):
+            for palabra in CatalogIndex.normalizar(producto).split():
+                indices = self._palabras.setdefault(palabra, [])
+                if not indices or indices[-1] != idx:
+                    indices.append(idx)
+        for palabra in self._palabras:
+            for variante in CatalogIndex._borrados(palabra):
+                self._variantes.setdefault(variante, []).append(palabra)
 
 
 class MenuManager:
@@ -223,35 +3514,68 @@ class MenuManager:
     def __init__(self, config: dict):
         self.config = config
         self.menu = config.get('menu', {})
+        self.skus = config.get('skus', {})
         self.business_name = config.get('business_name', 'Negocio')
         self.currency = config.get('currency', '$')
+        self._catalogo: Optional[CatalogIndex] = None
+        self._vista_menu: Optional[Tuple[int, List[str]]] = None
+    
+    @property
+    def catalogo(self) -> CatalogIndex:
+        """Índice de búsqueda; se reconstruye solo después de cambiar los productos del menú"""
+        if self._catalogo is None:
+            self._catalogo = CatalogIndex(self.menu, self.skus)
+        return self._catalogo
+    
+    def invalidar_catalogo(self):
+        """Descarta el índice y la vista tras agregar, eliminar o restaurar productos"""
+        self._catalogo = None
+        self._vista_menu = None
+    
+    def resolver_producto(self, consulta: str) -> List[str]:
+        """Productos que corresponden a un número, código, nombre, prefijo o nombre aproximado"""
+        return self.catalogo.buscar(consulta)
     
     def mostrar_menu(self, mostrar_header: bool = True):
-        """Muestra el menú con formato profesional"""
-        if mostrar_header:
-            self._mostrar_header()
-        
-        print(f"\n{Color.BOLD}{Color.OKCYAN}{'='*60}{Color.ENDC}")
-        print(f"{Color.BOLD}{Color.OKGREEN}MENÚ - {self.business_name}{Color.ENDC}".center(70))
-        print(f"{Color.BOLD}{Color.OKCYAN}{'='*60}{Color.ENDC}\n")
+        """Muestra el menú con formato profesional, paginado si no cabe en la pantalla"""
+        encabezado = self._lineas_header() if mostrar_header else []
+        encabezado += ScreenRenderer.encabezado(f"MENÚ - {self.business_name}", Color.OKCYAN, Color.OKGREEN)
         
         if not self.menu:
-            print(f"{Color.WARNING}No hay productos disponibles en el menú{Color.ENDC}\n")
+            ScreenRenderer.escribir(encabezado + [f"{Color.WARNING}No hay productos disponibles en el menú{Color.ENDC}", ''])
             return
         
-        print(f"{Color.BOLD}{'Producto':<40} {'Precio':>15}{Color.ENDC}")
-        print(f"{Color.OKCYAN}{'-'*60}{Color.ENDC}")
+        ancho = ScreenRenderer.ancho()
+        encabezado += [
+            f"{Color.BOLD}{'Producto':<{ancho - 16}} {'Precio':>15}{Color.ENDC}",
+            f"{Color.OKCYAN}{'-' * ancho}{Color.ENDC}"
+        ]
+        ScreenRenderer.paginar(self._lineas_menu(ancho) + [ScreenRenderer.separador('=')], encabezado)
+    
+    def _lineas_menu(self, ancho: int) -> List[str]:
+        """Líneas del menú ya formateadas; se regeneran al cambiar productos, precios o ancho"""
+        if self._vista_menu is not None and self._vista_menu[0] == ancho:
+            return self._vista_menu[1]
         
+        lineas = []
+        digitos = len(str(len(self.menu)))
+        columna = ancho - digitos - 15
+        precio_ancho = len(self.currency) + 10
         for idx, (item, precio) in enumerate(self.menu.items(), 1):
-            print(f"{Color.OKBLUE}{idx}. {item:<37}{Color.ENDC} {Color.OKGREEN}{self.currency}{precio:>10.2f}{Color.ENDC}")
+            etiqueta = f"{item} [{self.skus[item]}]" if item in self.skus else item
+            lineas.append(f"{Color.OKBLUE}{idx:>{digitos}}. {etiqueta[:columna]:<{columna}}{Color.ENDC} "
+                          f"{Color.OKGREEN}{Money.formatear(Money.a_centavos(precio), self.currency):>{precio_ancho}}"
+                          f"{Color.ENDC}")
         
-        print(f"{Color.OKCYAN}{'='*60}{Color.ENDC}\n")
+        self._vista_menu = (ancho, lineas)
+        return lineas
+    
+    def _lineas_header(self) -> List[str]:
+        return ScreenRenderer.encabezado("SISTEMA DE GESTIÓN DE NEGOCIOS v2.0")
     
     def _mostrar_header(self):
         """Muestra header del sistema"""
-        print(f"\n{Color.BOLD}{Color.HEADER}{'='*60}{Color.ENDC}")
-        print(f"{Color.BOLD}{Color.HEADER}  SISTEMA DE GESTIÓN DE NEGOCIOS v2.0{Color.ENDC}".center(70))
-        print(f"{Color.BOLD}{Color.HEADER}{'='*60}{Color.ENDC}\n")
+        ScreenRenderer.escribir(self._lineas_header())
     
     def agregar_producto(self, nombre: str, precio: float) -> bool:
         """Agrega un nuevo producto al menú"""
@@ -260,11 +3584,15 @@ class MenuManager:
                 print(f"{Color.WARNING}El producto '{nombre}' ya existe en el menú{Color.ENDC}")
                 return False
             
+            precio = Money.normalizar(precio)
             self.menu[nombre] = precio
             self.config['menu'] = self.menu
-            ConfigManager.guardar_config(self.config)
+            self.invalidar_catalogo()
+            if ConfigManager.guardar_config(self.config):
+                self.invalidar_catalogo()
             
-            print(f"{Color.OKGREEN}Producto agregado exitosamente: {nombre} - {self.currency}{precio}{Color.ENDC}")
+            print(f"{Color.OKGREEN}Producto agregado exitosamente: {nombre} - "
+                  f"{Money.formatear(Money.a_centavos(precio), self.currency)}{Color.ENDC}")
             Logger.info(f"Producto agregado: {nombre} - Precio: {precio}")
             return True
             
@@ -283,7 +3611,9 @@ class MenuManager:
             precio = self.menu[nombre]
             del self.menu[nombre]
             self.config['menu'] = self.menu
-            ConfigManager.guardar_config(self.config)
+            self.invalidar_catalogo()
+            if ConfigManager.guardar_config(self.config):
+                self.invalidar_catalogo()
             
             print(f"{Color.OKGREEN}Producto eliminado: {nombre}{Color.ENDC}")
             Logger.info(f"Producto eliminado: {nombre} - Precio anterior: {precio}")
@@ -302,12 +3632,16 @@ class MenuManager:
                 return False
             
             precio_anterior = self.menu[nombre]
+            nuevo_precio = Money.normalizar(nuevo_precio)
             self.menu[nombre] = nuevo_precio
             self.config['menu'] = self.menu
-            ConfigManager.guardar_config(self.config)
+            self._vista_menu = None
+            if ConfigManager.guardar_config(self.config):
+                self.invalidar_catalogo()
             
             print(f"{Color.OKGREEN}Precio modificado: {nombre}{Color.ENDC}")
-            print(f"  Anterior: {self.currency}{precio_anterior} → Nuevo: {self.currency}{nuevo_precio}")
+            print(f"  Anterior: {Money.formatear(Money.a_centavos(precio_anterior), self.currency)} → "
+                  f"Nuevo: {Money.formatear(Money.a_centavos(nuevo_precio), self.currency)}")
             Logger.info(f"Precio modificado: {nombre} - {precio_anterior} → {nuevo_precio}")
             return True
             
@@ -316,10 +3650,79 @@ class MenuManager:
             print(f"{Color.FAIL}Error al modificar precio: {e}{Color.ENDC}")
             return False
     
+    def importar_precios_csv(self, ruta: str, agregar_nuevos: bool = False) -> Tuple[int, int, List[str]]:
+        """Aplica precios desde un CSV (producto,precio) en una sola sesión de edición.
+        
+        Retorna (modificados, agregados, rechazados).
+        """
+        modificados = agregados = 0
+        rechazados = []
+        with open(ruta, 'r', encoding='utf-8', newline='') as f:
+            filas = list(csv.reader(f))
+        
+        with ConfigManager.sesion_edicion(self.config) as sesion:
+            for numero, fila in enumerate(filas, 1):
+                if not fila or not ''.join(fila).strip():
+                    continue
+                if len(fila) < 2:
+                    rechazados.append(f"línea {numero}: se esperaban producto y precio")
+                    continue
+                
+                nombre = fila[0].strip()
+                try:
+                    precio = Money.a_unidades(Money.a_centavos(fila[1]))
+                except ValueError:
+                    # Encabezado opcional
+                    if numero != 1:
+                        rechazados.append(f"línea {numero}: precio inválido '{fila[1].strip()}'")
+                    continue
+                
+                if not nombre or precio <= 0:
+                    rechazados.append(f"línea {numero}: producto vacío o precio no positivo")
+                elif nombre in self.menu:
+                    if self.menu[nombre] != precio:
+                        self.menu[nombre] = precio
+                        modificados += 1
+                elif agregar_nuevos:
+                    self.menu[nombre] = precio
+                    agregados += 1
+                else:
+                    rechazados.append(f"línea {numero}: el producto '{nombre}' no existe en el menú")
+            
+            if agregados:
+                self.invalidar_catalogo()
+            if modificados or agregados:
+                self._vista_menu = None
+                self.config['menu'] = self.menu
+                ConfigManager.guardar_config(self.config)
+        if sesion.get('fusionada'):
+            self.invalidar_catalogo()
+        
+        Logger.info(f"Precios importados de {ruta}: {modificados} modificados, "
+                    f"{agregados} agregados, {len(rechazados)} rechazados")
+        return modificados, agregados, rechazados
+    
+    @staticmethod
+    def mostrar_importacion(modificados: int, agregados: int, rechazados: List[str]):
+        """Muestra el resultado de una importación de precios"""
+        print(f"\n{Color.OKGREEN}Precios modificados: {modificados}{Color.ENDC}")
+        print(f"{Color.OKGREEN}Productos agregados: {agregados}{Color.ENDC}")
+        if rechazados:
+            print(f"{Color.WARNING}Filas rechazadas: {len(rechazados)}{Color.ENDC}")
+            for motivo in rechazados:
+                print(f"  {Color.WARNING}•{Color.ENDC} {motivo}")
+    
+    def precio_centavos(self, item: str) -> int:
+        """Precio unitario de un producto en centavos"""
+        return Money.a_centavos(self.menu.get(item, 0))
+    
+    def calcular_total_centavos(self, pedido: dict) -> int:
+        """Total exacto de un pedido: suma entera de precio en centavos por cantidad"""
+        return sum(self.precio_centavos(item) * cantidad for item, cantidad in pedido.items())
+    
     def calcular_total(self, pedido: dict) -> float:
         """Calcula el total de un pedido"""
-        total = sum(self.menu.get(item, 0) * cantidad for item, cantidad in pedido.items())
-        return round(total, 2)
+        return Money.a_unidades(self.calcular_total_centavos(pedido))
     
     def validar_producto(self, nombre: str) -> bool:
         """Valida que un producto exista en el menú"""
@@ -333,6 +3736,7 @@ class AuthManager:
         self.admins = config.get('users', {}).get('admin', {})
         self.users = config.get('users', {}).get('regular', {})
     
+    @Metrics.medir
     def autenticar(self, username: str, password: str, rol: str) -> bool:
         """Autentica un usuario"""
         if rol == 'admin':
@@ -351,24 +3755,162 @@ class AuthManager:
 class ReportManager:
     """Gestor de reportes y estadísticas"""
     
+    PERIODOS = {'hora': 'Hora', 'dia': 'Día', 'semana': 'Semana', 'mes': 'Mes'}
+    
+    @staticmethod
+    def normalizar_fecha(texto: Optional[str], fin: bool = False) -> Optional[str]:
+        """Convierte 'YYYY-MM-DD' o 'YYYY-MM-DD HH:MM[:SS]' al formato de las transacciones"""
+        if not texto:
+            return None
+        
+        texto = texto.strip()
+        for formato in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+            try:
+                fecha = datetime.strptime(texto, formato)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Fecha inválida: '{texto}' (use YYYY-MM-DD o YYYY-MM-DD HH:MM:SS)")
+        
+        # Una fecha sin hora como límite superior incluye el día completo
+        if fin and formato == "%Y-%m-%d":
+            return fecha.strftime("%Y-%m-%d 23:59:59")
+        if fin and formato == "%Y-%m-%d %H:%M":
+            return fecha.strftime("%Y-%m-%d %H:%M:59")
+        return fecha.strftime("%Y-%m-%d %H:%M:%S")
+    
+    @staticmethod
+    def _describir_rango(desde: Optional[str], hasta: Optional[str]) -> str:
+        """Texto del rango de fechas de un reporte"""
+        return f"{desde or 'inicio'} → {hasta or 'hoy'}"
+    
+    @staticmethod
+    def _tabla(columna: str, filas: List[Tuple[str, int, int]], total: Optional[Tuple[int, int]] = None) -> List[str]:
+        """Tabla de etiqueta, transacciones y ventas (en centavos) ajustada al ancho de la terminal"""
+        ancho = ScreenRenderer.ancho()
+        etiqueta = ancho - 38
+        lineas = [
+            f"{Color.BOLD}{columna:<{etiqueta + 2}} {'Transacciones':>15} {'Ventas':>20}{Color.ENDC}",
+            ScreenRenderer.separador()
+        ]
+        for nombre, cantidad, ventas in filas:
+            lineas.append(f"  {nombre[:etiqueta]:<{etiqueta}} {cantidad:>15} {Color.OKGREEN}{Money.formatear(ventas):>20}{Color.ENDC}")
+        if total is not None:
+            lineas.append(ScreenRenderer.separador())
+            lineas.append(f"{Color.BOLD}  {'TOTAL':<{etiqueta}} {total[0]:>15} {Color.OKGREEN}{Money.formatear(total[1]):>20}{Color.ENDC}")
+        lineas.append('')
+        return lineas
+    
+    @staticmethod
+    @Metrics.medir
+    def generar_reporte_periodo(periodo: str, desde: Optional[str] = None,
+                                hasta: Optional[str] = None, usuario: Optional[str] = None):
+        """Reporte de ventas agrupadas por hora, día, semana o mes"""
+        filas = TransactionManager.ventas_por_periodo(periodo, desde, hasta, usuario)
+        
+        encabezado = ScreenRenderer.encabezado(f"VENTAS POR {ReportManager.PERIODOS[periodo].upper()}")
+        encabezado.append(f"  Rango: {Color.OKCYAN}{ReportManager._describir_rango(desde, hasta)}{Color.ENDC}")
+        if usuario:
+            encabezado.append(f"  Usuario: {Color.OKBLUE}{usuario}{Color.ENDC}")
+        encabezado.append('')
+        
+        ReportManager.mostrar_filas_periodo(periodo, filas, encabezado)
+        Logger.info(f"Reporte de ventas por {periodo} generado")
+    
+    @staticmethod
+    def mostrar_filas_periodo(periodo: str, filas: List[dict], encabezado: Optional[List[str]] = None):
+        """Imprime la tabla de ventas por período"""
+        encabezado = encabezado or []
+        if not filas:
+            ScreenRenderer.escribir(encabezado + [f"{Color.WARNING}No hay transacciones en el rango indicado{Color.ENDC}", ''])
+            return
+        
+        total = sum(fila['total_centavos'] for fila in filas)
+        cantidad = sum(fila['transacciones'] for fila in filas)
+        tabla = ReportManager._tabla(
+            ReportManager.PERIODOS[periodo],
+            [(fila['periodo'], fila['transacciones'], fila['total_centavos']) for fila in filas],
+            (cantidad, total)
+        )
+        ScreenRenderer.paginar(tabla[2:], encabezado + tabla[:2])
+    
+    @staticmethod
+    @Metrics.medir
+    def generar_reporte_analitico(motor: AnalyticsEngine, desde: Optional[str] = None,
+                                  hasta: Optional[str] = None, top: int = 10,
+                                  precios_actuales: Optional[dict] = None, usuario: Optional[str] = None):
+        """Reporte analítico: totales, top de productos e ingresos por producto"""
+        stats = motor.estadisticas()
+        ingresos = motor.ingresos_por_producto(precios_actuales)
+        
+        lineas = ScreenRenderer.encabezado("REPORTE ANALÍTICO")
+        lineas += [
+            f"  Rango: {Color.OKCYAN}{ReportManager._describir_rango(desde, hasta)}{Color.ENDC}",
+            f"  Motor: {Color.OKCYAN}{'NumPy' if motor.usar_numpy else 'Python'}{Color.ENDC}",
+        ]
+        if usuario:
+            lineas.append(f"  Cajero: {Color.OKCYAN}{usuario}{Color.ENDC}")
+        lineas += [
+            '',
+            f"  Total de Transacciones: {Color.OKGREEN}{stats['cantidad_transacciones']}{Color.ENDC}",
+            f"  Ventas Totales: {Color.OKGREEN}{Money.formatear(stats['total_centavos'])}{Color.ENDC}",
+            f"  Promedio por Venta: {Color.OKGREEN}{Money.formatear(stats['promedio_centavos'])}{Color.ENDC}"
+        ]
+        
+        top_productos = motor.top_productos(top)
+        if top_productos:
+            columna = ScreenRenderer.ancho() - 34
+            lineas += [
+                '',
+                f"{Color.BOLD}{'Producto':<{columna + 6}} {'Unidades':>10} {'Ingresos':>15}{Color.ENDC}",
+                ScreenRenderer.separador()
+            ]
+            for idx, (producto, unidades) in enumerate(top_productos, 1):
+                lineas.append(f"  {idx:>2}. {producto[:columna]:<{columna}} {unidades:>10} "
+                              f"{Color.OKGREEN}{Money.formatear(Money.a_centavos(ingresos[producto])):>15}{Color.ENDC}")
+        lineas.append('')
+        
+        ScreenRenderer.paginar(lineas)
+        Logger.info("Reporte analítico generado")
+    
+    @staticmethod
+    @Metrics.medir
+    def generar_reporte_usuarios(desde: Optional[str] = None, hasta: Optional[str] = None):
+        """Reporte de ventas por cajero"""
+        filas = TransactionManager.ventas_por_usuario(desde, hasta)
+        
+        encabezado = ScreenRenderer.encabezado("VENTAS POR CAJERO")
+        encabezado += [f"  Rango: {Color.OKCYAN}{ReportManager._describir_rango(desde, hasta)}{Color.ENDC}", '']
+        
+        if not filas:
+            ScreenRenderer.escribir(encabezado + [f"{Color.WARNING}No hay transacciones en el rango indicado{Color.ENDC}", ''])
+            return
+        
+        tabla = ReportManager._tabla(
+            'Usuario', [(fila['usuario'], fila['transacciones'], fila['total_centavos']) for fila in filas]
+        )
+        ScreenRenderer.paginar(tabla[2:], encabezado + tabla[:2])
+        
+        Logger.info("Reporte de ventas por cajero generado")
+    
     @staticmethod
+    @Metrics.medir
     def generar_reporte_ventas():
         """Genera reporte detallado de ventas"""
         stats = TransactionManager.obtener_estadisticas()
         
-        print(f"\n{Color.BOLD}{Color.HEADER}{'='*60}{Color.ENDC}")
-        print(f"{Color.BOLD}{Color.HEADER}  REPORTE DE VENTAS{Color.ENDC}".center(70))
-        print(f"{Color.BOLD}{Color.HEADER}{'='*60}{Color.ENDC}\n")
-        
-        print(f"{Color.BOLD}Estadísticas Generales:{Color.ENDC}")
-        print(f"{Color.OKCYAN}{'─'*60}{Color.ENDC}")
-        print(f"  Total de Transacciones: {Color.OKGREEN}{stats['cantidad_transacciones']}{Color.ENDC}")
-        print(f"  Ventas Totales: {Color.OKGREEN}${stats['total_ventas']:.2f}{Color.ENDC}")
-        print(f"  Promedio por Venta: {Color.OKGREEN}${stats['promedio_venta']:.2f}{Color.ENDC}")
+        lineas = ScreenRenderer.encabezado("REPORTE DE VENTAS")
+        lineas += [
+            f"{Color.BOLD}Estadísticas Generales:{Color.ENDC}",
+            ScreenRenderer.separador(),
+            f"  Total de Transacciones: {Color.OKGREEN}{stats['cantidad_transacciones']}{Color.ENDC}",
+            f"  Ventas Totales: {Color.OKGREEN}{Money.formatear(stats['total_centavos'])}{Color.ENDC}",
+            f"  Promedio por Venta: {Color.OKGREEN}{Money.formatear(stats['promedio_centavos'])}{Color.ENDC}"
+        ]
         
         if stats['productos_mas_vendidos']:
-            print(f"\n{Color.BOLD}Productos Más Vendidos:{Color.ENDC}")
-            print(f"{Color.OKCYAN}{'─'*60}{Color.ENDC}")
+            lineas += ['', f"{Color.BOLD}Productos Más Vendidos:{Color.ENDC}", ScreenRenderer.separador()]
             
             productos_ordenados = sorted(
                 stats['productos_mas_vendidos'].items(),
@@ -376,39 +3918,433 @@ class ReportManager:
                 reverse=True
             )
             
+            columna = ScreenRenderer.ancho() - 20
             for idx, (producto, cantidad) in enumerate(productos_ordenados[:10], 1):
-                print(f"  {idx}. {producto:<40} {Color.OKGREEN}{cantidad} unidades{Color.ENDC}")
+                lineas.append(f"  {idx:>2}. {producto[:columna]:<{columna}} {Color.OKGREEN}{cantidad} unidades{Color.ENDC}")
         
-        print(f"\n{Color.OKCYAN}{'='*60}{Color.ENDC}\n")
+        lineas += ['', ScreenRenderer.separador('='), '']
+        ScreenRenderer.escribir(lineas)
         
         Logger.info("Reporte de ventas generado")
     
     @staticmethod
-    def generar_reporte_transacciones(limite: int = 10):
-        """Muestra las últimas transacciones"""
-        transactions = TransactionManager._cargar_transacciones()
+    @Metrics.medir
+    def generar_reporte_transacciones(limite: int = 10, desplazamiento: int = 0) -> bool:
+        """Muestra las últimas transacciones. Retorna True si hay transacciones más antiguas"""
+        ultimas = TransactionManager.obtener_ultimas(limite + 1, desplazamiento)
+        hay_mas = len(ultimas) > limite
+        ultimas = ultimas[:limite]
+        
+        if not ultimas:
+            if desplazamiento:
+                ScreenRenderer.escribir(['', f"{Color.WARNING}No hay transacciones más antiguas{Color.ENDC}", ''])
+            else:
+                ScreenRenderer.escribir(['', f"{Color.WARNING}No hay transacciones registradas{Color.ENDC}", ''])
+            return False
+        
+        lineas = ScreenRenderer.encabezado("ÚLTIMAS TRANSACCIONES")
+        separador = ScreenRenderer.separador()
+        for trans in ultimas:
+            lineas += ReportManager._lineas_transaccion(trans) + [separador]
+        
+        pagina = desplazamiento // limite + 1
+        lineas += [f"  Página {pagina} · mostrando {desplazamiento + 1}-{desplazamiento + len(ultimas)}", '']
+        ScreenRenderer.escribir(lineas)
+        Logger.info("Reporte de transacciones generado")
+        return hay_mas
+    
+    @staticmethod
+    def _lineas_transaccion(trans: dict) -> List[str]:
+        return [
+            f"{Color.BOLD}ID: {trans['id']}{Color.ENDC}",
+            f"  Fecha: {Color.OKCYAN}{trans['fecha']}{Color.ENDC}",
+            f"  Usuario: {Color.OKBLUE}{trans['usuario']}{Color.ENDC}",
+            f"  Total: {Color.OKGREEN}{Money.formatear(Money.total_centavos(trans), trans['moneda'])}{Color.ENDC}",
+            f"  Productos: {', '.join([f'{k} ({v})' for k, v in trans['pedido'].items()])}"
+        ]
+    
+    @staticmethod
+    @Metrics.medir
+    def mostrar_transaccion(id_transaccion: str) -> bool:
+        """Muestra una transacción por su ID. Retorna False si no existe"""
+        trans = TransactionManager.buscar(id_transaccion)
+        if trans is None:
+            ScreenRenderer.escribir([f"{Color.FAIL}Transacción no encontrada: {id_transaccion}{Color.ENDC}"])
+            return False
+        
+        lineas = ScreenRenderer.encabezado("TRANSACCIÓN") + ReportManager._lineas_transaccion(trans)
+        precios = Money.precios_centavos(trans)
+        if precios:
+            lineas.append("  Precios: " + ', '.join(f"{k} {Money.formatear(v, trans['moneda'])}"
+                                                     for k, v in precios.items()))
+        ScreenRenderer.escribir(lineas + [''])
+        Logger.info(f"Transacción consultada: {id_transaccion}")
+        return True
+    
+    @staticmethod
+    @Metrics.medir
+    def generar_reporte_cocina():
+        """Comandas pendientes de envío a cocina y latencias por etapa"""
+        pendientes = KitchenDispatcher.pendientes()
+        lineas = ScreenRenderer.encabezado("PEDIDOS EN COCINA")
+        
+        if pendientes:
+            ahora = time.time()
+            columna = max(10, ScreenRenderer.ancho() - 54)
+            lineas += [
+                f"{Color.BOLD}{'ID':<26} {'Estado':<10} {'Intentos':>8} {'Espera':>7}  {'Productos'}{Color.ENDC}",
+                ScreenRenderer.separador()
+            ]
+            for ticket in pendientes:
+                color = Color.FAIL if ticket['estado'] == 'error' else Color.WARNING
+                productos = ', '.join(f"{k} ({v})" for k, v in ticket['pedido'].items())
+                lineas.append(f"{ticket['id']:<26} {color}{ticket['estado']:<10}{Color.ENDC} "
+                              f"{ticket['intentos']:>8} {ahora - ticket['encolado']:>6.0f}s  {productos[:columna]}")
+        else:
+            lineas.append(f"{Color.OKGREEN}No hay pedidos pendientes{Color.ENDC}")
+        
+        latencias = KitchenDispatcher.latencias()
+        if latencias:
+            lineas += [
+                '',
+                f"{Color.BOLD}{'Etapa':<20} {'Muestras':>9} {'Promedio':>11} {'p95':>11} {'Máximo':>11}{Color.ENDC}",
+                ScreenRenderer.separador()
+            ]
+            for etapa, datos in sorted(latencias.items()):
+                lineas.append(f"{etapa:<20} {datos['muestras']:>9} {datos['promedio_ms']:>9.2f}ms "
+                              f"{datos['p95_ms']:>9.2f}ms {datos['max_ms']:>9.2f}ms")
+        lineas.append('')
+        
+        ScreenRenderer.paginar(lineas)
+    
+    @staticmethod
+    def transacciones_por_pagina() -> int:
+        """Transacciones que caben en la pantalla (6 líneas cada una)"""
+        return max(1, (ScreenRenderer.alto() - 9) // 6)
+
+
+class KitchenSink:
+    """Destino de las comandas de cocina"""
+    
+    def enviar(self, ticket: dict):
+        raise NotImplementedError
+    
+    @staticmethod
+    def formatear(ticket: dict, ancho: int = 32) -> str:
+        """Comanda en texto de ancho fijo"""
+        lineas = ['=' * ancho, "PEDIDO".center(ancho), ticket['id'].center(ancho), ticket['fecha'].center(ancho), '-' * ancho]
+        for producto, cantidad in ticket['pedido'].items():
+            lineas.append(f"{cantidad:>3} x {producto}"[:ancho])
+        lineas += [f"Cajero: {ticket['usuario']}"[:ancho], '=' * ancho, '']
+        return '\n'.join(lineas) + '\n'
+
+
+class FileKitchenSink(KitchenSink):
+    """Anexa las comandas a un archivo de texto"""
+    
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+    
+    def enviar(self, ticket: dict):
+        with open(self.ruta, 'a', encoding='utf-8') as f:
+            f.write(KitchenSink.formatear(ticket))
+
+
+class SocketKitchenSink(KitchenSink):
+    """Envía cada comanda como una línea JSON a un socket TCP local"""
+    
+    def __init__(self, host: str, puerto: int, timeout: float = 2.0):
+        self.host = host
+        self.puerto = puerto
+        self.timeout = timeout
+    
+    def enviar(self, ticket: dict):
+        linea = json.dumps(ticket, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with socket.create_connection((self.host, self.puerto), timeout=self.timeout) as conexion:
+            conexion.sendall(linea.encode('utf-8'))
+
+
+class PrinterKitchenSink(KitchenSink):
+    """Impresora de comandas simulada: escribe el ticket en un dispositivo o archivo"""
+    
+    CORTE = b'\x1dV\x00'  # Corte de papel ESC/POS
+    
+    def __init__(self, dispositivo: str):
+        self.dispositivo = dispositivo
+    
+    def enviar(self, ticket: dict):
+        with open(self.dispositivo, 'ab') as impresora:
+            impresora.write(KitchenSink.formatear(ticket).encode('utf-8') + PrinterKitchenSink.CORTE)
+
+
+class KitchenDispatcher:
+    """Cola de despacho a cocina con un hilo en segundo plano, reintentos y bandeja de salida durable.
+    
+    Cada comanda se anexa a la bandeja de salida antes de encolarse y se marca como
+    despachada al enviarse, por lo que las pendientes se reenvían al reiniciar.
+    """
+    
+    OUTBOX_FILE = 'cocina.outbox.jsonl'
+    SINKS = ('file', 'socket', 'printer')
+    REINTENTOS = 3
+    ESPERA_REINTENTO = 0.5       # Segundos; se duplica en cada intento
+    MUESTRAS = 200               # Latencias conservadas por etapa
+    
+    _config: dict = {}
+    _sink: Optional[KitchenSink] = None
+    _cola: Optional[queue.Queue] = None
+    _hilo: Optional[threading.Thread] = None
+    _outbox: Optional[TransactionJournal] = None
+    _ruta_outbox: Optional[str] = None
+    _bloqueo_outbox: Optional[FileLock] = None
+    _pendientes: Dict[str, dict] = {}
+    _latencias: Dict[str, List[float]] = {}
+    _candado = threading.Lock()
+    
+    @staticmethod
+    def configurar(config: dict):
+        """Aplica la clave opcional "kitchen" de la configuración"""
+        opciones = config.get('kitchen', {})
+        if opciones.get('sink', 'file') not in KitchenDispatcher.SINKS:
+            raise ValueError(f"Destino de cocina desconocido: {opciones['sink']}")
+        KitchenDispatcher._config = opciones
+        KitchenDispatcher.REINTENTOS = int(opciones.get('retries', KitchenDispatcher.REINTENTOS))
+    
+    @staticmethod
+    def crear_sink(opciones: dict) -> KitchenSink:
+        """Instancia el destino configurado"""
+        tipo = opciones.get('sink', 'file')
+        if tipo == 'socket':
+            return SocketKitchenSink(opciones.get('host', '127.0.0.1'), int(opciones.get('port', 9100)))
+        if tipo == 'printer':
+            return PrinterKitchenSink(opciones.get('path', 'impresora_cocina.prn'))
+        return FileKitchenSink(opciones.get('path', 'cocina.txt'))
+    
+    @staticmethod
+    def registrar_latencia(etapa: str, segundos: float):
+        with KitchenDispatcher._candado:
+            muestras = KitchenDispatcher._latencias.setdefault(etapa, [])
+            muestras.append(segundos)
+            del muestras[:-KitchenDispatcher.MUESTRAS]
+    
+    @staticmethod
+    def latencias() -> Dict[str, dict]:
+        """Promedio, p95 y máximo en milisegundos de cada etapa"""
+        resumen = {}
+        with KitchenDispatcher._candado:
+            for etapa, muestras in KitchenDispatcher._latencias.items():
+                orden = sorted(muestras)
+                resumen[etapa] = {
+                    "muestras": len(orden),
+                    "promedio_ms": sum(orden) / len(orden) * 1000,
+                    "p95_ms": orden[min(len(orden) - 1, int(len(orden) * 0.95))] * 1000,
+                    "max_ms": orden[-1] * 1000
+                }
+        return resumen
+    
+    @staticmethod
+    def iniciar():
+        """Inicia el despacho sin esperar la primera venta (reenvía las comandas pendientes)"""
+        with KitchenDispatcher._candado:
+            KitchenDispatcher._iniciar()
+    
+    @staticmethod
+    def _iniciar():
+        """Abre la bandeja de salida, recupera las comandas pendientes e inicia el hilo"""
+        if KitchenDispatcher._hilo is not None:
+            return
+        
+        KitchenDispatcher._sink = KitchenDispatcher._sink or KitchenDispatcher.crear_sink(KitchenDispatcher._config)
+        KitchenDispatcher._tomar_outbox()
+        KitchenDispatcher._outbox = TransactionJournal(KitchenDispatcher._ruta_outbox)
+        KitchenDispatcher._cola = queue.Queue()
+        
+        pendientes = {}
+        if os.path.exists(KitchenDispatcher._ruta_outbox):
+            KitchenDispatcher._outbox.recuperar()
+            pendientes = KitchenDispatcher._leer_pendientes(KitchenDispatcher._outbox)
         
-        if not transactions:
-            print(f"\n{Color.WARNING}No hay transacciones registradas{Color.ENDC}\n")
+        # Bandejas de terminales que terminaron sin despachar todo
+        for ruta in KitchenDispatcher._outboxes():
+            if ruta == KitchenDispatcher._ruta_outbox:
+                continue
+            bloqueo = FileLock(ruta, bloqueante=False)
+            if not bloqueo.adquirir():
+                continue
+            try:
+                huerfana = TransactionJournal(ruta)
+                huerfana.recuperar()
+                for ticket_id, ticket in KitchenDispatcher._leer_pendientes(huerfana).items():
+                    if ticket_id not in pendientes:
+                        KitchenDispatcher._outbox.agregar({k: ticket[k] for k in ('id', 'fecha', 'usuario', 'pedido', 'encolado')})
+                        pendientes[ticket_id] = ticket
+                KitchenDispatcher._outbox.sincronizar()
+                os.remove(ruta)
+                os.remove(bloqueo.ruta)
+            finally:
+                bloqueo.liberar()
+        
+        KitchenDispatcher._pendientes = pendientes
+        for ticket in pendientes.values():
+            KitchenDispatcher._cola.put(ticket['id'])
+        if pendientes:
+            Logger.warning(f"Comandas pendientes recuperadas: {len(pendientes)}")
+        
+        KitchenDispatcher._hilo = threading.Thread(target=KitchenDispatcher._trabajador,
+                                                   name='cocina', daemon=True)
+        KitchenDispatcher._hilo.start()
+    
+    @staticmethod
+    def _tomar_outbox():
+        """Cada terminal escribe en su propia bandeja, bloqueada mientras el proceso vive"""
+        bloqueo = FileLock(KitchenDispatcher.OUTBOX_FILE, bloqueante=False)
+        if bloqueo.adquirir():
+            ruta = KitchenDispatcher.OUTBOX_FILE
+        else:
+            base, extension = os.path.splitext(KitchenDispatcher.OUTBOX_FILE)
+            ruta = f"{base}.{os.getpid()}{extension}"
+            bloqueo = FileLock(ruta)
+            bloqueo.adquirir()
+        KitchenDispatcher._ruta_outbox = ruta
+        KitchenDispatcher._bloqueo_outbox = bloqueo
+    
+    @staticmethod
+    def _outboxes() -> List[str]:
+        """Bandejas de salida existentes (la principal y las de cada proceso)"""
+        directorio = os.path.dirname(KitchenDispatcher.OUTBOX_FILE) or '.'
+        base, extension = os.path.splitext(os.path.basename(KitchenDispatcher.OUTBOX_FILE))
+        patron = re.compile(re.escape(base) + r'(\.\d+)?' + re.escape(extension) + '$')
+        return [os.path.join(directorio, f) if directorio != '.' else f
+                for f in sorted(os.listdir(directorio)) if patron.match(f)]
+    
+    @staticmethod
+    def _leer_pendientes(outbox: TransactionJournal) -> Dict[str, dict]:
+        pendientes = {}
+        for registro in outbox.leer():
+            if registro.get('despachado'):
+                pendientes.pop(registro['id'], None)
+            else:
+                pendientes[registro['id']] = dict(registro, estado='pendiente', intentos=0)
+        return pendientes
+    
+    @staticmethod
+    def encolar(transaction: dict):
+        """Registra la comanda en la bandeja de salida y la encola para el hilo de despacho"""
+        with KitchenDispatcher._candado:
+            KitchenDispatcher._iniciar()
+            ticket = {
+                "id": transaction['id'],
+                "fecha": transaction['fecha'],
+                "usuario": transaction['usuario'],
+                "pedido": transaction['pedido'],
+                "encolado": time.time()
+            }
+            KitchenDispatcher._outbox.agregar(ticket)
+            KitchenDispatcher._pendientes[ticket['id']] = dict(ticket, estado='pendiente', intentos=0)
+        KitchenDispatcher._cola.put(ticket['id'])
+    
+    @staticmethod
+    def pendientes() -> List[dict]:
+        """Comandas aún no despachadas, de la más antigua a la más reciente"""
+        with KitchenDispatcher._candado:
+            return [dict(t) for t in KitchenDispatcher._pendientes.values()]
+    
+    @staticmethod
+    def reintentar_fallidas() -> int:
+        """Vuelve a encolar las comandas que agotaron sus reintentos"""
+        with KitchenDispatcher._candado:
+            fallidas = [t for t in KitchenDispatcher._pendientes.values() if t['estado'] == 'error']
+            for ticket in fallidas:
+                ticket['estado'] = 'pendiente'
+                ticket['intentos'] = 0
+        for ticket in fallidas:
+            KitchenDispatcher._cola.put(ticket['id'])
+        return len(fallidas)
+    
+    @staticmethod
+    def _trabajador():
+        """Confirma el pago y despacha cada comanda con reintentos y espera exponencial"""
+        cola = KitchenDispatcher._cola
+        while True:
+            ticket_id = cola.get()
+            if ticket_id is None:
+                return
+            
+            with KitchenDispatcher._candado:
+                ticket = KitchenDispatcher._pendientes.get(ticket_id)
+            if ticket is None:
+                continue
+            
+            # Cualquier error deja la comanda en 'error' (reintentable); el hilo sigue atendiendo la cola
+            inicio = time.perf_counter()
+            try:
+                KitchenDispatcher.confirmar_pago(ticket)
+            except Exception as e:
+                KitchenDispatcher._marcar(ticket, 'error')
+                Logger.error(f"Confirmación de pago fallida ({ticket_id}): {e}")
+                continue
+            KitchenDispatcher.registrar_latencia('confirmacion_pago', time.perf_counter() - inicio)
+            
+            espera = KitchenDispatcher.ESPERA_REINTENTO
+            for intento in range(1, KitchenDispatcher.REINTENTOS + 1):
+                KitchenDispatcher._marcar(ticket, 'enviando', intento)
+                inicio = time.perf_counter()
+                try:
+                    KitchenDispatcher._sink.enviar({k: ticket[k] for k in ('id', 'fecha', 'usuario', 'pedido')})
+                except Exception as e:
+                    Logger.warning(f"Envío a cocina fallido ({ticket_id}, intento {intento}): {e}")
+                    if intento < KitchenDispatcher.REINTENTOS:
+                        time.sleep(espera)
+                        espera *= 2
+                    continue
+                
+                KitchenDispatcher.registrar_latencia('despacho_cocina', time.perf_counter() - inicio)
+                KitchenDispatcher.registrar_latencia('cola_a_cocina', time.time() - ticket['encolado'])
+                try:
+                    with KitchenDispatcher._candado:
+                        KitchenDispatcher._outbox.agregar({"id": ticket_id, "despachado": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+                        KitchenDispatcher._pendientes.pop(ticket_id, None)
+                except Exception as e:
+                    KitchenDispatcher._marcar(ticket, 'error')
+                    Logger.error(f"Comanda enviada pero no marcada como despachada ({ticket_id}): {e}")
+                    break
+                Logger.info(f"Comanda enviada a cocina: {ticket_id}")
+                break
+            else:
+                KitchenDispatcher._marcar(ticket, 'error')
+                Logger.error(f"Comanda no enviada tras {KitchenDispatcher.REINTENTOS} intentos: {ticket_id}")
+    
+    @staticmethod
+    def _marcar(ticket: dict, estado: str, intentos: Optional[int] = None):
+        """Cambia el estado de una comanda bajo el candado (pendientes() la lee desde otros hilos)"""
+        with KitchenDispatcher._candado:
+            ticket['estado'] = estado
+            if intentos is not None:
+                ticket['intentos'] = intentos
+    
+    @staticmethod
+    def confirmar_pago(ticket: dict):
+        """Punto de extensión para confirmar el pago con un procesador externo"""
+    
+    @staticmethod
+    def cerrar(timeout: float = 5.0):
+        """Espera a que se vacíe la cola y detiene el hilo; lo no enviado queda en la bandeja de salida"""
+        if KitchenDispatcher._hilo is None:
             return
         
-        print(f"\n{Color.BOLD}{Color.HEADER}{'='*60}{Color.ENDC}")
-        print(f"{Color.BOLD}{Color.HEADER}  ÚLTIMAS TRANSACCIONES{Color.ENDC}".center(70))
-        print(f"{Color.BOLD}{Color.HEADER}{'='*60}{Color.ENDC}\n")
-        
-        ultimas = transactions[-limite:]
-        ultimas.reverse()
-        
-        for trans in ultimas:
-            print(f"{Color.BOLD}ID: {trans['id']}{Color.ENDC}")
-            print(f"  Fecha: {Color.OKCYAN}{trans['fecha']}{Color.ENDC}")
-            print(f"  Usuario: {Color.OKBLUE}{trans['usuario']}{Color.ENDC}")
-            print(f"  Total: {Color.OKGREEN}{trans['moneda']}{trans['total']:.2f}{Color.ENDC}")
-            print(f"  Productos: {', '.join([f'{k} ({v})' for k, v in trans['pedido'].items()])}")
-            print(f"{Color.OKCYAN}{'─'*60}{Color.ENDC}")
-        
-        print()
-        Logger.info("Reporte de transacciones generado")
+        KitchenDispatcher._cola.put(None)
+        KitchenDispatcher._hilo.join(timeout)
+        with KitchenDispatcher._candado:
+            KitchenDispatcher._outbox.cerrar()
+            if not KitchenDispatcher._pendientes and not KitchenDispatcher._hilo.is_alive():
+                # Todo despachado: la bandeja de salida ya no hace falta
+                if os.path.exists(KitchenDispatcher._ruta_outbox):
+                    os.remove(KitchenDispatcher._ruta_outbox)
+                if KitchenDispatcher._ruta_outbox != KitchenDispatcher.OUTBOX_FILE:
+                    os.remove(KitchenDispatcher._bloqueo_outbox.ruta)
+            KitchenDispatcher._bloqueo_outbox.liberar()
+            KitchenDispatcher._hilo = None
+            KitchenDispatcher._sink = None
 
 
 class OrderManager:
@@ -418,64 +4354,739 @@ class OrderManager:
         self.menu_manager = menu_manager
         self.pedido = {}
     
+    def actualizar_menu(self, menu_manager: MenuManager) -> bool:
+        """Adopta otro menú solo entre pedidos: un carrito en curso conserva los precios con que se armó"""
+        if self.pedido or menu_manager is self.menu_manager:
+            return False
+        self.menu_manager = menu_manager
+        return True
+    
+    @Metrics.medir
+    def agregar(self, item: str, cantidad: int) -> bool:
+        """Agrega un ítem al pedido sin mostrar mensajes; una cantidad que deja el ítem en cero lo quita"""
+        if not self.menu_manager.validar_producto(item):
+            return False
+        cantidad = self.pedido.get(item, 0) + cantidad
+        if cantidad > 0:
+            self.pedido[item] = cantidad
+        else:
+            self.pedido.pop(item, None)
+        return True
+    
+    @Metrics.medir
     def agregar_item(self, item: str, cantidad: int):
         """Agrega un ítem al pedido"""
-        if self.menu_manager.validar_producto(item):
-            self.pedido[item] = self.pedido.get(item, 0) + cantidad
+        if self.agregar(item, cantidad):
             print(f"{Color.OKGREEN}Agregado: {cantidad}x {item}{Color.ENDC}")
             return True
         else:
             print(f"{Color.FAIL}Producto no encontrado: {item}{Color.ENDC}")
             return False
     
+    def resumen(self) -> dict:
+        """Líneas del pedido con precio y subtotal, y el total"""
+        items = []
+        total = 0
+        for item, cantidad in self.pedido.items():
+            precio = self.menu_manager.precio_centavos(item)
+            subtotal = precio * cantidad
+            total += subtotal
+            items.append({"producto": item, "cantidad": cantidad, "precio": Money.a_unidades(precio),
+                          "subtotal": Money.a_unidades(subtotal)})
+        return {
+            "items": items,
+            "total": Money.a_unidades(total),
+            "total_centavos": total,
+            "moneda": self.menu_manager.currency
+        }
+    
     def mostrar_pedido(self):
         """Muestra el pedido actual"""
         if not self.pedido:
-            print(f"\n{Color.WARNING}El carrito está vacío{Color.ENDC}\n")
+            ScreenRenderer.escribir(['', f"{Color.WARNING}El carrito está vacío{Color.ENDC}", ''])
             return
         
-        print(f"\n{Color.BOLD}{Color.OKBLUE}{'─'*60}{Color.ENDC}")
-        print(f"{Color.BOLD}  CARRITO DE COMPRAS{Color.ENDC}")
-        print(f"{Color.BOLD}{Color.OKBLUE}{'─'*60}{Color.ENDC}\n")
-        
+        lineas = ScreenRenderer.titulo("CARRITO DE COMPRAS", color_titulo='')
+        moneda = self.menu_manager.currency
+        columna = ScreenRenderer.ancho() - 31
         total = 0
         for item, cantidad in self.pedido.items():
-            precio = self.menu_manager.menu[item]
+            precio = self.menu_manager.precio_centavos(item)
             subtotal = precio * cantidad
             total += subtotal
-            print(f"  {cantidad}x {item:<35} {self.menu_manager.currency}{precio:.2f} = {Color.OKGREEN}{self.menu_manager.currency}{subtotal:.2f}{Color.ENDC}")
+            lineas.append(f"  {cantidad:>3}x {item[:columna]:<{columna}} {Money.formatear(precio, moneda):>10} = "
+                          f"{Color.OKGREEN}{Money.formatear(subtotal, moneda):>10}{Color.ENDC}")
         
-        print(f"{Color.OKBLUE}{'─'*60}{Color.ENDC}")
-        print(f"{Color.BOLD}  TOTAL: {Color.OKGREEN}{self.menu_manager.currency}{total:.2f}{Color.ENDC}\n")
+        lineas += [
+            ScreenRenderer.separador(color=Color.OKBLUE),
+            f"{Color.BOLD}  TOTAL: {Color.OKGREEN}{Money.formatear(total, moneda)}{Color.ENDC}",
+            ''
+        ]
+        ScreenRenderer.escribir(lineas)
     
+    @Metrics.medir
     def procesar_pago(self, usuario: str):
-        """Procesa el pago del pedido"""
+        """Registra la venta y encola la comanda; la confirmación y el envío a cocina siguen en segundo plano"""
         if not self.pedido:
             print(f"{Color.WARNING}No hay productos en el pedido{Color.ENDC}")
             return False
         
-        total = self.menu_manager.calcular_total(self.pedido)
+        inicio = time.perf_counter()
+        transaction = self.cobrar(usuario)
+        fin = time.perf_counter()
         
-        print(f"\n{Color.BOLD}Procesando pago...{Color.ENDC}")
-        time.sleep(1)
+        ScreenRenderer.escribir([
+            f"{Color.OKGREEN}Pago registrado: ID {transaction['id']} ({(fin - inicio) * 1000:.1f} ms){Color.ENDC}",
+            f"{Color.OKGREEN}Orden en cola para cocina{Color.ENDC}",
+            f"{Color.BOLD}{Color.OKGREEN}¡Gracias por tu compra!{Color.ENDC}",
+            ''
+        ])
+        return True
+    
+    @Metrics.medir
+    def cobrar(self, usuario: str) -> dict:
+        """Registra la venta, encola la comanda y vacía el pedido. Retorna la transacción"""
+        inicio = time.perf_counter()
+        precios = {item: self.menu_manager.precio_centavos(item) for item in self.pedido}
+        total = sum(precios[item] * cantidad for item, cantidad in self.pedido.items())
         
         # Registrar transacción
-        TransactionManager.registrar_venta(
+        transaction = TransactionManager.registrar_venta(
             usuario,
             self.pedido.copy(),
             total,
-            self.menu_manager.currency
+            self.menu_manager.currency,
+            precios
         )
+        registrado = time.perf_counter()
+        KitchenDispatcher.registrar_latencia('registro_venta', registrado - inicio)
         
-        print(f"{Color.OKGREEN}Pago procesado exitosamente{Color.ENDC}")
-        time.sleep(0.5)
-        print(f"{Color.OKGREEN}Enviando orden a cocina...{Color.ENDC}")
-        time.sleep(1)
-        print(f"{Color.BOLD}{Color.OKGREEN}¡Gracias por tu compra!{Color.ENDC}\n")
+        KitchenDispatcher.encolar(transaction)
+        fin = time.perf_counter()
+        KitchenDispatcher.registrar_latencia('encolado_cocina', fin - registrado)
+        KitchenDispatcher.registrar_latencia('checkout', fin - inicio)
         
         # Limpiar pedido
         self.pedido = {}
-        return True
+        return transaction
+
+
+class OrderImporter:
+    """Importación no interactiva de pedidos capturados fuera de línea (CSV o JSON Lines).
+    
+    Valida cada pedido contra el menú en memoria, calcula su total con el menú vigente y
+    registra las ventas por lotes con una escritura agrupada. Los pedidos inválidos van a un
+    archivo de rechazos con el motivo, sin interrumpir la importación.
+    """
+    
+    LOTE = 5000
+    FORMATOS = ('csv', 'jsonl')
+    EXTENSIONES = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'jsonl'}
+    PATRON_FECHA = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$')
+    
+    def __init__(self, menu_manager: MenuManager, usuario: str, lote: int = LOTE, solo_validar: bool = False):
+        self.menu_manager = menu_manager
+        self.usuario = usuario
+        self.lote = max(1, lote)
+        self.solo_validar = solo_validar
+        self.importados = 0
+        self.rechazados = 0
+        self.total_centavos = 0
+        self._encabezado: List[str] = []
+        self._rechazos = None
+        self._escritor = None
+    
+    @staticmethod
+    def formato_de(ruta: str) -> str:
+        """Formato según la extensión del archivo"""
+        formato = OrderImporter.EXTENSIONES.get(os.path.splitext(ruta)[1].lower())
+        if formato is None:
+            raise ValueError(f"No se reconoce el formato de {ruta}; indique --formato csv o jsonl")
+        return formato
+    
+    @staticmethod
+    def ruta_rechazos(ruta: str, formato: str) -> str:
+        return f"{os.path.splitext(ruta)[0]}.rechazos.{formato}"
+    
+    def _producto(self, nombre) -> str:
+        """Nombre del menú para un nombre exacto o un código SKU"""
+        if not isinstance(nombre, str):
+            raise ValueError(f"producto inválido: {nombre!r}")
+        nombre = nombre.strip()
+        if self.menu_manager.validar_producto(nombre):
+            return nombre
+        producto = self.menu_manager.catalogo.por_sku.get(nombre.casefold())
+        if producto is None:
+            raise ValueError(f"producto desconocido '{nombre}'")
+        return producto
+    
+    @staticmethod
+    def _cantidad(valor) -> int:
+        if isinstance(valor, str) and valor.strip().isdigit():
+            valor = int(valor)
+        if not isinstance(valor, int) or isinstance(valor, bool) or valor <= 0:
+            raise ValueError(f"cantidad inválida: {valor!r}")
+        return valor
+    
+    @staticmethod
+    def _fecha(valor) -> Optional[str]:
+        """Fecha 'YYYY-MM-DD HH:MM:SS' validada, o None para usar la de la importación"""
+        if valor in (None, ''):
+            return None
+        if not isinstance(valor, str) or not OrderImporter.PATRON_FECHA.match(valor.strip()):
+            raise ValueError(f"fecha inválida: {valor!r} (se espera YYYY-MM-DD HH:MM:SS)")
+        valor = valor.strip()
+        try:
+            datetime(int(valor[0:4]), int(valor[5:7]), int(valor[8:10]),
+                     int(valor[11:13]), int(valor[14:16]), int(valor[17:19]))
+        except ValueError:
+            raise ValueError(f"fecha inexistente: {valor!r}")
+        return valor
+    
+    def validar(self, lineas: List[Tuple[object, object]], usuario=None, fecha=None) -> dict:
+        """Venta a partir de las líneas (producto, cantidad) de un pedido; ValueError si no es válido"""
+        if not lineas:
+            raise ValueError("pedido sin productos")
+        pedido: Dict[str, int] = {}
+        for producto, cantidad in lineas:
+            producto = self._producto(producto)
+            pedido[producto] = pedido.get(producto, 0) + OrderImporter._cantidad(cantidad)
+        
+        usuario = usuario if usuario not in (None, '') else self.usuario
+        if not isinstance(usuario, str) or not usuario.strip():
+            raise ValueError(f"usuario inválido: {usuario!r}")
+        
+        precios = {producto: self.menu_manager.precio_centavos(producto) for producto in pedido}
+        return {
+            "fecha": OrderImporter._fecha(fecha),
+            "usuario": usuario.strip(),
+            "pedido": pedido,
+            "total_centavos": self.menu_manager.calcular_total_centavos(pedido),
+            "moneda": self.menu_manager.currency,
+            "precios_centavos": precios
+        }
+    
+    def _leer_csv(self, f) -> Iterator[Tuple[object, object]]:
+        """(venta o motivo de rechazo, filas originales) por pedido.
+        
+        Columnas: producto y cantidad obligatorias; pedido, fecha y usuario opcionales. Las
+        filas consecutivas con el mismo valor en 'pedido' forman un solo pedido.
+        """
+        lector = csv.reader(f)
+        encabezado = next(lector, None)
+        if encabezado is None:
+            return
+        columnas = {nombre.strip().casefold(): i for i, nombre in enumerate(encabezado)}
+        faltantes = [c for c in ('producto', 'cantidad') if c not in columnas]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+        self._encabezado = encabezado
+        
+        def valor(fila: list, columna: str) -> str:
+            i = columnas.get(columna)
+            return fila[i].strip() if i is not None and i < len(fila) else ''
+        
+        grupo: List[list] = []
+        clave = None
+        for fila in lector:
+            if not ''.join(fila).strip():
+                continue
+            referencia = valor(fila, 'pedido')
+            if grupo and (not referencia or referencia != clave):
+                yield self._venta_csv(grupo, valor), grupo
+                grupo = []
+            grupo.append(fila)
+            clave = referencia
+        if grupo:
+            yield self._venta_csv(grupo, valor), grupo
+    
+    def _venta_csv(self, filas: List[list], valor) -> object:
+        try:
+            return self.validar([(valor(fila, 'producto'), valor(fila, 'cantidad')) for fila in filas],
+                                valor(filas[0], 'usuario'), valor(filas[0], 'fecha'))
+        except ValueError as e:
+            return str(e)
+    
+    def _leer_jsonl(self, f) -> Iterator[Tuple[object, object]]:
+        """(venta o motivo de rechazo, línea original) por línea {"usuario", "fecha", "pedido": {producto: cantidad}}"""
+        for numero, linea in enumerate(f, 1):
+            if not linea.strip():
+                continue
+            try:
+                registro = json.loads(linea)
+                if not isinstance(registro, dict) or not isinstance(registro.get('pedido'), dict):
+                    raise ValueError("se espera un objeto con 'pedido' {producto: cantidad}")
+                venta = self.validar(list(registro['pedido'].items()), registro.get('usuario'), registro.get('fecha'))
+            except ValueError as e:
+                # json.JSONDecodeError es subclase de ValueError
+                venta = f"línea {numero}: {e}"
+            yield venta, linea
+    
+    def _rechazar(self, formato: str, ruta: str, motivo: str, original):
+        """Escribe el pedido rechazado con su motivo; el archivo se crea con el primer rechazo"""
+        self.rechazados += 1
+        if self._rechazos is None:
+            self._rechazos = open(ruta, 'w', encoding='utf-8', newline='')
+            if formato == 'csv':
+                self._escritor = csv.writer(self._rechazos)
+                self._escritor.writerow(list(self._encabezado) + ['motivo'])
+        
+        if formato == 'csv':
+            self._escritor.writerows(fila + [motivo] for fila in original)
+            return
+        try:
+            registro = json.loads(original)
+        except ValueError:
+            registro = None
+        # Un objeto rechazado se conserva tal cual (con su motivo) para corregirlo y reimportarlo
+        if isinstance(registro, dict):
+            registro = dict(registro, motivo=motivo)
+        else:
+            registro = {"motivo": motivo, "original": original.rstrip('\r\n')}
+        self._rechazos.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    
+    def _registrar(self, ventas: List[dict]):
+        if not self.solo_validar:
+            TransactionManager.registrar_lote(ventas)
+        self.importados += len(ventas)
+        self.total_centavos += sum(venta['total_centavos'] for venta in ventas)
+    
+    def importar(self, ruta: str, formato: Optional[str] = None, rechazos: Optional[str] = None) -> dict:
+        """Importa los pedidos de un archivo. Retorna el resumen de la importación"""
+        formato = formato or OrderImporter.formato_de(ruta)
+        rechazos = rechazos or OrderImporter.ruta_rechazos(ruta, formato)
+        inicio = time.perf_counter()
+        pendientes: List[dict] = []
+        
+        try:
+            with ExitStack() as pila, open(ruta, 'r', encoding='utf-8-sig', newline='') as f:
+                if not self.solo_validar:
+                    pila.enter_context(TransactionManager.importacion())
+                lector = self._leer_csv(f) if formato == 'csv' else self._leer_jsonl(f)
+                for venta, original in lector:
+                    if isinstance(venta, str):
+                        self._rechazar(formato, rechazos, venta, original)
+                        continue
+                    pendientes.append(venta)
+                    if len(pendientes) >= self.lote:
+                        self._registrar(pendientes)
+                        pendientes = []
+                self._registrar(pendientes)
+        finally:
+            if self._rechazos is not None:
+                self._rechazos.close()
+        
+        segundos = time.perf_counter() - inicio
+        resumen = {
+            "archivo": ruta,
+            "importados": self.importados,
+            "rechazados": self.rechazados,
+            "archivo_rechazos": rechazos if self.rechazados else None,
+            "total_centavos": self.total_centavos,
+            "total": Money.a_unidades(self.total_centavos),
+            "segundos": round(segundos, 3),
+            "pedidos_por_segundo": round(self.importados / segundos, 1) if segundos > 0 else 0,
+            "solo_validacion": self.solo_validar
+        }
+        Logger.info(f"Importación de pedidos {ruta}: {self.importados} importados, {self.rechazados} rechazados "
+                    f"({resumen['pedidos_por_segundo']} pedidos/s)")
+        return resumen
+    
+    @staticmethod
+    def mostrar_resumen(resumen: dict):
+        """Muestra el resultado de una importación de pedidos"""
+        verbo = "válidos" if resumen['solo_validacion'] else "importados"
+        print(f"\n{Color.OKGREEN}Pedidos {verbo}: {resumen['importados']}{Color.ENDC}")
+        print(f"{Color.OKGREEN}Total: {Money.formatear(resumen['total_centavos'])}{Color.ENDC}")
+        if resumen['rechazados']:
+            print(f"{Color.WARNING}Pedidos rechazados: {resumen['rechazados']} → {resumen['archivo_rechazos']}{Color.ENDC}")
+        print(f"{Color.OKCYAN}Tiempo: {resumen['segundos']:.2f} s · "
+              f"{resumen['pedidos_por_segundo']:,.0f} pedidos/s{Color.ENDC}")
+
+
+class ApiServer:
+    """Servidor HTTP/JSON (asyncio) para tabletas y kioscos de la red local.
+    
+    Un solo MenuManager en memoria atiende a todos los clientes y los carritos viven en
+    memoria. Las operaciones de almacenamiento se ejecutan en un hilo dedicado, en orden,
+    sobre el mismo motor abierto, para no bloquear el bucle de eventos.
+    """
+    
+    HOST = '127.0.0.1'
+    PUERTO = 8080
+    MAX_CUERPO = 1024 * 1024
+    MAX_TRANSACCIONES = 100
+    PEDIDO_TTL = 3600            # Segundos sin actividad antes de descartar un carrito
+    USUARIO = 'api'              # Cajero de las ventas sin token configurado
+    ESTADOS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 401: 'Unauthorized',
+               404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+               413: 'Payload Too Large', 500: 'Internal Server Error'}
+    
+    class Rechazo(Exception):
+        """Error de la solicitud con su código de estado HTTP"""
+        
+        def __init__(self, estado: int, mensaje: str, **datos):
+            super().__init__(mensaje)
+            self.estado = estado
+            self.datos = datos
+    
+    def __init__(self, config: dict, host: Optional[str] = None, puerto: Optional[int] = None):
+        opciones = config.get('server', {})
+        self.host = host or opciones.get('host', ApiServer.HOST)
+        self.puerto = int(puerto if puerto is not None else opciones.get('port', ApiServer.PUERTO))
+        self.token = opciones.get('token')
+        if not self.token and not ApiServer._es_local(self.host):
+            raise ValueError(f"Se requiere 'server.token' en inventory.json para escuchar en {self.host}; "
+                             f"sin token solo se permite {ApiServer.HOST}")
+        self.menu_manager = MenuManager(config)
+        self.pedidos: Dict[str, dict] = {}
+        self._purga = time.time()
+        self._conexiones = set()
+        self._almacenamiento = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix='almacenamiento')
+        self.rutas = [(metodo, re.compile(patron), manejador) for metodo, patron, manejador in (
+            ('GET', r'/menu', self._menu),
+            ('GET', r'/menu/buscar', self._buscar),
+            ('POST', r'/pedidos', self._crear_pedido),
+            ('GET', r'/pedidos/(\w+)', self._ver_pedido),
+            ('DELETE', r'/pedidos/(\w+)', self._cancelar_pedido),
+            ('POST', r'/pedidos/(\w+)/items', self._agregar_items),
+            ('POST', r'/pedidos/(\w+)/cobrar', self._cobrar_pedido),
+            ('POST', r'/ventas', self._venta_directa),
+            ('GET', r'/reportes/ventas', self._reporte_ventas),
+            ('GET', r'/reportes/periodo', self._reporte_periodo),
+            ('GET', r'/reportes/cajeros', self._reporte_cajeros),
+            ('GET', r'/transacciones', self._transacciones),
+            ('GET', r'/transacciones/(\w+)', self._transaccion),
+            ('GET', r'/cocina', self._cocina),
+            ('GET', r'/metrics', self._metricas),
+        )]
+    
+    def ejecutar(self):
+        """Atiende solicitudes hasta Ctrl+C"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        servidor = loop.run_until_complete(asyncio.start_server(self._atender, self.host, self.puerto, backlog=1024))
+        # El motor se abre una vez y queda abierto en el hilo de almacenamiento
+        loop.run_until_complete(self._en_almacenamiento(TransactionManager._obtener_store))
+        
+        try:
+            loop.add_signal_handler(signal.SIGTERM, loop.stop)
+        except (NotImplementedError, AttributeError):
+            pass    # Windows: solo Ctrl+C
+        
+        Logger.info(f"Servidor HTTP iniciado en {self.host}:{self.puerto}")
+        print(f"{Color.OKGREEN}Servidor escuchando en http://{self.host}:{self.puerto} "
+              f"(Ctrl+C para detener){Color.ENDC}")
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            print(f"\n{Color.WARNING}Servidor detenido{Color.ENDC}")
+        finally:
+            servidor.close()
+            for writer in list(self._conexiones):
+                writer.close()
+            loop.run_until_complete(asyncio.wait_for(servidor.wait_closed(), 5))
+            self._almacenamiento.shutdown()
+            loop.close()
+            Logger.info("Servidor HTTP detenido")
+    
+    @staticmethod
+    def _es_local(host: str) -> bool:
+        """Indica si el host solo acepta conexiones del propio equipo"""
+        if host == 'localhost':
+            return True
+        try:
+            return ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            return False
+    
+    def _autorizado(self, encabezados: dict) -> bool:
+        """Sin token configurado solo se atiende en loopback; con token, debe coincidir"""
+        if not self.token:
+            return True
+        recibido = encabezados.get('authorization', '').encode('latin-1')
+        return hmac.compare_digest(recibido, f"Bearer {self.token}".encode('utf-8'))
+    
+    def _en_almacenamiento(self, funcion, *args):
+        return asyncio.get_event_loop().run_in_executor(self._almacenamiento, funcion, *args)
+    
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atiende las solicitudes de una conexión (HTTP/1.1 con keep-alive)"""
+        self._conexiones.add(writer)
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                partes = linea.decode('latin-1').split()
+                if len(partes) != 3:
+                    self._responder(writer, 400, {"error": "Solicitud inválida"}, False)
+                    break
+                metodo, objetivo, version = partes
+                
+                encabezados = {}
+                while True:
+                    linea = await reader.readline()
+                    if linea in (b'\r\n', b'\n', b''):
+                        break
+                    nombre, _, valor = linea.decode('latin-1').partition(':')
+                    encabezados[nombre.strip().lower()] = valor.strip()
+                
+                conexion = encabezados.get('connection', '').lower()
+                mantener = conexion != 'close' if version == 'HTTP/1.1' else conexion == 'keep-alive'
+                longitud = encabezados.get('content-length', '0')
+                if not longitud.isdigit() or int(longitud) > ApiServer.MAX_CUERPO:
+                    self._responder(writer, 413, {"error": "Cuerpo inválido o demasiado grande"}, False)
+                    break
+                cuerpo = await reader.readexactly(int(longitud)) if int(longitud) else b''
+                
+                estado, datos = await self._despachar(metodo, objetivo, encabezados, cuerpo)
+                self._responder(writer, estado, datos, mantener)
+                await writer.drain()
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._conexiones.discard(writer)
+            writer.close()
+    
+    @staticmethod
+    def _responder(writer: asyncio.StreamWriter, estado: int, datos, mantener: bool):
+        # Las respuestas de texto (métricas) se envían tal cual
+        if isinstance(datos, str):
+            cuerpo, tipo = datos.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            cuerpo, tipo = json.dumps(datos, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8'
+        writer.write(
+            f"HTTP/1.1 {estado} {ApiServer.ESTADOS.get(estado, '')}\r\n"
+            f"Content-Type: {tipo}\r\n"
+            f"Content-Length: {len(cuerpo)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode('latin-1') + cuerpo
+        )
+    
+    async def _despachar(self, metodo: str, objetivo: str, encabezados: dict, cuerpo: bytes) -> Tuple[int, object]:
+        """Ubica la ruta y ejecuta su manejador. Retorna (estado, datos)"""
+        url = urllib.parse.urlsplit(objetivo)
+        ruta = url.path.rstrip('/') or '/'
+        consulta = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        
+        try:
+            self._recargar_config()
+            if not self._autorizado(encabezados):
+                raise ApiServer.Rechazo(401, "Token inválido o ausente")
+            
+            encontrada = False
+            for metodo_ruta, patron, manejador in self.rutas:
+                coincidencia = patron.fullmatch(ruta)
+                if coincidencia is None:
+                    continue
+                encontrada = True
+                if metodo_ruta != metodo:
+                    continue
+                
+                datos = {}
+                if cuerpo:
+                    try:
+                        datos = json.loads(cuerpo.decode('utf-8'))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        raise ApiServer.Rechazo(400, "El cuerpo no es JSON válido")
+                    if not isinstance(datos, dict):
+                        raise ApiServer.Rechazo(400, "El cuerpo debe ser un objeto JSON")
+                
+                with Metrics.tramo(f"{metodo} {patron.pattern}"):
+                    resultado = manejador(consulta, datos, *coincidencia.groups())
+                    if asyncio.iscoroutine(resultado):
+                        resultado = await resultado
+                return resultado
+            
+            if encontrada:
+                raise ApiServer.Rechazo(405, f"Método no permitido: {metodo}")
+            raise ApiServer.Rechazo(404, f"Ruta no encontrada: {ruta}")
+        
+        except ApiServer.Rechazo as e:
+            return e.estado, dict(e.datos, error=str(e))
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            Logger.error(f"Error en {metodo} {ruta}: {e}")
+            return 500, {"error": "Error interno del servidor"}
+    
+    # Menú
+    
+    def _menu(self, consulta: dict, datos: dict) -> Tuple[int, dict]:
+        skus = self.menu_manager.catalogo.sku_de
+        return 200, {
+            "negocio": self.menu_manager.business_name,
+            "moneda": self.menu_manager.currency,
+            "productos": [{"numero": numero, "nombre": nombre, "precio": precio, "sku": skus.get(nombre)}
+                          for numero, (nombre, precio) in enumerate(self.menu_manager.menu.items(), 1)]
+        }
+    
+    def _buscar(self, consulta: dict, datos: dict) -> Tuple[int, dict]:
+        productos = self.menu_manager.resolver_producto(consulta.get('q', ''))
+        return 200, {"productos": [{"nombre": p, "precio": self.menu_manager.menu[p]} for p in productos]}
+    
+    # Pedidos
+    
+    def _recargar_config(self):
+        """Cambia al menú nuevo si inventory.json cambió; los carritos abiertos siguen con el suyo"""
+        config = ConfigManager.recargar_si_cambio()
+        if config is not None:
+            Money.configurar(config)
+            self.menu_manager = MenuManager(config)
+            token = config.get('server', {}).get('token')
+            if not token and not ApiServer._es_local(self.host):
+                Logger.warning("Se quitó 'server.token' de la configuración; se conserva el anterior")
+            else:
+                self.token = token
+    
+    def _usuario(self, datos: dict) -> str:
+        """Cajero de la venta: el del cuerpo solo si la solicitud se autenticó con el token"""
+        if self.token and datos.get('usuario'):
+            return str(datos['usuario'])
+        return ApiServer.USUARIO
+    
+    def _resolver(self, consulta, menu_manager: Optional[MenuManager] = None) -> str:
+        """Producto por nombre exacto, número, código, prefijo o nombre aproximado"""
+        menu_manager = menu_manager or self.menu_manager
+        consulta = str(consulta)
+        if menu_manager.validar_producto(consulta):
+            return consulta
+        productos = menu_manager.resolver_producto(consulta)
+        if len(productos) == 1:
+            return productos[0]
+        if productos:
+            raise ApiServer.Rechazo(409, f"Producto ambiguo: {consulta}", candidatos=productos)
+        raise ApiServer.Rechazo(404, f"Producto no encontrado: {consulta}")
+    
+    def _agregar(self, orden: OrderManager, items, positivas: bool = True):
+        """Agrega {producto: cantidad} o [{"producto", "cantidad"}] a un pedido"""
+        if isinstance(items, dict):
+            items = [{"producto": p, "cantidad": c} for p, c in items.items()]
+        if not isinstance(items, list):
+            raise ApiServer.Rechazo(400, "'items' debe ser un objeto o una lista")
+        
+        lineas = []
+        for item in items:
+            if not isinstance(item, dict) or 'producto' not in item:
+                raise ApiServer.Rechazo(400, "Cada ítem necesita 'producto'")
+            cantidad = item.get('cantidad', 1)
+            if not isinstance(cantidad, int) or isinstance(cantidad, bool) or cantidad == 0 or (positivas and cantidad < 0):
+                raise ApiServer.Rechazo(400, f"Cantidad inválida para {item['producto']}: {cantidad}")
+            lineas.append((self._resolver(item['producto'], orden.menu_manager), cantidad))
+        # Solo se modifica el pedido si todos los ítems son válidos
+        for producto, cantidad in lineas:
+            orden.agregar(producto, cantidad)
+    
+    def _obtener_pedido(self, pedido_id: str) -> dict:
+        pedido = self.pedidos.get(pedido_id)
+        if pedido is None:
+            raise ApiServer.Rechazo(404, f"Pedido no encontrado: {pedido_id}")
+        pedido['actividad'] = time.time()
+        return pedido
+    
+    @staticmethod
+    def _describir(pedido_id: str, pedido: dict) -> dict:
+        return dict(pedido['orden'].resumen(), id=pedido_id, usuario=pedido['usuario'])
+    
+    def _purgar(self):
+        """Descarta los carritos abandonados"""
+        ahora = time.time()
+        if ahora - self._purga < 60:
+            return
+        self._purga = ahora
+        for pedido_id in [i for i, p in self.pedidos.items() if ahora - p['actividad'] > ApiServer.PEDIDO_TTL]:
+            del self.pedidos[pedido_id]
+    
+    def _crear_pedido(self, consulta: dict, datos: dict) -> Tuple[int, dict]:
+        self._purgar()
+        orden = OrderManager(self.menu_manager)
+        self._agregar(orden, datos.get('items', []))
+        
+        pedido_id = secrets.token_hex(8)
+        self.pedidos[pedido_id] = {"orden": orden, "usuario": self._usuario(datos),
+                                   "actividad": time.time()}
+        return 201, self._describir(pedido_id, self.pedidos[pedido_id])
+    
+    def _ver_pedido(self, consulta: dict, datos: dict, pedido_id: str) -> Tuple[int, dict]:
+        return 200, self._describir(pedido_id, self._obtener_pedido(pedido_id))
+    
+    def _cancelar_pedido(self, consulta: dict, datos: dict, pedido_id: str) -> Tuple[int, dict]:
+        self._obtener_pedido(pedido_id)
+        del self.pedidos[pedido_id]
+        return 200, {"id": pedido_id, "cancelado": True}
+    
+    def _agregar_items(self, consulta: dict, datos: dict, pedido_id: str) -> Tuple[int, dict]:
+        pedido = self._obtener_pedido(pedido_id)
+        if 'items' in datos:
+            self._agregar(pedido['orden'], datos['items'], positivas=False)
+        else:
+            self._agregar(pedido['orden'], [datos], positivas=False)
+        return 200, self._describir(pedido_id, pedido)
+    
+    async def _cobrar(self, orden: OrderManager, usuario: str) -> Tuple[int, dict]:
+        if not orden.pedido:
+            raise ApiServer.Rechazo(409, "El pedido está vacío")
+        transaction = await self._en_almacenamiento(orden.cobrar, usuario)
+        return 201, {"transaccion": transaction}
+    
+    async def _cobrar_pedido(self, consulta: dict, datos: dict, pedido_id: str) -> Tuple[int, dict]:
+        # Se retira antes de cobrar para que dos solicitudes no lo cobren dos veces
+        pedido = self._obtener_pedido(pedido_id)
+        del self.pedidos[pedido_id]
+        try:
+            return await self._cobrar(pedido['orden'], pedido['usuario'])
+        except Exception:
+            self.pedidos[pedido_id] = pedido
+            raise
+    
+    async def _venta_directa(self, consulta: dict, datos: dict) -> Tuple[int, dict]:
+        orden = OrderManager(self.menu_manager)
+        self._agregar(orden, datos.get('items', []))
+        return await self._cobrar(orden, self._usuario(datos))
+    
+    # Reportes
+    
+    async def _reporte_ventas(self, consulta: dict, datos: dict) -> Tuple[int, dict]:
+        return 200, await self._en_almacenamiento(TransactionManager.obtener_estadisticas)
+    
+    async def _reporte_periodo(self, consulta: dict, datos: dict) -> Tuple[int, list]:
+        periodo = consulta.get('periodo', 'dia')
+        if periodo not in ReportManager.PERIODOS:
+            raise ApiServer.Rechazo(400, f"Período desconocido: {periodo}")
+        return 200, await self._en_almacenamiento(
+            TransactionManager.ventas_por_periodo, periodo,
+            ReportManager.normalizar_fecha(consulta.get('desde')),
+            ReportManager.normalizar_fecha(consulta.get('hasta'), fin=True),
+            consulta.get('usuario')
+        )
+    
+    async def _reporte_cajeros(self, consulta: dict, datos: dict) -> Tuple[int, list]:
+        return 200, await self._en_almacenamiento(
+            TransactionManager.ventas_por_usuario,
+            ReportManager.normalizar_fecha(consulta.get('desde')),
+            ReportManager.normalizar_fecha(consulta.get('hasta'), fin=True)
+        )
+    
+    async def _transacciones(self, consulta: dict, datos: dict) -> Tuple[int, list]:
+        limite = min(int(consulta.get('limite', 10)), ApiServer.MAX_TRANSACCIONES)
+        desplazamiento = int(consulta.get('desplazamiento', 0))
+        if limite < 1 or desplazamiento < 0:
+            raise ApiServer.Rechazo(400, "'limite' y 'desplazamiento' deben ser positivos")
+        return 200, await self._en_almacenamiento(TransactionManager.obtener_ultimas, limite, desplazamiento)
+    
+    async def _transaccion(self, consulta: dict, datos: dict, id_transaccion: str) -> Tuple[int, dict]:
+        transaction = await self._en_almacenamiento(TransactionManager.buscar, id_transaccion)
+        if transaction is None:
+            raise ApiServer.Rechazo(404, f"Transacción no encontrada: {id_transaccion}")
+        return 200, transaction
+    
+    def _cocina(self, consulta: dict, datos: dict) -> Tuple[int, dict]:
+        return 200, {"pendientes": KitchenDispatcher.pendientes(), "latencias": KitchenDispatcher.latencias()}
+    
+    def _metricas(self, consulta: dict, datos: dict) -> Tuple[int, str]:
+        return 200, Metrics.exportar()
 
 
 class BusinessSystem:
@@ -483,10 +5094,28 @@ class BusinessSystem:
     
     def __init__(self):
         self.config = ConfigManager.cargar_config()
+        Logger.configurar(self.config)
+        Metrics.configurar(self.config)
+        Money.configurar(self.config)
+        BackupManager.configurar(self.config)
+        KitchenDispatcher.configurar(self.config)
+        TransactionManager.configurar(self.config)
         self.menu_manager = MenuManager(self.config)
         self.auth_manager = AuthManager(self.config)
         Logger.info("Sistema iniciado")
     
+    def _recargar_config(self) -> bool:
+        """Adopta los cambios de inventory.json hechos en otra terminal. Retorna True si los hubo"""
+        config = ConfigManager.recargar_si_cambio()
+        if config is None:
+            return False
+        
+        self.config = config
+        Money.configurar(config)
+        self.menu_manager = MenuManager(config)
+        self.auth_manager = AuthManager(config)
+        return True
+    
     def ejecutar(self):
         """Ejecuta el sistema principal"""
         self.menu_manager._mostrar_header()
@@ -495,6 +5124,7 @@ class BusinessSystem:
         rol = self._solicitar_rol()
         username, password = self._solicitar_credenciales()
         
+        self._recargar_config()
         if not self.auth_manager.autenticar(username, password, rol):
             print(f"\n{Color.FAIL}Credenciales incorrectas. Acceso denegado.{Color.ENDC}")
             Logger.warning(f"Acceso denegado para usuario: {username}")
@@ -535,18 +5165,27 @@ class BusinessSystem:
     def _menu_administrador(self):
         """Menú del administrador"""
         while True:
-            print(f"\n{Color.BOLD}{Color.HEADER}{'─'*60}{Color.ENDC}")
-            print(f"{Color.BOLD}{Color.HEADER}  PANEL DE ADMINISTRACIÓN{Color.ENDC}")
-            print(f"{Color.BOLD}{Color.HEADER}{'─'*60}{Color.ENDC}\n")
-            
-            print(f"{Color.OKCYAN}1.{Color.ENDC} Ver menú")
-            print(f"{Color.OKCYAN}2.{Color.ENDC} Agregar producto")
-            print(f"{Color.OKCYAN}3.{Color.ENDC} Eliminar producto")
-            print(f"{Color.OKCYAN}4.{Color.ENDC} Modificar precio")
-            print(f"{Color.OKCYAN}5.{Color.ENDC} Ver reporte de ventas")
-            print(f"{Color.OKCYAN}6.{Color.ENDC} Ver últimas transacciones")
-            print(f"{Color.OKCYAN}7.{Color.ENDC} Crear backup manual")
-            print(f"{Color.OKCYAN}8.{Color.ENDC} {Color.FAIL}Salir{Color.ENDC}")
+            lineas = []
+            if self._recargar_config():
+                lineas += ['', f"{Color.OKCYAN}Configuración actualizada desde otra terminal{Color.ENDC}"]
+            lineas += ScreenRenderer.titulo("PANEL DE ADMINISTRACIÓN", Color.HEADER)
+            lineas += [
+                f"{Color.OKCYAN}1.{Color.ENDC} Ver menú",
+                f"{Color.OKCYAN}2.{Color.ENDC} Agregar producto",
+                f"{Color.OKCYAN}3.{Color.ENDC} Eliminar producto",
+                f"{Color.OKCYAN}4.{Color.ENDC} Modificar precio",
+                f"{Color.OKCYAN}5.{Color.ENDC} Ver reporte de ventas",
+                f"{Color.OKCYAN}6.{Color.ENDC} Ver últimas transacciones",
+                f"{Color.OKCYAN}7.{Color.ENDC} Crear backup manual",
+                f"{Color.OKCYAN}8.{Color.ENDC} {Color.FAIL}Salir{Color.ENDC}",
+                f"{Color.OKCYAN}9.{Color.ENDC} Ventas por período",
+                f"{Color.OKCYAN}10.{Color.ENDC} Ventas por cajero",
+                f"{Color.OKCYAN}11.{Color.ENDC} Importar precios desde CSV",
+                f"{Color.OKCYAN}12.{Color.ENDC} Edición por lotes del menú",
+                f"{Color.OKCYAN}13.{Color.ENDC} Pedidos en cocina",
+                f"{Color.OKCYAN}14.{Color.ENDC} Buscar transacción por ID"
+            ]
+            ScreenRenderer.escribir(lineas)
             
             opcion = input(f"\n{Color.BOLD}Seleccione una opción: {Color.ENDC}").strip()
             
@@ -561,21 +5200,153 @@ class BusinessSystem:
             elif opcion == '5':
                 ReportManager.generar_reporte_ventas()
             elif opcion == '6':
-                ReportManager.generar_reporte_transacciones()
+                self._ver_transacciones()
             elif opcion == '7':
-                ConfigManager.crear_backup()
-                print(f"{Color.OKGREEN}Backup creado exitosamente{Color.ENDC}")
+                if ConfigManager.crear_backup(incluir_transacciones=True):
+                    print(f"{Color.OKGREEN}Backup creado exitosamente{Color.ENDC}")
+                else:
+                    print(f"{Color.WARNING}Sin cambios desde el último backup{Color.ENDC}")
             elif opcion == '8':
                 print(f"\n{Color.OKGREEN}Cerrando sesión...{Color.ENDC}")
                 time.sleep(1)
                 break
+            elif opcion == '9':
+                self._reporte_por_periodo()
+            elif opcion == '10':
+                self._reporte_por_cajero()
+            elif opcion == '11':
+                self._importar_precios()
+            elif opcion == '12':
+                self._edicion_por_lotes()
+            elif opcion == '13':
+                self._estado_cocina()
+            elif opcion == '14':
+                id_transaccion = input(f"{Color.BOLD}ID de la transacción: {Color.ENDC}").strip()
+                if id_transaccion:
+                    ReportManager.mostrar_transaccion(id_transaccion)
             else:
                 print(f"{Color.FAIL}Opción inválida{Color.ENDC}")
     
+    def _importar_precios(self):
+        """Interfaz de importación de precios desde CSV"""
+        ruta = input(f"\n{Color.BOLD}Archivo CSV (producto,precio): {Color.ENDC}").strip()
+        if not ruta or not os.path.exists(ruta):
+            print(f"{Color.FAIL}Archivo no encontrado{Color.ENDC}")
+            return
+        agregar = input("¿Agregar productos nuevos? (s/n): ").strip().lower() == 's'
+        
+        MenuManager.mostrar_importacion(*self.menu_manager.importar_precios_csv(ruta, agregar))
+    
+    def _estado_cocina(self):
+        """Pedidos pendientes de cocina y latencias de cada etapa"""
+        ReportManager.generar_reporte_cocina()
+        if any(t['estado'] == 'error' for t in KitchenDispatcher.pendientes()):
+            if input("¿Reintentar los envíos fallidos? (s/n): ").strip().lower() == 's':
+                print(f"{Color.OKGREEN}Comandas reencoladas: {KitchenDispatcher.reintentar_fallidas()}{Color.ENDC}")
+    
+    def _edicion_por_lotes(self):
+        """Aplica varias ediciones del menú y las guarda juntas al confirmar"""
+        print(f"\n{Color.BOLD}Edición por lotes{Color.ENDC}: los cambios se guardan al confirmar")
+        
+        class Descartar(Exception):
+            pass
+        
+        try:
+            with ConfigManager.sesion_edicion(self.config) as sesion:
+                while True:
+                    print(f"\n{Color.OKCYAN}Cambios pendientes: {sesion['cambios']}{Color.ENDC}")
+                    print(f"{Color.OKCYAN}1.{Color.ENDC} Agregar producto  "
+                          f"{Color.OKCYAN}2.{Color.ENDC} Eliminar producto  "
+                          f"{Color.OKCYAN}3.{Color.ENDC} Modificar precio")
+                    print(f"{Color.OKCYAN}C.{Color.ENDC} Confirmar cambios  "
+                          f"{Color.OKCYAN}D.{Color.ENDC} Descartar cambios")
+                    opcion = input(f"{Color.BOLD}Opción: {Color.ENDC}").strip().lower()
+                    
+                    if opcion == '1':
+                        self._agregar_producto()
+                    elif opcion == '2':
+                        self._eliminar_producto()
+                    elif opcion == '3':
+                        self._modificar_precio()
+                    elif opcion == 'c':
+                        break
+                    elif opcion == 'd':
+                        raise Descartar()
+                    else:
+                        print(f"{Color.FAIL}Opción inválida{Color.ENDC}")
+            if sesion.get('fusionada'):
+                self.menu_manager.invalidar_catalogo()
+            print(f"{Color.OKGREEN}Cambios confirmados{Color.ENDC}")
+        except Descartar:
+            self.menu_manager.invalidar_catalogo()
+            print(f"{Color.WARNING}Cambios descartados{Color.ENDC}")
+    
+    def _solicitar_rango(self) -> Tuple[Optional[str], Optional[str]]:
+        """Solicita un rango de fechas opcional"""
+        desde = input("Desde (YYYY-MM-DD, vacío = inicio): ").strip()
+        hasta = input("Hasta (YYYY-MM-DD, vacío = hoy): ").strip()
+        return ReportManager.normalizar_fecha(desde), ReportManager.normalizar_fecha(hasta, fin=True)
+    
+    def _reporte_por_periodo(self):
+        """Interfaz del reporte de ventas por período"""
+        periodos = list(ReportManager.PERIODOS)
+        ScreenRenderer.escribir(['', f"{Color.BOLD}Ventas por Período{Color.ENDC}", ScreenRenderer.separador()] +
+                                [f"  {idx}. {ReportManager.PERIODOS[periodo]}" for idx, periodo in enumerate(periodos, 1)])
+        
+        opcion = input(f"\n{Color.BOLD}Agrupar por: {Color.ENDC}").strip()
+        if opcion not in [str(i) for i in range(1, len(periodos) + 1)]:
+            print(f"{Color.FAIL}Opción inválida{Color.ENDC}")
+            return
+        
+        try:
+            desde, hasta = self._solicitar_rango()
+        except ValueError as e:
+            print(f"{Color.FAIL}{e}{Color.ENDC}")
+            return
+        usuario = input("Usuario (vacío = todos): ").strip() or None
+        
+        ReportManager.generar_reporte_periodo(periodos[int(opcion) - 1], desde, hasta, usuario)
+    
+    def _reporte_por_cajero(self):
+        """Interfaz del reporte de ventas por cajero"""
+        ScreenRenderer.escribir(['', f"{Color.BOLD}Ventas por Cajero{Color.ENDC}", ScreenRenderer.separador()])
+        try:
+            desde, hasta = self._solicitar_rango()
+        except ValueError as e:
+            print(f"{Color.FAIL}{e}{Color.ENDC}")
+            return
+        
+        ReportManager.generar_reporte_usuarios(desde, hasta)
+    
+    def _ver_transacciones(self, limite: Optional[int] = None):
+        """Interfaz paginada de últimas transacciones"""
+        limite = limite or ReportManager.transacciones_por_pagina()
+        desplazamiento = 0
+        while True:
+            hay_mas = ReportManager.generar_reporte_transacciones(limite, desplazamiento)
+            
+            opciones = []
+            if hay_mas:
+                opciones.append("[S] Más antiguas")
+            if desplazamiento > 0:
+                opciones.append("[A] Más recientes")
+            if not opciones:
+                return
+            opciones += ["[número] Ir a página", "[Enter] Volver"]
+            
+            opcion = input(f"{Color.BOLD}{'  '.join(opciones)}: {Color.ENDC}").strip().lower()
+            if opcion == 's' and hay_mas:
+                desplazamiento += limite
+            elif opcion == 'a' and desplazamiento > 0:
+                desplazamiento = max(0, desplazamiento - limite)
+            elif opcion.isdigit() and int(opcion) >= 1:
+                desplazamiento = (int(opcion) - 1) * limite
+            else:
+                return
+    
     def _agregar_producto(self):
         """Interfaz para agregar producto"""
-        print(f"\n{Color.BOLD}Agregar Nuevo Producto{Color.ENDC}")
-        print(f"{Color.OKCYAN}{'─'*60}{Color.ENDC}")
+        ScreenRenderer.escribir(['', f"{Color.BOLD}Agregar Nuevo Producto{Color.ENDC}", ScreenRenderer.separador()])
         
         nombre = input("Nombre del producto: ").strip()
         if not nombre:
@@ -583,7 +5354,7 @@ class BusinessSystem:
             return
         
         try:
-            precio = float(input("Precio: ").strip())
+            precio = Money.normalizar(input("Precio: "))
             if precio <= 0:
                 print(f"{Color.FAIL}El precio debe ser mayor a 0{Color.ENDC}")
                 return
@@ -609,7 +5380,8 @@ class BusinessSystem:
         
         if nombre and nombre in self.menu_manager.menu:
             try:
-                nuevo_precio = float(input(f"Nuevo precio (actual: {self.menu_manager.currency}{self.menu_manager.menu[nombre]}): ").strip())
+                actual = Money.formatear(self.menu_manager.precio_centavos(nombre), self.menu_manager.currency)
+                nuevo_precio = Money.normalizar(input(f"Nuevo precio (actual: {actual}): "))
                 if nuevo_precio <= 0:
                     print(f"{Color.FAIL}El precio debe ser mayor a 0{Color.ENDC}")
                     return
@@ -625,27 +5397,31 @@ class BusinessSystem:
         order_manager = OrderManager(self.menu_manager)
         
         while True:
-            print(f"\n{Color.BOLD}{Color.OKBLUE}{'─'*60}{Color.ENDC}")
-            print(f"{Color.BOLD}{Color.OKBLUE}  REALIZAR PEDIDO{Color.ENDC}")
-            print(f"{Color.BOLD}{Color.OKBLUE}{'─'*60}{Color.ENDC}\n")
-            
-            print(f"{Color.OKCYAN}1.{Color.ENDC} Ver menú")
-            print(f"{Color.OKCYAN}2.{Color.ENDC} Agregar producto al carrito")
-            print(f"{Color.OKCYAN}3.{Color.ENDC} Ver carrito")
-            print(f"{Color.OKCYAN}4.{Color.ENDC} Procesar pago")
-            print(f"{Color.OKCYAN}5.{Color.ENDC} {Color.FAIL}Cancelar y salir{Color.ENDC}")
+            # El menú nuevo entra entre pedidos; con el carrito a medias se conservan sus precios
+            self._recargar_config()
+            lineas = []
+            if order_manager.actualizar_menu(self.menu_manager):
+                lineas += ['', f"{Color.OKCYAN}Menú actualizado{Color.ENDC}"]
+            lineas += ScreenRenderer.titulo("REALIZAR PEDIDO")
+            lineas += [
+                f"{Color.OKCYAN}1.{Color.ENDC} Ver menú",
+                f"{Color.OKCYAN}2.{Color.ENDC} Agregar producto al carrito",
+                f"{Color.OKCYAN}3.{Color.ENDC} Ver carrito",
+                f"{Color.OKCYAN}4.{Color.ENDC} Procesar pago",
+                f"{Color.OKCYAN}5.{Color.ENDC} {Color.FAIL}Cancelar y salir{Color.ENDC}"
+            ]
+            ScreenRenderer.escribir(lineas)
             
             opcion = input(f"\n{Color.BOLD}Seleccione una opción: {Color.ENDC}").strip()
             
             if opcion == '1':
-                self.menu_manager.mostrar_menu(False)
+                order_manager.menu_manager.mostrar_menu(False)
             elif opcion == '2':
                 self._agregar_al_carrito(order_manager)
             elif opcion == '3':
                 order_manager.mostrar_pedido()
             elif opcion == '4':
                 if order_manager.procesar_pago(username):
-                    time.sleep(2)
                     break
             elif opcion == '5':
                 print(f"\n{Color.WARNING}Pedido cancelado{Color.ENDC}")
@@ -656,26 +5432,356 @@ class BusinessSystem:
     
     def _agregar_al_carrito(self, order_manager: OrderManager):
         """Interfaz para agregar productos al carrito"""
-        self.menu_manager.mostrar_menu(False)
-        
-        producto = input(f"\n{Color.BOLD}Nombre del producto: {Color.ENDC}").strip()
+        menu_manager = order_manager.menu_manager
+        producto = input(f"\n{Color.BOLD}Producto (número, código o nombre; ? = ver menú): {Color.ENDC}").strip()
+        if producto == '?':
+            menu_manager.mostrar_menu(False)
+            producto = input(f"{Color.BOLD}Producto: {Color.ENDC}").strip()
         
         if not producto:
             return
         
+        coincidencias = menu_manager.resolver_producto(producto)
+        if not coincidencias:
+            print(f"{Color.FAIL}Producto no encontrado: {producto}{Color.ENDC}")
+            return
+        
+        if len(coincidencias) > 1:
+            print(f"\n{Color.BOLD}Coincidencias:{Color.ENDC}")
+            for idx, item in enumerate(coincidencias, 1):
+                print(f"  {Color.OKCYAN}{idx}.{Color.ENDC} {item:<40} "
+                      f"{Color.OKGREEN}{Money.formatear(menu_manager.precio_centavos(item), menu_manager.currency)}"
+                      f"{Color.ENDC}")
+            eleccion = input(f"{Color.BOLD}Seleccione (1-{len(coincidencias)}): {Color.ENDC}").strip()
+            if eleccion not in [str(i) for i in range(1, len(coincidencias) + 1)]:
+                print(f"{Color.FAIL}Opción inválida{Color.ENDC}")
+                return
+            coincidencias = [coincidencias[int(eleccion) - 1]]
+        
         try:
-            cantidad = int(input(f"{Color.BOLD}Cantidad: {Color.ENDC}").strip())
+            cantidad = int(input(f"{Color.BOLD}Cantidad de {coincidencias[0]}: {Color.ENDC}").strip())
             if cantidad <= 0:
                 print(f"{Color.FAIL}La cantidad debe ser mayor a 0{Color.ENDC}")
                 return
             
-            order_manager.agregar_item(producto, cantidad)
+            order_manager.agregar_item(coincidencias[0], cantidad)
         except ValueError:
             print(f"{Color.FAIL}Cantidad inválida{Color.ENDC}")
 
 
+def _crear_parser() -> argparse.ArgumentParser:
+    """Define los comandos no interactivos"""
+    parser = argparse.ArgumentParser(description="Sistema de Gestión de Negocios")
+    subparsers = parser.add_subparsers(dest='comando')
+    
+    migrar = subparsers.add_parser('migrar', help="Importa historiales existentes al motor de almacenamiento")
+    migrar.add_argument('--engine', choices=TransactionManager.MOTORES,
+                        help="Motor destino (por defecto el configurado en inventory.json)")
+    migrar.add_argument('--origen', nargs='+',
+                        help="Archivos de historial a importar (arreglo JSON o JSON Lines)")
+    
+    reporte = subparsers.add_parser('reporte', help="Genera un reporte de ventas sin interacción")
+    reporte.add_argument('--periodo', choices=list(ReportManager.PERIODOS),
+                         help="Agrupa las ventas por hora, día, semana o mes")
+    reporte.add_argument('--por-usuario', action='store_true', help="Agrupa las ventas por cajero")
+    reporte.add_argument('--desde', help="Fecha inicial (YYYY-MM-DD o YYYY-MM-DD HH:MM:SS)")
+    reporte.add_argument('--hasta', help="Fecha final inclusive (YYYY-MM-DD o YYYY-MM-DD HH:MM:SS)")
+    reporte.add_argument('--usuario', help="Filtra por cajero (con --periodo o --analitica)")
+    reporte.add_argument('--analitica', action='store_true',
+                         help="Reporte analítico columnar (vectorizado con NumPy si está instalado)")
+    reporte.add_argument('--top', type=int, default=10, help="Productos a mostrar en el reporte analítico")
+    reporte.add_argument('--sin-numpy', action='store_true', help="Fuerza el motor analítico en Python puro")
+    reporte.add_argument('--json', action='store_true', help="Imprime el resultado en JSON")
+    reporte.add_argument('--engine', choices=TransactionManager.MOTORES,
+                         help="Motor de almacenamiento (por defecto el configurado en inventory.json)")
+    reporte.add_argument('--workers', type=lambda v: v if v == 'auto' else int(v),
+                         help="Procesos para calcular sobre particiones (número o 'auto')")
+    
+    precios = subparsers.add_parser('precios', help="Importa precios del menú desde un CSV (producto,precio)")
+    precios.add_argument('archivo', help="Archivo CSV; el encabezado es opcional")
+    precios.add_argument('--agregar-nuevos', action='store_true',
+                         help="Agrega al menú los productos que no existan")
+    
+    respaldar = subparsers.add_parser('respaldar', help="Crea un punto de respaldo incremental")
+    respaldar.add_argument('--solo-config', action='store_true', help="No incluye el historial de transacciones")
+    
+    restaurar = subparsers.add_parser('restaurar', help="Restaura la configuración y el historial a un punto en el tiempo")
+    restaurar.add_argument('--lista', action='store_true', help="Lista los puntos de respaldo disponibles")
+    restaurar.add_argument('--fecha', help="Estado más reciente anterior o igual a la fecha (YYYY-MM-DD [HH:MM:SS])")
+    restaurar.add_argument('--punto', help="Id de un punto de respaldo")
+    grupo = restaurar.add_mutually_exclusive_group()
+    grupo.add_argument('--solo-config', action='store_true', help="Restaura solo inventory.json")
+    grupo.add_argument('--solo-transacciones', action='store_true', help="Restaura solo el historial")
+    restaurar.add_argument('--destino', default='.', help="Directorio donde reconstruir los archivos")
+    
+    buscar = subparsers.add_parser('buscar', help="Muestra una transacción por su ID")
+    buscar.add_argument('id', help="ID de la transacción")
+    buscar.add_argument('--json', action='store_true', help="Imprime la transacción en JSON")
+    buscar.add_argument('--engine', choices=TransactionManager.MOTORES,
+                        help="Motor de almacenamiento (por defecto el configurado en inventory.json)")
+    
+    indice = subparsers.add_parser('indice', help="Verifica o reconstruye el índice de IDs del historial JSON")
+    grupo = indice.add_mutually_exclusive_group(required=True)
+    grupo.add_argument('--verificar', action='store_true', help="Compara el índice con las particiones")
+    grupo.add_argument('--reconstruir', action='store_true', help="Reconstruye el índice desde las particiones")
+    
+    importar = subparsers.add_parser('importar', help="Importa pedidos capturados fuera de línea (CSV o JSON Lines)")
+    importar.add_argument('archivo', help="CSV (producto,cantidad[,pedido,fecha,usuario]) o JSON Lines con 'pedido'")
+    importar.add_argument('--formato', choices=OrderImporter.FORMATOS, help="Por defecto según la extensión")
+    importar.add_argument('--usuario', default='importacion', help="Cajero de los pedidos que no lo indican")
+    importar.add_argument('--rechazos', help="Archivo de pedidos rechazados (por defecto <archivo>.rechazos.<formato>)")
+    importar.add_argument('--lote', type=int, default=OrderImporter.LOTE, help="Ventas por escritura agrupada")
+    importar.add_argument('--validar', action='store_true', help="Solo valida y calcula totales, sin registrar ventas")
+    importar.add_argument('--json', action='store_true', help="Imprime el resumen en JSON")
+    importar.add_argument('--engine', choices=TransactionManager.MOTORES,
+                          help="Motor de almacenamiento (por defecto el configurado en inventory.json)")
+    
+    servidor = subparsers.add_parser('servidor', help="Atiende menú, pedidos y reportes como API HTTP/JSON")
+    servidor.add_argument('--host', help=f"Dirección de escucha (por defecto {ApiServer.HOST})")
+    servidor.add_argument('--puerto', type=int, help=f"Puerto de escucha (por defecto {ApiServer.PUERTO})")
+    
+    return parser
+
+
+def _configurar_almacenamiento(args: argparse.Namespace) -> dict:
+    """Aplica la configuración de inventory.json y de la línea de comandos. Retorna la configuración"""
+    config = {}
+    if os.path.exists(ConfigManager.CONFIG_FILE):
+        try:
+            with open(ConfigManager.CONFIG_FILE, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            Logger.configurar(config)
+            Metrics.configurar(config)
+            Money.configurar(config)
+            BackupManager.configurar(config)
+            TransactionManager.configurar(config)
+        except (json.JSONDecodeError, ValueError) as e:
+            Logger.warning(f"Configuración de almacenamiento ignorada: {e}")
+    
+    if getattr(args, 'engine', None):
+        TransactionManager.configurar({"storage": {"engine": args.engine}})
+    if getattr(args, 'workers', None):
+        TransactionManager.configurar_workers(args.workers)
+    return config
+
+
+def _comando_migrar(args: argparse.Namespace) -> int:
+    """Importa historiales existentes al motor de almacenamiento"""
+    motor = TransactionManager.motor
+    
+    if not args.origen and motor == 'json':
+        legacy = [TransactionManager.TRANSACTIONS_FILE, TransactionManager.JOURNAL_FILE]
+        if not any(os.path.exists(ruta) for ruta in legacy):
+            print(f"{Color.WARNING}No hay historiales de un solo archivo para migrar{Color.ENDC}")
+            return 0
+        # Abrir el motor JSON migra los historiales antiguos a particiones
+        TransactionManager._obtener_store()
+        print(f"{Color.OKGREEN}Historial migrado a {TransactionManager.PARTITIONS_DIR}/{Color.ENDC}")
+        return 0
+    
+    cantidad = TransactionManager.migrar(motor, args.origen or [])
+    print(f"{Color.OKGREEN}Transacciones importadas a {motor}: {cantidad}{Color.ENDC}")
+    return 0
+
+
+def _comando_reporte(args: argparse.Namespace) -> int:
+    """Imprime un reporte de ventas por período, por cajero o general"""
+    desde = ReportManager.normalizar_fecha(args.desde)
+    hasta = ReportManager.normalizar_fecha(args.hasta, fin=True)
+    
+    if args.analitica:
+        motor = TransactionManager.analitica(desde, hasta, usar_numpy=not args.sin_numpy, usuario=args.usuario)
+        precios = args.config.get('menu')
+        if args.json:
+            resultado = {
+                "estadisticas": motor.estadisticas(),
+                "top_productos": motor.top_productos(args.top),
+                "ingresos_por_producto": motor.ingresos_por_producto(precios)
+            }
+            if args.periodo:
+                resultado["ventas_por_periodo"] = motor.ventas_por_periodo(args.periodo)
+        else:
+            ReportManager.generar_reporte_analitico(motor, desde, hasta, args.top, precios, args.usuario)
+            if args.periodo:
+                ReportManager.mostrar_filas_periodo(args.periodo, motor.ventas_por_periodo(args.periodo))
+    elif args.periodo:
+        if args.json:
+            resultado = TransactionManager.ventas_por_periodo(args.periodo, desde, hasta, args.usuario)
+        else:
+            ReportManager.generar_reporte_periodo(args.periodo, desde, hasta, args.usuario)
+    elif args.por_usuario:
+        if args.json:
+            resultado = TransactionManager.ventas_por_usuario(desde, hasta)
+        else:
+            ReportManager.generar_reporte_usuarios(desde, hasta)
+    elif args.json:
+        resultado = TransactionManager.obtener_estadisticas()
+    else:
+        ReportManager.generar_reporte_ventas()
+    
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    return 0
+
+
+def _comando_precios(args: argparse.Namespace) -> int:
+    """Importa precios desde CSV con un solo backup y un solo guardado"""
+    menu_manager = MenuManager(ConfigManager.cargar_config())
+    modificados, agregados, rechazados = menu_manager.importar_precios_csv(args.archivo, args.agregar_nuevos)
+    MenuManager.mostrar_importacion(modificados, agregados, rechazados)
+    return 1 if rechazados and not (modificados or agregados) else 0
+
+
+def _comando_respaldar(args: argparse.Namespace) -> int:
+    """Crea un punto de respaldo de la configuración y del historial"""
+    punto = ConfigManager.crear_backup(incluir_transacciones=not args.solo_config)
+    if punto:
+        print(f"{Color.OKGREEN}Punto de respaldo creado: {punto}{Color.ENDC}")
+    else:
+        print(f"{Color.WARNING}Sin cambios desde el último respaldo{Color.ENDC}")
+    return 0
+
+
+def _comando_restaurar(args: argparse.Namespace) -> int:
+    """Lista los puntos de respaldo o reconstruye los archivos de un punto en el tiempo"""
+    if args.lista:
+        print(f"{Color.BOLD}{'Punto':<26} {'Fecha':<20} {'Contenido':<22} {'Archivos':>8}{Color.ENDC}")
+        for punto in BackupManager.cargar_puntos():
+            print(f"{punto['id']:<26} {punto['fecha']:<20} {', '.join(punto['grupos']):<22} "
+                  f"{len(punto['archivos']):>8}")
+        return 0
+    
+    grupos = ('config', 'transacciones')
+    if args.solo_config:
+        grupos = ('config',)
+    elif args.solo_transacciones:
+        grupos = ('transacciones',)
+    
+    fecha = ReportManager.normalizar_fecha(args.fecha, fin=True)
+    punto = args.punto
+    if not fecha and not punto:
+        puntos = BackupManager.cargar_puntos()
+        if not puntos:
+            raise ValueError("No hay puntos de respaldo")
+        punto = puntos[-1]['id']
+    
+    if os.path.abspath(args.destino) == os.path.abspath('.'):
+        # Respaldo del estado actual para poder deshacer la restauración; sin retención
+        # para no descartar el punto que se va a restaurar
+        BackupManager.respaldar('transacciones' in grupos, retencion=False)
+    
+    restaurados = BackupManager.restaurar(fecha, punto, grupos, args.destino)
+    for ruta in restaurados:
+        print(f"  {Color.OKGREEN}✓{Color.ENDC} {ruta}")
+    print(f"{Color.OKGREEN}Archivos restaurados: {len(restaurados)}{Color.ENDC}")
+    return 0
+
+
+def _comando_buscar(args: argparse.Namespace) -> int:
+    """Imprime una transacción por su ID"""
+    if not args.json:
+        return 0 if ReportManager.mostrar_transaccion(args.id) else 1
+    transaction = TransactionManager.buscar(args.id)
+    if transaction is None:
+        print(json.dumps(None))
+        return 1
+    print(json.dumps(transaction, ensure_ascii=False, indent=2))
+    return 0
+
+
+def _comando_indice(args: argparse.Namespace) -> int:
+    """Verifica o reconstruye el índice de IDs del motor JSON"""
+    store = TransactionManager._obtener_store()
+    if not isinstance(store, JsonTransactionStore):
+        print(f"{Color.WARNING}El motor {TransactionManager.motor} usa su propio índice por ID{Color.ENDC}")
+        return 0
+    
+    if args.reconstruir:
+        inicio = time.perf_counter()
+        cantidad = store.reconstruir_indice_ids()
+        print(f"{Color.OKGREEN}Índice de IDs reconstruido: {cantidad} entradas "
+              f"({time.perf_counter() - inicio:.2f} s){Color.ENDC}")
+        return 0
+    
+    resultado = store.verificar_indice_ids()
+    print(f"  Registros en particiones: {resultado['registros']}")
+    print(f"  Entradas en el índice:    {resultado['indexados']} (cabecera: {resultado['cantidad_cabecera']})")
+    if resultado['desactualizadas']:
+        print(f"  {Color.WARNING}Particiones pendientes de indexar: "
+              f"{', '.join(resultado['desactualizadas'])}{Color.ENDC}")
+    if resultado['ids_repetidos']:
+        print(f"  {Color.WARNING}IDs repetidos en el historial: {resultado['ids_repetidos']}{Color.ENDC}")
+    
+    errores = (resultado['faltantes'] or resultado['sobrantes'] or
+               resultado['cantidad_cabecera'] != resultado['indexados'])
+    if errores:
+        print(f"  {Color.FAIL}✗ Índice inconsistente: {resultado['faltantes']} faltantes, "
+              f"{resultado['sobrantes']} sobrantes. Ejecute: python main.py indice --reconstruir{Color.ENDC}")
+        return 1
+    print(f"  {Color.OKGREEN}✓ Índice consistente{Color.ENDC}")
+    return 0
+
+
+def _comando_importar(args: argparse.Namespace) -> int:
+    """Importa pedidos desde CSV o JSON Lines con escrituras agrupadas y archivo de rechazos"""
+    importador = OrderImporter(MenuManager(ConfigManager.cargar_config()), args.usuario, args.lote, args.validar)
+    resumen = importador.importar(args.archivo, args.formato, args.rechazos)
+    if args.json:
+        print(json.dumps(resumen, ensure_ascii=False, indent=2))
+    else:
+        OrderImporter.mostrar_resumen(resumen)
+    return 1 if resumen['rechazados'] and not resumen['importados'] else 0
+
+
+def _comando_servidor(args: argparse.Namespace) -> int:
+    """Atiende el menú, los pedidos y los reportes como API HTTP/JSON hasta Ctrl+C"""
+    config = ConfigManager.cargar_config()
+    KitchenDispatcher.configurar(config)
+    try:
+        # En este hilo: el bloqueo de la bandeja de salida dura lo que dura el proceso
+        KitchenDispatcher.iniciar()
+        ApiServer(config, args.host, args.puerto).ejecutar()
+    finally:
+        KitchenDispatcher.cerrar()
+    return 0
+
+
+def ejecutar_comando(args: argparse.Namespace) -> int:
+    """Ejecuta un comando no interactivo. Retorna el código de salida"""
+    comandos = {
+        'migrar': _comando_migrar,
+        'reporte': _comando_reporte,
+        'precios': _comando_precios,
+        'respaldar': _comando_respaldar,
+        'restaurar': _comando_restaurar,
+        'buscar': _comando_buscar,
+        'indice': _comando_indice,
+        'importar': _comando_importar,
+        'servidor': _comando_servidor,
+    }
+    
+    try:
+        args.config = _configurar_almacenamiento(args)
+        return comandos[args.comando](args)
+    except Exception as e:
+        Logger.error(f"Error en comando '{args.comando}': {e}")
+        print(f"{Color.FAIL}Error: {e}{Color.ENDC}")
+        return 1
+    finally:
+        TransactionManager.cerrar()
+
+
 def main():
     """Función principal"""
+    Metrics.iniciar_perfil()
+    args = _crear_parser().parse_args()
+    if args.comando:
+        try:
+            codigo = ejecutar_comando(args)
+        finally:
+            Logger.cerrar()
+        sys.exit(codigo)
+    
     try:
         system = BusinessSystem()
         system.ejecutar()
@@ -686,6 +5792,9 @@ def main():
         print(f"\n{Color.FAIL}Error inesperado: {e}{Color.ENDC}")
         Logger.error(f"Error inesperado: {e}")
     finally:
+        KitchenDispatcher.cerrar()
+        TransactionManager.cerrar()
+        Logger.cerrar()
         print(f"\n{Color.BOLD}Gracias por usar el sistema{Color.ENDC}\n")
         time.sleep(1)
 